@@ -25,6 +25,10 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
+# Адрес БД из окружения важнее указанного в alembic.ini (например, PostgreSQL на сервере)
+if os.getenv("DATABASE_URL"):
+    config.set_main_option("sqlalchemy.url", os.getenv("DATABASE_URL").replace("%", "%%"))
+
 target_metadata = Base.metadata
 
 def run_migrations_offline() -> None:
@@ -72,28 +72,30 @@ def upgrade() -> None:
     # Добавляем админов
     for admin in ADMINS:
         op.execute(f"""
-            INSERT OR IGNORE INTO users (telegram_id, username, is_admin, is_superadmin)
-            VALUES ({admin['telegram_id']}, '{admin['username']}', 1, 0)
+            INSERT INTO users (telegram_id, username, is_admin, is_superadmin)
+            VALUES ({admin['telegram_id']}, '{admin['username']}', 1, FALSE)
+            ON CONFLICT (telegram_id) DO NOTHING
         """)
     
     # Устанавливаем суперадмина
     op.execute("""
         UPDATE users 
-        SET is_superadmin = 1 
+        SET is_superadmin = TRUE 
         WHERE telegram_id = 787676749
     """)
     
     # Добавляем представителей СМИ
     for media in MEDIA_OUTLETS:
         op.execute(f"""
-            INSERT OR IGNORE INTO users (telegram_id, username, is_admin, is_superadmin, media_outlet)
+            INSERT INTO users (telegram_id, username, is_admin, is_superadmin, media_outlet)
             VALUES (
                 {media['telegram_id']}, 
                 '{media['username']}', 
                 0, 
-                0,
+                FALSE,
                 '{media['media_outlet']}'
             )
+            ON CONFLICT (telegram_id) DO NOTHING
         """)
 
 def downgrade() -> None:
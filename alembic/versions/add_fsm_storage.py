@@ -0,0 +1,29 @@
+"""add fsm storage
+
+Revision ID: add_fsm_storage
+Revises: add_notification_outbox
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'add_fsm_storage'
+down_revision = 'add_notification_outbox'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # Таблица для хранения состояний FSM между перезапусками бота
+    op.create_table('fsm_storage',
+        sa.Column('key', sa.String(), nullable=False),
+        sa.Column('state', sa.String(), nullable=True),
+        sa.Column('data', sa.Text(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index(op.f('ix_fsm_storage_updated_at'), 'fsm_storage', ['updated_at'], unique=False)
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_fsm_storage_updated_at'), table_name='fsm_storage')
+    op.drop_table('fsm_storage')
\ No newline at end of file
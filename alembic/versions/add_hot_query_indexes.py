@@ -0,0 +1,32 @@
+"""add indexes for hot queries
+
+Revision ID: add_hot_query_indexes
+Revises: add_updated_at
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'add_hot_query_indexes'
+down_revision = 'add_updated_at'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_submissions_status_submitted_at', 'submissions', ['status', 'submitted_at', 'id']),
+    ('ix_submissions_task_user', 'submissions', ['task_id', 'user_id']),
+    ('ix_tasks_status_deadline', 'tasks', ['status', 'deadline']),
+    ('ix_tasks_created_by', 'tasks', ['created_by']),
+    ('ix_task_assignments_outlet_task', 'task_assignments', ['media_outlet', 'task_id']),
+    ('ix_users_media_outlet', 'users', ['media_outlet']),
+]
+
+def upgrade() -> None:
+    # Индексы под запросы очереди модерации, активных заданий и назначений
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+def downgrade() -> None:
+    for name, table, columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
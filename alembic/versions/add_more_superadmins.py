@@ -23,7 +23,7 @@ def upgrade() -> None:
     # Сначала сбрасываем все флаги суперадмина
     op.execute("""
         UPDATE users 
-        SET is_superadmin = 0 
+        SET is_superadmin = FALSE 
         WHERE is_superadmin IS NOT NULL
     """)
     
@@ -31,7 +31,7 @@ def upgrade() -> None:
     for admin_id in SUPERADMIN_IDS:
         op.execute(f"""
             UPDATE users 
-            SET is_superadmin = 1, is_admin = 1
+            SET is_superadmin = TRUE, is_admin = 1
             WHERE telegram_id = {admin_id}
         """)
 
@@ -39,6 +39,6 @@ def downgrade() -> None:
     # При откате оставляем только одного суперадмина
     op.execute("""
         UPDATE users 
-        SET is_superadmin = 0 
+        SET is_superadmin = FALSE 
         WHERE telegram_id != 787676749
     """) 
\ No newline at end of file
@@ -0,0 +1,22 @@
+"""add version column to submissions
+
+Revision ID: add_row_versions
+Revises: add_submission_events
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'add_row_versions'
+down_revision = 'add_submission_events'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # Версия строки для оптимистичной блокировки
+    op.add_column('submissions', sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+def downgrade() -> None:
+    with op.batch_alter_table('submissions') as batch_op:
+        batch_op.drop_column('version')
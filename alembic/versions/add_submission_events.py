@@ -0,0 +1,33 @@
+"""add submission events
+
+Revision ID: add_submission_events
+Revises: add_task_reminders
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'add_submission_events'
+down_revision = 'add_task_reminders'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # Журнал смен статуса публикаций
+    op.create_table('submission_events',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('submission_id', sa.Integer(), nullable=False),
+        sa.Column('action', sa.String(length=32), nullable=False),
+        sa.Column('from_status', sa.String(length=16), nullable=True),
+        sa.Column('to_status', sa.String(length=16), nullable=False),
+        sa.Column('actor_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['submission_id'], ['submissions.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_submission_events_submission', 'submission_events', ['submission_id', 'id'])
+
+def downgrade() -> None:
+    op.drop_index('ix_submission_events_submission', table_name='submission_events')
+    op.drop_table('submission_events')
@@ -20,7 +20,7 @@ def upgrade() -> None:
     # Устанавливаем первого админа как суперадмина
     op.execute("""
         UPDATE users 
-        SET is_superadmin = 1 
+        SET is_superadmin = TRUE 
         WHERE telegram_id = 787676749
     """)
 
@@ -0,0 +1,22 @@
+"""add last reminder offset to tasks
+
+Revision ID: add_task_reminders
+Revises: postgres_compat
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'add_task_reminders'
+down_revision = 'postgres_compat'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # За сколько минут до дедлайна отправлено последнее напоминание
+    op.add_column('tasks', sa.Column('last_reminder_offset', sa.Integer(), nullable=True))
+
+def downgrade() -> None:
+    with op.batch_alter_table('tasks') as batch_op:
+        batch_op.drop_column('last_reminder_offset')
@@ -0,0 +1,26 @@
+"""add updated_at columns
+
+Revision ID: add_updated_at
+Revises: add_fsm_storage
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'add_updated_at'
+down_revision = 'add_fsm_storage'
+branch_labels = None
+depends_on = None
+
+TABLES = ['tasks', 'submissions', 'task_assignments', 'users']
+
+def upgrade() -> None:
+    # Время последнего изменения строк, по нему определяется, что отчет устарел
+    for table in TABLES:
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+def downgrade() -> None:
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('updated_at')
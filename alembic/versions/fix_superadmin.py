@@ -17,20 +17,20 @@ def upgrade() -> None:
     # Сначала сбрасываем все флаги суперадмина
     op.execute("""
         UPDATE users 
-        SET is_superadmin = 0 
+        SET is_superadmin = FALSE 
         WHERE is_superadmin IS NOT NULL
     """)
     
     # Устанавливаем суперадмина
     op.execute("""
         UPDATE users 
-        SET is_superadmin = 1, is_admin = 1
+        SET is_superadmin = TRUE, is_admin = 1
         WHERE telegram_id = 787676749
     """)
 
 def downgrade() -> None:
     op.execute("""
         UPDATE users 
-        SET is_superadmin = 0 
+        SET is_superadmin = FALSE 
         WHERE telegram_id = 787676749
     """) 
\ No newline at end of file
@@ -10,9 +10,9 @@ import sqlalchemy as sa
 
 # revision identifiers, used by Alembic.
 revision = 'merge_heads'
-down_revision = None
+down_revision = ('add_more_superadmins', 'check_users')
 branch_labels = None
-depends_on = ('add_more_superadmins', 'check_users')
+depends_on = None
 
 def upgrade() -> None:
     pass
@@ -0,0 +1,60 @@
+"""align column types with models on postgresql
+
+Revision ID: postgres_compat
+Revises: add_hot_query_indexes
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = 'postgres_compat'
+down_revision = 'add_hot_query_indexes'
+branch_labels = None
+depends_on = None
+
+# В SQLite типы колонок не строгие, поэтому ранние миграции создали их не такими,
+# как в моделях. На PostgreSQL приводим типы к моделям; на SQLite миграция ничего не делает.
+
+
+def _is_postgresql() -> bool:
+    return op.get_bind().dialect.name == 'postgresql'
+
+
+def upgrade() -> None:
+    if not _is_postgresql():
+        return
+
+    op.alter_column(
+        'users', 'is_admin',
+        type_=sa.Boolean(),
+        postgresql_using='is_admin <> 0'
+    )
+    op.alter_column('users', 'telegram_id', type_=sa.BigInteger())
+    op.alter_column('notification_outbox', 'chat_id', type_=sa.BigInteger())
+    # Тип submissionstatus создан миграцией c929d32e2791 для previous_status;
+    # в status хранились значения ('pending'), а SQLAlchemy пишет имена ('PENDING')
+    op.alter_column(
+        'submissions', 'status',
+        type_=postgresql.ENUM(name='submissionstatus', create_type=False),
+        postgresql_using='upper(status)::submissionstatus'
+    )
+
+
+def downgrade() -> None:
+    if not _is_postgresql():
+        return
+
+    op.alter_column(
+        'submissions', 'status',
+        type_=sa.String(),
+        postgresql_using='lower(status::text)'
+    )
+    op.alter_column('notification_outbox', 'chat_id', type_=sa.Integer())
+    op.alter_column('users', 'telegram_id', type_=sa.Integer())
+    op.alter_column(
+        'users', 'is_admin',
+        type_=sa.Integer(),
+        postgresql_using='CASE WHEN is_admin THEN 1 ELSE 0 END'
+    )
@@ -0,0 +1,160 @@
+"""Бенчмарк процессорного времени сервисов с отладочным выводом и без него.
+
+Вызывает сервисные методы горячих обработчиков (поиск пользователя, очередь
+модерации, список заданий, рассылка админам, создание и одобрение публикации,
+отчет по заданию) на временной SQLite-базе. Логирование настроено как в боте
+(setup_logging: очередь и поток записи, JSON-файл во временном каталоге,
+консоль отключена), отладка включается уровнем DEBUG логгера src - так же,
+как LOG_DEBUG_MODULES=src. Время - process_time, то есть вместе с потоком записи логов.
+
+Запуск: python bench_diagnostics.py --calls 300 --rounds 3
+"""
+import argparse
+import asyncio
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+TMP_DIR = tempfile.mkdtemp(prefix='bench_diagnostics_')
+os.environ.setdefault("BOT_TOKEN", "0:bench")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(TMP_DIR, 'bench.db')}"
+os.environ["LOG_FILE"] = os.path.join(TMP_DIR, 'bot.log')
+os.environ["LOG_LEVEL"] = "INFO"
+os.environ["LOG_DEBUG_MODULES"] = ""
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from src.database.base import Base
+from src.database.engine import engine
+from src.database.models import User, Task
+from src.services.export_service import ExportService
+from src.services.submission_service import SubmissionService
+from src.services.task_service import TaskService
+from src.services.user_service import UserService
+from src.utils.logging_config import setup_logging
+
+USERS = 50
+TASKS = 100
+
+
+async def prepare(session_pool) -> None:
+    now = datetime.now()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with session_pool() as session:
+        await session.execute(insert(User), [
+            {'id': 1, 'telegram_id': 1, 'username': 'admin', 'is_admin': True}
+        ] + [
+            {'id': i, 'telegram_id': 1000 + i, 'username': f'user{i}', 'media_outlet': f'СМИ {i}'}
+            for i in range(2, USERS + 2)
+        ])
+        await session.execute(insert(Task), [
+            {
+                'id': i,
+                'press_release_link': f'https://example.com/release/{i}',
+                'deadline': now + timedelta(days=1),
+                'status': 'new',
+                'created_at': now,
+                'created_by': 1
+            }
+            for i in range(1, TASKS + 1)
+        ])
+        await session.commit()
+        # Очередь модерации и данные для отчета
+        service = SubmissionService(session)
+        for i in range(2, USERS + 2):
+            await service.create_submission(1, i, f'Текст публикации {i} ' * 20)
+
+
+def operations(session_pool):
+    counter = iter(range(10 ** 9))
+
+    async def get_user(session):
+        await UserService(session).get_user_by_id(next(counter) % USERS + 2)
+
+    async def moderation_queue(session):
+        await SubmissionService(session).get_pending_submissions(admin_id=1, limit=10)
+
+    async def active_tasks(session):
+        await TaskService(session).get_active_tasks_with_assignments('СМИ 2')
+        await TaskService(session).get_active_tasks('СМИ 2')
+
+    async def admins(session):
+        await UserService(session).get_all_admins()
+
+    async def submit_and_approve(session):
+        n = next(counter)
+        service = SubmissionService(session)
+        submission = await service.create_submission(n % (TASKS - 1) + 2, n // (TASKS - 1) % USERS + 2, 'Текст')
+        if submission:
+            await service.approve_submission(submission.id)
+
+    async def report(session):
+        filename = await ExportService(session).export_task_report(1)
+        os.remove(filename)
+
+    return [
+        ('get_user_by_id', get_user, 1),
+        ('get_pending_submissions', moderation_queue, 1),
+        ('get_active_tasks', active_tasks, 1),
+        ('get_all_admins', admins, 1),
+        ('create+approve_submission', submit_and_approve, 1),
+        ('export_task_report', report, 20),
+    ]
+
+
+async def run(session_pool, func, calls: int) -> float:
+    started = time.process_time()
+    for _ in range(calls):
+        async with session_pool() as session:
+            await func(session)
+    return (time.process_time() - started) / calls * 1000
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=300)
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    # Консольный вывод не нужен, пишем только в файл
+    stdout, sys.stdout = sys.stdout, open(os.devnull, 'w')
+    setup_logging()
+    sys.stdout = stdout
+    debug_logger = logging.getLogger('src')
+
+    session_pool = async_sessionmaker(engine, expire_on_commit=False)
+    # Отчет пишется в текущий каталог
+    os.chdir(TMP_DIR)
+    await prepare(session_pool)
+
+    results = {}
+    for name, func, divider in operations(session_pool):
+        calls = max(args.calls // divider, 1)
+        await run(session_pool, func, calls)  # прогрев
+        best = {'off': float('inf'), 'on': float('inf')}
+        for _ in range(args.rounds):
+            for mode, level in (('off', logging.NOTSET), ('on', logging.DEBUG)):
+                debug_logger.setLevel(level)
+                best[mode] = min(best[mode], await run(session_pool, func, calls))
+        debug_logger.setLevel(logging.NOTSET)
+        results[name] = best
+
+    print(f"{'операция':<28} {'отладка выкл, мс':>17} {'отладка вкл, мс':>16} {'разница':>9}")
+    for name, best in results.items():
+        print(
+            f"{name:<28} {best['off']:17.3f} {best['on']:16.3f} "
+            f"{(best['on'] - best['off']) / best['on']:9.1%}"
+        )
+    await engine.dispose()
+    print(f"\nЛог за прогон: {os.path.getsize(os.environ['LOG_FILE']) / 1024:.0f} КБ")
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    shutil.rmtree(TMP_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
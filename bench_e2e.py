@@ -0,0 +1,357 @@
+"""Сквозной нагрузочный тест: бот целиком (диспетчер, middleware, обработчики, БД,
+outbox) против локальной заглушки Bot API из loadtest/fake_bot_api.py.
+
+Сотни представителей СМИ одновременно открывают список заданий, берут задание
+из рассылки, отправляют текст, после одобрения прикрепляют фото и ждут финального
+одобрения.
+Модераторы (создатели заданий) открывают присланные публикации и одобряют их.
+В конце выводятся задержки каждого шага (от действия пользователя до ответа бота),
+время обработки апдейтов в диспетчере (p50/p99), пропускная способность, число
+вызовов Bot API и ошибок в логах.
+
+По умолчанию используется временная SQLite-база; LOADTEST_DATABASE_URL задает
+другую тестовую базу (таблицы в ней будут пересозданы).
+
+Запуск: python bench_e2e.py --users 200 --tasks 5 --moderators 3 --latency-ms 50 --rate-limit 0.01
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Set
+
+API_PORT = int(os.getenv("LOADTEST_API_PORT", "8081"))
+DB_PATH = os.path.join(tempfile.gettempdir(), f"media_bot_e2e_{os.getpid()}.db")
+
+# Конфигурация читается при импорте src, поэтому задаем ее заранее и поверх .env:
+# бот не должен обратиться ни к настоящему Telegram, ни к рабочей базе
+os.environ["BOT_TOKEN"] = "123456:loadtest"
+os.environ["TELEGRAM_API_URL"] = f"http://127.0.0.1:{API_PORT}"
+os.environ["DATABASE_URL"] = os.getenv("LOADTEST_DATABASE_URL", f"sqlite+aiosqlite:///{DB_PATH}")
+os.environ["BOT_MODE"] = "polling"
+
+from aiogram import BaseMiddleware
+from aiogram.types import Update
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from loadtest.fake_bot_api import FakeBotAPI, FakeUser, find_button
+from src.app import create_bot, create_dispatcher
+from src.database.base import Base
+from src.database.engine import engine
+from src.database.models import User, Task
+from src.keyboards.moderation_kb import parse_moderation_data
+from src.services.broadcast_service import Broadcaster
+from src.services.outbox_dispatcher import OutboxDispatcher
+
+MEDIA_ID_BASE = 100_000
+MODERATOR_ID_BASE = 900_000
+
+
+def percentile(samples: List[float], p: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * p / 100), len(ordered) - 1)]
+
+
+class Stats:
+    def __init__(self):
+        self.steps: Dict[str, List[float]] = defaultdict(list)
+        self.handler: List[float] = []
+        self.failed: Counter = Counter()
+        self.completed = 0
+
+    async def timed(self, step: str, awaitable: Awaitable) -> Any:
+        started = time.perf_counter()
+        result = await awaitable
+        self.steps[step].append(time.perf_counter() - started)
+        return result
+
+
+class HandlerTimer(BaseMiddleware):
+    """Время обработки апдейта диспетчером, включая все middleware"""
+
+    def __init__(self, samples: List[float]):
+        self.samples = samples
+
+    async def __call__(
+        self,
+        handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any]
+    ) -> Any:
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            self.samples.append(time.perf_counter() - started)
+
+
+class ErrorCounter(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.messages: Counter = Counter()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.messages[record.getMessage().splitlines()[0][:150]] += 1
+
+
+async def prepare(session_pool, users: int, moderators: int, tasks: int) -> None:
+    now = datetime.now()
+    async with session_pool() as session:
+        await session.execute(insert(User), [
+            {
+                'id': i,
+                'telegram_id': MODERATOR_ID_BASE + i,
+                'username': f'moderator{i}',
+                'is_admin': True,
+                'is_superadmin': False
+            }
+            for i in range(1, moderators + 1)
+        ] + [
+            {
+                'id': moderators + i,
+                'telegram_id': MEDIA_ID_BASE + i,
+                'username': f'media{i}',
+                'is_admin': False,
+                'is_superadmin': False,
+                'media_outlet': f'СМИ {i}'
+            }
+            for i in range(1, users + 1)
+        ])
+        await session.execute(insert(Task), [
+            {
+                'id': i,
+                'press_release_link': f'https://example.com/release/{i}',
+                'deadline': now + timedelta(days=1),
+                'status': 'new',
+                'created_at': now,
+                'created_by': (i - 1) % moderators + 1
+            }
+            for i in range(1, tasks + 1)
+        ])
+        await session.commit()
+
+
+async def media_scenario(user: FakeUser, task_id: int, stats: Stats, timeout: float, moderation_timeout: float) -> None:
+    step = "tasks"
+    try:
+        user.send_text("Активные задания")
+        await stats.timed(step, user.expect(
+            lambda m: (m.get("text") or m.get("caption") or "").startswith(("Задание #", "У вас нет активных заданий")),
+            timeout
+        ))
+
+        # Задание берут из рассылки о новом задании: взятое одним СМИ пропадает из списка у остальных
+        step = "take"
+        message = user.api.bot_message(
+            user.telegram_id,
+            f"Новое задание #{task_id}",
+            {"inline_keyboard": [[{"text": "Взять в работу", "callback_data": f"take_task_{task_id}"}]]}
+        )
+        user.click(message, f"take_task_{task_id}")
+        message, data = await stats.timed(step, user.expect_button(f"submit_task_{task_id}", timeout))
+
+        step = "submit"
+        user.click(message, data)
+        await stats.timed(step, user.expect_text("отправьте текст", timeout))
+
+        step = "text"
+        user.send_text(f"Текст публикации {user.profile['username']} по заданию {task_id}")
+        await stats.timed(step, user.expect_text("успешно отправлен", timeout))
+
+        # Ожидание модерации: сюда входит работа модератора и доставка уведомления из outbox
+        step = "text_moderation"
+        message, data = await stats.timed(step, user.expect_button("attach_photo_", moderation_timeout))
+
+        step = "attach"
+        user.click(message, data)
+        message, data = await stats.timed(step, user.expect_button("send_photo", timeout))
+
+        step = "send_photo"
+        user.click(message, data)
+        await stats.timed(step, user.expect_text("отправьте фото", timeout))
+
+        step = "photo"
+        user.send_photo(f"photo-{user.telegram_id}")
+        await stats.timed(step, user.expect_text("Фото успешно добавлено", timeout))
+
+        step = "photo_moderation"
+        await stats.timed(step, user.expect_button("send_link_", moderation_timeout))
+        stats.completed += 1
+    except asyncio.TimeoutError:
+        stats.failed[step] += 1
+
+
+class Moderator:
+    """Открывает каждую присланную публикацию и одобряет ее (текст, затем фото)"""
+
+    def __init__(self, user: FakeUser, stats: Stats, timeout: float):
+        self.user = user
+        self.stats = stats
+        self.timeout = timeout
+        # Карточки публикаций, которые ждут обработчики "Просмотреть": ID публикации -> future
+        self._cards: Dict[int, asyncio.Future] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def run(self) -> None:
+        try:
+            while True:
+                message = await self.user.inbox.get()
+                # Правки сообщений (статус после одобрения) модератору ничего не сообщают
+                if message.get("edit_date"):
+                    continue
+                review = find_button(message, "review_submission_")
+                approve = find_button(message, "approve_submission_")
+                if review:
+                    self._spawn(self._review(message, review))
+                elif approve and message.get("photo"):
+                    self._spawn(self._approve(message, approve, "approve_photo"))
+                elif approve and parse_moderation_data(approve)[0] in self._cards:
+                    self._cards.pop(parse_moderation_data(approve)[0]).set_result(message)
+        finally:
+            for task in self._tasks:
+                task.cancel()
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _review(self, message: dict, data: str) -> None:
+        submission_id = int(data.rsplit('_', 1)[1])
+        card = self._cards[submission_id] = asyncio.get_running_loop().create_future()
+        self.user.click(message, data)
+        try:
+            card_message = await self.stats.timed("review", asyncio.wait_for(card, self.timeout))
+        except asyncio.TimeoutError:
+            self._cards.pop(submission_id, None)
+            self.stats.failed["review"] += 1
+            return
+        await self._approve(card_message, find_button(card_message, "approve_submission_"), "approve_text")
+
+    async def _approve(self, message: dict, data: str, step: str) -> None:
+        try:
+            answer = await self.stats.timed(step, asyncio.wait_for(self.user.click(message, data), self.timeout))
+        except asyncio.TimeoutError:
+            self.stats.failed[step] += 1
+            return
+        if answer and "ошибка" in answer.lower():
+            self.stats.failed[f"{step} ({answer})"] += 1
+
+
+def report(stats: Stats, api: FakeBotAPI, errors: ErrorCounter, users: int, elapsed: float) -> None:
+    print(f"\nСценариев завершено: {stats.completed}/{users} за {elapsed:.1f} с")
+    if stats.failed:
+        print("Не завершено (шаг: число): " + ", ".join(f"{step}: {count}" for step, count in stats.failed.items()))
+
+    print(f"\n{'шаг':<18}{'n':>7}{'p50, мс':>10}{'p99, мс':>10}{'max, мс':>10}")
+    for step, samples in stats.steps.items():
+        print(
+            f"{step:<18}{len(samples):>7}{percentile(samples, 50) * 1000:>10.1f}"
+            f"{percentile(samples, 99) * 1000:>10.1f}{max(samples) * 1000:>10.1f}"
+        )
+
+    handled = len(stats.handler)
+    print(
+        f"\nАпдейтов обработано: {handled}, {handled / elapsed:.1f}/с; время обработки "
+        f"p50 {percentile(stats.handler, 50) * 1000:.1f} мс, p99 {percentile(stats.handler, 99) * 1000:.1f} мс"
+    )
+    print(f"Вызовы Bot API: {dict(api.calls.most_common())}")
+    if api.rate_limited:
+        print(f"Ответов 429: {dict(api.rate_limited)}")
+    total_errors = sum(errors.messages.values())
+    print(f"Ошибок в логах: {total_errors}")
+    for message, count in errors.messages.most_common(5):
+        print(f"  {count:>5}  {message}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--tasks', type=int, default=5)
+    parser.add_argument('--moderators', type=int, default=3)
+    parser.add_argument('--ramp', type=float, default=5, help="за сколько секунд подключаются все пользователи")
+    parser.add_argument('--latency-ms', type=float, default=30)
+    parser.add_argument('--jitter-ms', type=float, default=10)
+    parser.add_argument('--rate-limit', type=float, default=0, help="доля ответов 429 (0..1)")
+    parser.add_argument('--retry-after', type=int, default=1)
+    parser.add_argument('--timeout', type=float, default=30, help="ожидание ответа бота на шаге, сек")
+    parser.add_argument('--moderation-timeout', type=float, default=120)
+    parser.add_argument('--log-level', default='WARNING')
+    args = parser.parse_args()
+
+    # Бенчмарк не вызывает setup_logging: в консоль только записи заданного уровня
+    logging.basicConfig(
+        level=args.log_level.upper(),
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+    errors = ErrorCounter()
+    logging.getLogger().addHandler(errors)
+
+    api = FakeBotAPI(
+        token=os.environ["BOT_TOKEN"],
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        rate_limit=args.rate_limit,
+        retry_after=args.retry_after
+    )
+    await api.start(port=API_PORT)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    session_pool = async_sessionmaker(engine, expire_on_commit=False)
+    await prepare(session_pool, args.users, args.moderators, args.tasks)
+
+    bot = create_bot()
+    broadcaster = Broadcaster()
+    dp = create_dispatcher(bot, session_pool, broadcaster)
+    stats = Stats()
+    dp.update.outer_middleware(HandlerTimer(stats.handler))
+    outbox_dispatcher = OutboxDispatcher(bot, broadcaster, session_pool)
+    outbox_dispatcher.start()
+    polling = asyncio.create_task(dp.start_polling(bot, handle_signals=False, close_bot_session=False))
+
+    moderators = [
+        Moderator(FakeUser(api, MODERATOR_ID_BASE + i, f'moderator{i}'), stats, args.timeout)
+        for i in range(1, args.moderators + 1)
+    ]
+    moderator_tasks = [asyncio.create_task(moderator.run()) for moderator in moderators]
+
+    async def start_user(i: int) -> None:
+        await asyncio.sleep(args.ramp * i / args.users)
+        user = FakeUser(api, MEDIA_ID_BASE + i, f'media{i}')
+        await media_scenario(user, random.randint(1, args.tasks), stats, args.timeout, args.moderation_timeout)
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(start_user(i) for i in range(1, args.users + 1)))
+        elapsed = time.perf_counter() - started
+    finally:
+        for task in moderator_tasks:
+            task.cancel()
+        await asyncio.gather(*moderator_tasks, return_exceptions=True)
+        await dp.stop_polling()
+        await asyncio.gather(polling, return_exceptions=True)
+        await outbox_dispatcher.stop()
+        await broadcaster.close()
+        await dp.storage.close()
+        await bot.session.close()
+        await engine.dispose()
+        await api.stop()
+        if not os.getenv("LOADTEST_DATABASE_URL"):
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(DB_PATH + suffix):
+                    os.remove(DB_PATH + suffix)
+
+    report(stats, api, errors, args.users, elapsed)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
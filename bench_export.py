@@ -0,0 +1,175 @@
+"""Бенчмарк сбора данных для общего отчета (export_all_tasks_report).
+
+Создает временную SQLite-базу с заданиями, назначениями и публикациями и сравнивает
+старый вариант (по два запроса на каждое задание) с новым (три запроса на весь отчет).
+С флагом --export дополнительно сравнивает запись xlsx через pandas и потоковую
+запись по пиковому потреблению памяти.
+
+Запуск: python bench_export.py --tasks 10000 --submissions 100000 [--export]
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from sqlalchemy import event, insert, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import joinedload
+from src.database.base import Base
+from src.database.models import Task, Submission, SubmissionStatus, User, TaskAssignment
+from src.services.export_service import ExportService
+
+CHUNK_SIZE = 5000
+MEDIA_OUTLETS = 50
+
+
+async def populate(session_pool, tasks_count: int, submissions_count: int) -> None:
+    now = datetime.now()
+    users = [
+        {'id': i, 'telegram_id': 1000 + i, 'username': f'user{i}', 'media_outlet': f'СМИ {i}'}
+        for i in range(1, MEDIA_OUTLETS + 1)
+    ]
+    tasks = [
+        {
+            'id': i,
+            'press_release_link': f'https://example.com/release/{i}',
+            'deadline': now + timedelta(days=1),
+            'status': 'in_progress',
+            'created_at': now - timedelta(minutes=i),
+            'created_by': 1
+        }
+        for i in range(1, tasks_count + 1)
+    ]
+    assignments = [
+        {
+            'task_id': task_id,
+            'media_outlet': f'СМИ {outlet}',
+            'assigned_at': now,
+            'status': 'in_progress'
+        }
+        for task_id in range(1, tasks_count + 1)
+        for outlet in random.sample(range(1, MEDIA_OUTLETS + 1), 5)
+    ]
+    submissions = [
+        {
+            'task_id': random.randint(1, tasks_count),
+            'user_id': random.randint(1, MEDIA_OUTLETS),
+            'content': 'Текст публикации ' * 10,
+            'submitted_at': now,
+            'status': SubmissionStatus.PENDING
+        }
+        for _ in range(submissions_count)
+    ]
+
+    async with session_pool() as session:
+        for model, rows in ((User, users), (Task, tasks), (TaskAssignment, assignments), (Submission, submissions)):
+            for i in range(0, len(rows), CHUNK_SIZE):
+                await session.execute(insert(model), rows[i:i + CHUNK_SIZE])
+        await session.commit()
+
+
+async def legacy_collect(session) -> int:
+    """Повторяет схему запросов прежней реализации: два запроса на задание"""
+    tasks = (await session.execute(select(Task).order_by(Task.created_at.desc()))).scalars().all()
+    rows = 0
+    for task in tasks:
+        assignments = await session.execute(
+            select(TaskAssignment, User)
+            .select_from(TaskAssignment)
+            .join(
+                Submission,
+                (Submission.task_id == TaskAssignment.task_id) &
+                (Submission.user_id == User.id)
+            )
+            .join(User, User.media_outlet == TaskAssignment.media_outlet)
+            .where(TaskAssignment.task_id == task.id)
+            .group_by(TaskAssignment.id, User.id)
+        )
+        rows += len(assignments.all())
+        submissions = await session.execute(
+            select(Submission)
+            .options(joinedload(Submission.user))
+            .where(Submission.task_id == task.id)
+        )
+        rows += len(submissions.scalars().all())
+    return rows
+
+
+async def measure(name: str, engine, session_pool, collect, trace_memory: bool = False) -> None:
+    counter = {'queries': 0}
+
+    def count_query(*args):
+        counter['queries'] += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count_query)
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        async with session_pool() as session:
+            started = time.perf_counter()
+            rows = await collect(session)
+            elapsed = time.perf_counter() - started
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", count_query)
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else 0
+        if trace_memory:
+            tracemalloc.stop()
+
+    line = f"{name:<10} queries: {counter['queries']:>7}  rows: {rows:>8}  time: {elapsed:8.2f}s"
+    if trace_memory:
+        line += f"  peak memory: {peak / 1024 / 1024:8.1f} MB"
+    print(line)
+
+
+async def new_collect(session) -> int:
+    tasks, assignments, submissions = await ExportService(session).collect_all_tasks_data()
+    return len(assignments) + len(submissions)
+
+
+def export_collect(streaming: bool):
+    async def collect(session) -> int:
+        filename = await ExportService(session).export_all_tasks_report(streaming=streaming)
+        size = os.path.getsize(filename)
+        os.remove(filename)
+        return size
+    return collect
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tasks', type=int, default=10000)
+    parser.add_argument('--submissions', type=int, default=100000)
+    parser.add_argument('--skip-legacy', action='store_true', help='не запускать старый вариант')
+    parser.add_argument('--export', action='store_true', help='замерить также запись xlsx')
+    args = parser.parse_args()
+
+    random.seed(42)
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    session_pool = async_sessionmaker(engine, expire_on_commit=False)
+
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        print(f"Заполняем базу: {args.tasks} заданий, {args.submissions} публикаций...")
+        await populate(session_pool, args.tasks, args.submissions)
+
+        if not args.skip_legacy:
+            await measure('legacy', engine, session_pool, legacy_collect)
+        await measure('set-based', engine, session_pool, new_collect)
+
+        if args.export:
+            # Для записи файла вместо числа строк выводится размер xlsx в байтах
+            await measure('pandas', engine, session_pool, export_collect(streaming=False), trace_memory=True)
+            await measure('streaming', engine, session_pool, export_collect(streaming=True), trace_memory=True)
+    finally:
+        await engine.dispose()
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,124 @@
+"""Бенчмарк замены эмодзи в логах: прежний EmojiFilter против replace_emoji/EmojiSafeFormatter.
+
+Прежний фильтр делал по str.replace на каждый эмодзи из EMOJI_TO_TEXT и висел на
+обоих обработчиках (консоль и файл), то есть работал дважды на запись. Теперь
+замена - один проход регулярного выражения, и только в форматтере консоли,
+которая не поддерживает эмодзи. Кэша нет: в сообщениях почти всегда есть ID,
+имена или текст пользователя, и кэш по готовому тексту почти не попадает.
+
+Корпус - сообщения из bot.log (текстовый формат или JSON-строки). Без --corpus
+сообщения собираются из вызовов logging.* в src/ с подставленными значениями.
+
+Запуск: python bench_logging.py --corpus bot.log --records 200000
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import re
+import time
+from pathlib import Path
+
+os.environ.setdefault("BOT_TOKEN", "0:bench")
+
+from src.utils.logging_config import EMOJI_TO_TEXT, EmojiSafeFormatter, replace_emoji
+
+FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+LOG_CALL_RE = re.compile(r'logg(?:ing|er)\.(?:debug|info|warning|error|exception)\(\s*f?"((?:[^"\\]|\\.)*)"')
+PLACEHOLDER_RE = re.compile(r'\{[^{}]*\}')
+SAMPLE_VALUES = ['42', '1234567890', 'ivan_petrov', 'РИА Новости', 'in_progress', 'https://example.com/news/1', 'None']
+
+
+class LegacyEmojiFilter(logging.Filter):
+    """Прежняя реализация: по проходу на каждый эмодзи, record.msg меняется на месте"""
+
+    def filter(self, record):
+        if isinstance(record.msg, str):
+            for emoji, text in EMOJI_TO_TEXT.items():
+                record.msg = record.msg.replace(emoji, text)
+        return True
+
+
+def load_corpus(path: str) -> list:
+    messages = []
+    for line in Path(path).read_text(encoding='utf-8', errors='replace').splitlines():
+        if line.startswith('{'):
+            try:
+                messages.append(json.loads(line)['message'])
+                continue
+            except (ValueError, KeyError):
+                pass
+        parts = line.split(' - ', 3)
+        if len(parts) == 4:
+            messages.append(parts[3])
+    return messages
+
+
+def synthesize_corpus(rng: random.Random) -> list:
+    templates = []
+    for path in Path('src').rglob('*.py'):
+        templates.extend(LOG_CALL_RE.findall(path.read_text(encoding='utf-8')))
+    return [
+        PLACEHOLDER_RE.sub(lambda _: rng.choice(SAMPLE_VALUES), template)
+        for template in templates
+        for _ in range(5)
+    ]
+
+
+def make_records(messages: list) -> list:
+    return [logging.LogRecord('root', logging.INFO, __file__, 0, message, None, None) for message in messages]
+
+
+def measure(name: str, records: list, func) -> float:
+    started = time.perf_counter()
+    for record in records:
+        func(record)
+    per_record = (time.perf_counter() - started) / len(records) * 1e6
+    print(f"{name:<44} {per_record:8.2f} мкс/запись")
+    return per_record
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--corpus', help="bot.log в текстовом формате или JSON-строки")
+    parser.add_argument('--records', type=int, default=200000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    messages = load_corpus(args.corpus) if args.corpus else synthesize_corpus(rng)
+    if not messages:
+        raise SystemExit("Корпус пуст")
+    sample = [rng.choice(messages) for _ in range(args.records)]
+    with_emoji = sum(1 for message in sample if replace_emoji(message) != message)
+    print(
+        f"Корпус: {len(messages)} сообщений, {len(set(messages))} различных; в выборке {len(sample)} записей, "
+        f"{with_emoji / len(sample):.1%} с эмодзи\n"
+    )
+
+    legacy = LegacyEmojiFilter()
+    plain = logging.Formatter(FORMAT)
+    safe = EmojiSafeFormatter(FORMAT)
+
+    print("Только замена эмодзи:")
+    old = measure("прежний фильтр x2 (консоль и файл)", make_records(sample), lambda r: (legacy.filter(r), legacy.filter(r)))
+    new = measure("replace_emoji", sample, replace_emoji)
+    print(f"Ускорение: {old / new:.1f}x\n")
+
+    print("Форматирование строки консоли:")
+    base = measure("Formatter", make_records(sample), plain.format)
+    legacy_format = measure(
+        "прежний фильтр x2 + Formatter", make_records(sample),
+        lambda r: (legacy.filter(r), legacy.filter(r), plain.format(r))
+    )
+    safe_format = measure("EmojiSafeFormatter", make_records(sample), safe.format)
+    print(
+        f"Накладные расходы на запись: прежний фильтр {legacy_format - base:.2f} мкс, "
+        f"EmojiSafeFormatter {safe_format - base:.2f} мкс "
+        f"(консоль с поддержкой эмодзи - 0, форматтер не подключается)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Бенчмарк конкурентной записи в SQLite: настройки по умолчанию против профиля SQLiteProfile.
+
+Несколько воркеров одновременно создают публикации (SubmissionService.create_submission)
+и сразу одобряют их (approve_submission, вместе с записью уведомления в outbox), каждый
+в своей сессии - так же, как параллельные апдейты бота. Для каждого варианта
+используется отдельная временная база.
+
+Запуск: python bench_sqlite.py --operations 2000 --concurrency 20
+"""
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("BOT_TOKEN", "0:bench")
+
+from sqlalchemy import insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from src.database.base import Base
+from src.database.engine import build_engine
+from src.database.models import User, Task
+from src.services.submission_service import SubmissionService
+
+USERS = 100
+
+
+async def prepare(session_pool, tasks_count: int) -> None:
+    now = datetime.now()
+    async with session_pool() as session:
+        await session.execute(insert(User), [
+            {'id': i, 'telegram_id': 1000 + i, 'username': f'user{i}', 'media_outlet': f'СМИ {i}'}
+            for i in range(1, USERS + 1)
+        ])
+        await session.execute(insert(Task), [
+            {
+                'id': i,
+                'press_release_link': f'https://example.com/release/{i}',
+                'deadline': now + timedelta(days=1),
+                'status': 'in_progress',
+                'created_at': now,
+                'created_by': 1
+            }
+            for i in range(1, tasks_count + 1)
+        ])
+        await session.commit()
+
+
+async def run_workload(engine, operations: int, concurrency: int) -> dict:
+    session_pool = async_sessionmaker(engine, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    tasks_count = operations // USERS + 1
+    await prepare(session_pool, tasks_count)
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(operations):
+        queue.put_nowait((i // USERS + 1, i % USERS + 1))
+    stats = {'ok': 0, 'locked': 0, 'failed': 0}
+
+    async def worker():
+        while True:
+            try:
+                task_id, user_id = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                async with session_pool() as session:
+                    service = SubmissionService(session)
+                    submission = await service.create_submission(task_id, user_id, 'Текст публикации')
+                    if submission is None:
+                        stats['failed'] += 1
+                        continue
+                    await service.approve_submission(submission.id)
+                    stats['ok'] += 1
+            except OperationalError as e:
+                if 'locked' in str(e):
+                    stats['locked'] += 1
+                else:
+                    stats['failed'] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    stats['elapsed'] = time.perf_counter() - started
+    return stats
+
+
+async def measure(name: str, make_engine, operations: int, concurrency: int) -> None:
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    engine = make_engine(f"sqlite+aiosqlite:///{path}")
+    try:
+        stats = await run_workload(engine, operations, concurrency)
+    finally:
+        await engine.dispose()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+    throughput = stats['ok'] / stats['elapsed'] if stats['elapsed'] else 0
+    print(
+        f"{name:<10} ok: {stats['ok']:>6}  locked: {stats['locked']:>5}  failed: {stats['failed']:>5}  "
+        f"time: {stats['elapsed']:7.2f}s  throughput: {throughput:8.1f} ops/s"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--operations', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=20)
+    args = parser.parse_args()
+
+    # Сервисы подробно логируют каждую операцию, в бенчмарке это только мешает
+    logging.basicConfig(level=logging.WARNING)
+
+    await measure('default', lambda url: create_async_engine(url), args.operations, args.concurrency)
+    await measure('profile', lambda url: build_engine(url, echo=False), args.operations, args.concurrency)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
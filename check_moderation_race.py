@@ -0,0 +1,195 @@
+"""Проверка одновременных действий модераторов над одной публикацией.
+
+Для каждой публикации несколько "модераторов" в отдельных сессиях читают ее,
+дожидаются друг друга и одновременно нажимают "Одобрить" или "На доработку".
+Ровно одно действие должно пройти, остальные - получить AlreadyHandled.
+Затем еще один модератор нажимает кнопку с версией из уведомления уже после
+гонки: действие должно быть отклонено по версии, даже если статус это разрешает.
+После прогона проверяется, что статус соответствует победившему действию,
+версия увеличилась ровно на 1 и в журнале ровно одно событие модерации.
+
+Запуск: python check_moderation_race.py --submissions 200 --moderators 5 --parallel 10
+(по умолчанию временная SQLite-база; --url для проверки на PostgreSQL - таблицы будут пересозданы)
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+os.environ.setdefault("BOT_TOKEN", "0:check")
+
+from sqlalchemy import insert, select, func
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from src.database.base import Base
+from src.database.engine import build_engine
+from src.database.models import User, Task, Submission, SubmissionEvent
+from src.database.models.submission import SubmissionStatus
+from src.services.submission_service import SubmissionService
+from src.services.submission_transitions import AlreadyHandled, SubmissionAction
+
+USERS = 50
+
+
+async def prepare(session_pool, submissions: int) -> None:
+    now = datetime.now()
+    async with session_pool() as session:
+        await session.execute(insert(User), [
+            {'id': i, 'telegram_id': 1000 + i, 'username': f'user{i}', 'media_outlet': f'СМИ {i}'}
+            for i in range(1, USERS + 1)
+        ])
+        # Одна публикация от пользователя на задание, поэтому на каждую публикацию свое задание
+        await session.execute(insert(Task), [
+            {
+                'id': i,
+                'press_release_link': f'https://example.com/release/{i}',
+                'deadline': now + timedelta(days=1),
+                'status': 'in_progress',
+                'created_at': now,
+                'created_by': 1
+            }
+            for i in range(1, submissions + 1)
+        ])
+        await session.commit()
+
+    # Через сервис, чтобы в журнале было событие создания
+    async with session_pool() as session:
+        service = SubmissionService(session)
+        for i in range(submissions):
+            await service.create_submission(i + 1, i % USERS + 1, f'Текст публикации {i}')
+
+
+async def race(session_pool, submission_id: int, moderators: int, stats: dict) -> dict:
+    """Возвращает {номер модератора: действие} для прошедших действий"""
+    barrier = asyncio.Barrier(moderators)
+    winners = {}
+
+    async def click(moderator: int) -> None:
+        action = random.choice((SubmissionAction.APPROVE, SubmissionAction.REQUEST_REVISION))
+        async with session_pool() as session:
+            service = SubmissionService(session)
+            # Модератор видит публикацию до того, как ее изменил кто-то другой
+            await session.get(Submission, submission_id)
+            await barrier.wait()
+            try:
+                # Кнопки модераторам отправлены с версией 1, которую они и видели
+                if action == SubmissionAction.APPROVE:
+                    await service.approve_submission(submission_id, actor_id=moderator, expected_version=1)
+                else:
+                    await service.request_revision(
+                        submission_id, 'Исправьте текст', actor_id=moderator, expected_version=1
+                    )
+                winners[moderator] = action
+            except AlreadyHandled:
+                stats['rejected'] += 1
+            except Exception as e:
+                stats['errors'] += 1
+                logging.error(f"Submission {submission_id}: unexpected error: {e}")
+
+    await asyncio.gather(*(click(moderator) for moderator in range(1, moderators + 1)))
+
+    # Опоздавший модератор: публикацию он читает уже после гонки, но кнопка у него со старой версией
+    async with session_pool() as session:
+        try:
+            await SubmissionService(session).request_revision(
+                submission_id, 'Исправьте текст', actor_id=moderators + 1, expected_version=1
+            )
+            winners[moderators + 1] = SubmissionAction.REQUEST_REVISION
+        except AlreadyHandled:
+            stats['stale'] += 1
+    return winners
+
+
+async def verify(session_pool, results: dict) -> list:
+    expected_status = {
+        SubmissionAction.APPROVE: SubmissionStatus.TEXT_APPROVED,
+        SubmissionAction.REQUEST_REVISION: SubmissionStatus.REVISION,
+    }
+    problems = []
+    async with session_pool() as session:
+        rows = {row.id: row for row in await session.execute(select(Submission.id, Submission.status, Submission.version))}
+        events = dict((await session.execute(
+            select(SubmissionEvent.submission_id, func.count()).group_by(SubmissionEvent.submission_id)
+        )).all())
+
+    for submission_id, winners in results.items():
+        if len(winners) != 1:
+            problems.append(f"#{submission_id}: {len(winners)} actions succeeded")
+            continue
+        action = next(iter(winners.values()))
+        row = rows[submission_id]
+        if SubmissionStatus(row.status) != expected_status[action]:
+            problems.append(f"#{submission_id}: status {row.status} after {action.value}")
+        if row.version != 2:
+            problems.append(f"#{submission_id}: version {row.version}, expected 2")
+        if events.get(submission_id, 0) != 2:
+            problems.append(f"#{submission_id}: {events.get(submission_id, 0)} events, expected 2")
+    return problems
+
+
+async def run(url: str, submissions: int, moderators: int, parallel: int) -> bool:
+    engine = build_engine(url, echo=False)
+    session_pool = async_sessionmaker(engine, expire_on_commit=False)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+        await prepare(session_pool, submissions)
+
+        async with session_pool() as session:
+            ids = (await session.execute(select(Submission.id).order_by(Submission.id))).scalars().all()
+        stats = {'rejected': 0, 'stale': 0, 'errors': 0}
+        # Сколько публикаций модерируется одновременно
+        slots = asyncio.Semaphore(parallel)
+
+        async def limited(submission_id: int) -> dict:
+            async with slots:
+                return await race(session_pool, submission_id, moderators, stats)
+
+        winners = await asyncio.gather(*(limited(submission_id) for submission_id in ids))
+        problems = await verify(session_pool, dict(zip(ids, winners)))
+    finally:
+        await engine.dispose()
+
+    print(
+        f"submissions: {len(ids)}  clicks: {len(ids) * moderators}  "
+        f"rejected as already handled: {stats['rejected']}  stale buttons rejected: {stats['stale']}  "
+        f"errors: {stats['errors']}  lost updates: {len(problems)}"
+    )
+    for problem in problems[:20]:
+        print(f"  {problem}")
+    return not problems and not stats['errors']
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--submissions', type=int, default=200)
+    parser.add_argument('--moderators', type=int, default=5)
+    parser.add_argument('--parallel', type=int, default=10)
+    parser.add_argument('--url', help="URL тестовой базы; по умолчанию временная SQLite-база")
+    args = parser.parse_args()
+
+    # Отказы в гонке ожидаемы, их предупреждения в выводе не нужны
+    logging.basicConfig(level=logging.ERROR)
+
+    path = None
+    url = args.url
+    if url is None:
+        fd, path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        url = f"sqlite+aiosqlite:///{path}"
+    try:
+        ok = await run(url, args.submissions, args.moderators, args.parallel)
+    finally:
+        if path:
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,130 @@
+"""Проверка планов горячих запросов сервисов (EXPLAIN QUERY PLAN).
+
+Создает временную SQLite-базу по текущим моделям, вызывает методы
+SubmissionService/TaskService/UserService, перехватывает выполненные ими SQL-запросы
+и завершается с кодом 1, если хотя бы один из них читает таблицу полным сканированием.
+
+Запуск: python check_query_plans.py
+"""
+import asyncio
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+os.environ.setdefault("BOT_TOKEN", "0:check")
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from src.database.base import Base
+from src.database.models import User, Task, TaskAssignment, Submission, SubmissionStatus
+from src.services.submission_service import SubmissionService
+from src.services.task_service import TaskService
+from src.services.user_service import UserService
+
+MEDIA_OUTLET = 'СМИ'
+
+
+def hot_queries(session):
+    """Горячие запросы: название и корутина, которая их выполняет"""
+    submission_service = SubmissionService(session)
+    task_service = TaskService(session)
+    user_service = UserService(session)
+    cursor = (datetime.now(), 10)
+    return [
+        ('SubmissionService.get_pending_submissions (суперадмин)',
+         lambda: submission_service.get_pending_submissions(admin_id=1, is_superadmin=True, limit=2)),
+        ('SubmissionService.get_pending_submissions (админ, следующая страница)',
+         lambda: submission_service.get_pending_submissions(admin_id=1, limit=2, after=cursor)),
+        ('SubmissionService.get_pending_submissions (админ, предыдущая страница)',
+         lambda: submission_service.get_pending_submissions(admin_id=1, limit=2, after=cursor, backward=True)),
+        ('SubmissionService.get_user_submission_for_task',
+         lambda: submission_service.get_user_submission_for_task(user_id=1, task_id=1)),
+        ('TaskService.get_task_assignment',
+         lambda: task_service.get_task_assignment(1, MEDIA_OUTLET)),
+        ('TaskService.check_media_outlet_submission',
+         lambda: task_service.check_media_outlet_submission(1, MEDIA_OUTLET)),
+        ('TaskService.get_active_tasks (без СМИ)',
+         lambda: task_service.get_active_tasks()),
+        ('TaskService.get_active_tasks (СМИ)',
+         lambda: task_service.get_active_tasks(MEDIA_OUTLET)),
+        ('TaskService.get_active_tasks_with_assignments',
+         lambda: task_service.get_active_tasks_with_assignments(MEDIA_OUTLET)),
+        ('TaskService.get_user_submission_for_task',
+         lambda: task_service.get_user_submission_for_task(user_id=1, task_id=1)),
+        ('UserService.get_user_by_telegram_id',
+         lambda: user_service.get_user_by_telegram_id(1001)),
+    ]
+
+
+def is_full_scan(detail: str) -> bool:
+    # "SCAN tasks" - полный проход по таблице; проход по индексу и подзапросам допустим
+    if not detail.startswith('SCAN '):
+        return False
+    return 'USING' not in detail and '(subquery' not in detail and 'CONSTANT ROW' not in detail
+
+
+async def seed(session_pool) -> None:
+    now = datetime.now()
+    async with session_pool() as session:
+        session.add(User(id=1, telegram_id=1001, username='admin', is_admin=True, is_superadmin=True))
+        session.add(User(id=2, telegram_id=1002, username='media', media_outlet=MEDIA_OUTLET))
+        session.add(Task(id=1, press_release_link='https://example.com', deadline=now + timedelta(days=1),
+                         status='new', created_at=now, created_by=1))
+        session.add(TaskAssignment(task_id=1, media_outlet=MEDIA_OUTLET, status='in_progress'))
+        session.add(Submission(task_id=1, user_id=2, content='Текст', submitted_at=now,
+                               status=SubmissionStatus.PENDING))
+        await session.commit()
+
+
+async def main() -> int:
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    session_pool = async_sessionmaker(engine, expire_on_commit=False)
+    failed = []
+
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        await seed(session_pool)
+
+        async with session_pool() as session:
+            for name, run in hot_queries(session):
+                statements = []
+
+                def capture(conn, cursor, statement, parameters, context, executemany):
+                    if statement.lstrip().upper().startswith('SELECT'):
+                        statements.append((statement, parameters))
+
+                event.listen(engine.sync_engine, "before_cursor_execute", capture)
+                try:
+                    await run()
+                finally:
+                    event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+                print(f"\n=== {name} ===")
+                connection = await session.connection()
+                for statement, parameters in statements:
+                    plan = await connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+                    for row in plan:
+                        detail = row[-1]
+                        marker = 'FULL SCAN' if is_full_scan(detail) else 'ok'
+                        print(f"  [{marker}] {detail}")
+                        if marker != 'ok':
+                            failed.append((name, detail))
+    finally:
+        await engine.dispose()
+        os.remove(path)
+
+    if failed:
+        print("\nЗапросы с полным сканированием таблиц:")
+        for name, detail in failed:
+            print(f"  {name}: {detail}")
+        return 1
+    print("\nВсе горячие запросы используют индексы")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
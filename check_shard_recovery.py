@@ -0,0 +1,134 @@
+"""Проверка ShardPool: после падения воркера посреди обработки счетчик ожидающих апдейтов возвращается к 0.
+
+Запускает один воркер против заглушки Bot API из loadtest/fake_bot_api.py с
+задержкой ответа, отправляет пачку /start и убивает воркер, пока ответы еще
+не получены. После перезапуска отправляет еще одну пачку и ждет, пока
+pending станет 0, а health_report() - ok. Без сверки счетчиков апдейты,
+которые упавший воркер взял из очереди, навсегда оставались бы в pending.
+
+Запуск: python check_shard_recovery.py --updates 20 --latency-ms 2000
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+
+API_PORT = int(os.getenv("CHECK_API_PORT", "8082"))
+# Воркер (spawn) заново выполняет этот модуль, путь к базе он получает из окружения основного процесса
+DB_PATH = os.environ.setdefault(
+    "CHECK_SHARD_DB_PATH", os.path.join(tempfile.gettempdir(), f"media_bot_shards_{os.getpid()}.db")
+)
+
+# Воркеры читают конфигурацию из окружения при импорте, поэтому задаем ее до импорта src
+os.environ["BOT_TOKEN"] = "123456:check"
+os.environ["TELEGRAM_API_URL"] = f"http://127.0.0.1:{API_PORT}"
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{DB_PATH}"
+os.environ["LOG_FILE"] = ""
+# Медленные ответы заглушки ожидаемы, в выводе нужны только предупреждения пула
+os.environ["LOG_LEVEL"] = "WARNING"
+os.environ["SLOW_UPDATE_MS"] = "60000"
+
+from aiogram.types import Update
+from sqlalchemy import insert
+from loadtest.fake_bot_api import FakeBotAPI
+from src.database.base import Base
+from src.database.engine import engine
+from src.database.models import User
+from src.sharding import ShardPool
+
+MEDIA_ID_BASE = 100_000
+
+
+def start_update(update_id: int, telegram_id: int) -> Update:
+    profile = {"id": telegram_id, "is_bot": False, "first_name": f"media{telegram_id}"}
+    return Update.model_validate({
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": telegram_id, "type": "private"},
+            "from": profile,
+            "text": "/start",
+            "entities": [{"type": "bot_command", "offset": 0, "length": 6}]
+        }
+    })
+
+
+async def wait_for(condition, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        await asyncio.sleep(0.1)
+    return False
+
+
+async def run(updates: int, latency: float, timeout: float) -> bool:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(User), [
+            {'telegram_id': MEDIA_ID_BASE + i, 'username': f'media{i}', 'media_outlet': f'СМИ {i}'}
+            for i in range(updates)
+        ])
+    await engine.dispose()
+
+    api = FakeBotAPI(token=os.environ["BOT_TOKEN"], latency=latency)
+    await api.start(port=API_PORT)
+    pool = ShardPool(workers=1, concurrency=updates, max_pending=updates * 2, health_interval=0.2)
+    pool.start()
+    shard = pool._shards[0]
+    ok = True
+    try:
+        for i in range(updates):
+            await pool.route(MEDIA_ID_BASE + i, start_update(i + 1, MEDIA_ID_BASE + i))
+        if not await wait_for(lambda: shard.taken.value == updates, timeout):
+            print(f"Воркер не взял апдейты: взято {shard.taken.value} из {updates}")
+            return False
+        in_flight = shard.taken.value - shard.processed.value
+        print(f"Апдейтов в работе перед падением воркера: {in_flight}")
+        shard.process.kill()
+        await asyncio.to_thread(shard.process.join)
+
+        if not await wait_for(lambda: pool.health()[0].alive, timeout):
+            print("Воркер не перезапущен")
+            return False
+        for i in range(updates):
+            await pool.route(MEDIA_ID_BASE + i, start_update(updates + i + 1, MEDIA_ID_BASE + i))
+        recovered = await wait_for(
+            lambda: pool.health()[0].pending == 0 and pool.health_report()['ok'],
+            timeout + latency
+        )
+        health = pool.health()[0]
+        print(f"После перезапуска: pending {health.pending}, ok {pool.health_report()['ok']}")
+        ok = recovered
+    finally:
+        await pool.stop(timeout=timeout)
+        await api.stop()
+        await engine.dispose()
+    return ok
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--updates', type=int, default=20)
+    parser.add_argument('--latency-ms', type=float, default=2000)
+    parser.add_argument('--timeout', type=float, default=60, help="ожидание каждого шага, сек")
+    args = parser.parse_args()
+
+    # Потерю апдейтов при падении воркер-пул логирует предупреждением, остальное не нужно
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    try:
+        ok = await run(args.updates, args.latency_ms / 1000, args.timeout)
+    finally:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(DB_PATH + suffix):
+                os.remove(DB_PATH + suffix)
+    print("Счетчик ожидающих апдейтов восстановлен" if ok else "Счетчик ожидающих апдейтов не вернулся к 0")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
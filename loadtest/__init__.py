@@ -0,0 +1,5 @@
+"""Инструменты нагрузочного тестирования бота без обращения к Telegram.
+
+fake_bot_api - локальная заглушка Bot API и эмуляция клиентов Telegram,
+сценарий нагрузки запускается из bench_e2e.py в корне проекта.
+"""
@@ -0,0 +1,368 @@
+"""Локальная заглушка Telegram Bot API на aiohttp.
+
+Поддерживает методы, которыми пользуется бот: getUpdates, sendMessage, sendPhoto,
+sendDocument, editMessageText, editMessageCaption, editMessageReplyMarkup,
+answerCallbackQuery (остальные методы отвечают True). Задержка ответа и доля
+ответов 429 Too Many Requests настраиваются. Апдейты от "пользователей"
+добавляются через FakeUser и отдаются боту через getUpdates.
+
+Отдельный запуск (для main.py с TELEGRAM_API_URL=http://127.0.0.1:8081):
+    python -m loadtest.fake_bot_api --port 8081 --latency-ms 50 --rate-limit 0.01
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+from collections import Counter, deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+from aiohttp import web
+import logging
+
+# Поля, которые aiogram передает строкой с JSON
+JSON_FIELDS = {"reply_markup", "entities", "caption_entities", "allowed_updates", "media", "link_preview_options"}
+# Методы, для которых имитируется flood control
+RATE_LIMITED_METHODS = {
+    "sendMessage", "sendPhoto", "sendDocument",
+    "editMessageText", "editMessageCaption", "editMessageReplyMarkup"
+}
+
+
+def find_button(message: dict, prefix: str) -> Optional[str]:
+    """callback_data первой inline-кнопки сообщения, начинающейся с prefix"""
+    markup = message.get("reply_markup") or {}
+    for row in markup.get("inline_keyboard", []):
+        for button in row:
+            data = button.get("callback_data")
+            if data and data.startswith(prefix):
+                return data
+    return None
+
+
+class FakeBotAPI:
+    """Заглушка Bot API: хранит отправленные ботом сообщения и очередь апдейтов.
+
+    latency и jitter задают задержку ответа в секундах (равномерно в
+    latency ± jitter), rate_limit - вероятность ответить 429 с retry_after.
+    """
+
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        rate_limit: float = 0.0,
+        retry_after: int = 1
+    ):
+        self.token = token
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.me = {"id": 1, "is_bot": True, "first_name": "Fake Bot", "username": "fake_bot"}
+        self.calls: Counter = Counter()
+        self.rate_limited: Counter = Counter()
+
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+        self._file_ids = itertools.count(1)
+        self._updates: Deque[dict] = deque()
+        self._has_updates = asyncio.Event()
+        # Последнее состояние сообщений, отправленных ботом: (chat_id, message_id) -> message
+        self._messages: Dict[tuple, dict] = {}
+        self._inboxes: Dict[int, asyncio.Queue] = {}
+        self._answers: Dict[str, asyncio.Future] = {}
+        self._runner: Optional[web.AppRunner] = None
+        self.base_url = ""
+
+    # --- Сервер ---
+
+    def create_app(self) -> web.Application:
+        app = web.Application(client_max_size=50 * 1024 * 1024)
+        app.router.add_post("/bot{token}/{method}", self.handle)
+        app.router.add_get("/bot{token}/{method}", self.handle)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8081) -> None:
+        self._runner = web.AppRunner(self.create_app(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        self.base_url = f"http://{host}:{port}"
+        logging.info(f"Fake Bot API listening on {self.base_url}")
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def handle(self, request: web.Request) -> web.Response:
+        if self.token is not None and request.match_info["token"] != self.token:
+            return web.json_response({"ok": False, "error_code": 401, "description": "Unauthorized"}, status=401)
+
+        method = request.match_info["method"]
+        params = await self._read_params(request)
+        self.calls[method] += 1
+
+        if method != "getUpdates":
+            delay = self.latency + random.uniform(-self.jitter, self.jitter)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if method in RATE_LIMITED_METHODS and random.random() < self.rate_limit:
+                self.rate_limited[method] += 1
+                return web.json_response({
+                    "ok": False,
+                    "error_code": 429,
+                    "description": f"Too Many Requests: retry after {self.retry_after}",
+                    "parameters": {"retry_after": self.retry_after}
+                }, status=429)
+
+        handler: Optional[Callable] = getattr(self, f"_api_{method}", None)
+        try:
+            result = await handler(params) if handler else True
+        except KeyError as e:
+            return web.json_response(
+                {"ok": False, "error_code": 400, "description": f"Bad Request: message not found {e}"},
+                status=400
+            )
+        return web.json_response({"ok": True, "result": result})
+
+    @staticmethod
+    async def _read_params(request: web.Request) -> Dict[str, Any]:
+        if request.content_type == "application/json":
+            return await request.json()
+        params: Dict[str, Any] = {}
+        for key, value in (await request.post()).items():
+            if isinstance(value, web.FileField):
+                params[key] = value
+            elif key in JSON_FIELDS:
+                params[key] = json.loads(value)
+            else:
+                params[key] = value
+        return params
+
+    # --- Методы Bot API ---
+
+    async def _api_getMe(self, params: dict) -> dict:
+        return self.me
+
+    async def _api_getUpdates(self, params: dict) -> List[dict]:
+        offset = int(params.get("offset", 0))
+        limit = int(params.get("limit", 100))
+        timeout = float(params.get("timeout", 0))
+        # Апдейты до offset подтверждены ботом
+        while self._updates and self._updates[0]["update_id"] < offset:
+            self._updates.popleft()
+        if not self._updates and timeout > 0:
+            self._has_updates.clear()
+            try:
+                await asyncio.wait_for(self._has_updates.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return list(itertools.islice(self._updates, limit))
+
+    async def _api_sendMessage(self, params: dict) -> dict:
+        return self._store(params, text=params.get("text", ""))
+
+    async def _api_sendPhoto(self, params: dict) -> dict:
+        file_id = self._file_id(params, "photo")
+        photo = [{"file_id": file_id, "file_unique_id": file_id, "width": 1280, "height": 960}]
+        return self._store(params, photo=photo, caption=params.get("caption"))
+
+    async def _api_sendDocument(self, params: dict) -> dict:
+        file_id = self._file_id(params, "document")
+        upload = params.get(params["document"][len("attach://"):]) if str(params["document"]).startswith("attach://") else None
+        document = {"file_id": file_id, "file_unique_id": file_id}
+        if upload is not None:
+            document["file_name"] = upload.filename
+            document["file_size"] = len(upload.file.read())
+        return self._store(params, document=document, caption=params.get("caption"))
+
+    async def _api_editMessageText(self, params: dict):
+        return self._edit(params, text=params.get("text", ""))
+
+    async def _api_editMessageCaption(self, params: dict):
+        return self._edit(params, caption=params.get("caption"))
+
+    async def _api_editMessageReplyMarkup(self, params: dict):
+        return self._edit(params)
+
+    async def _api_answerCallbackQuery(self, params: dict) -> bool:
+        future = self._answers.pop(params["callback_query_id"], None)
+        if future is not None and not future.done():
+            future.set_result(params.get("text"))
+        return True
+
+    # --- Хранение сообщений ---
+
+    def _file_id(self, params: dict, field: str) -> str:
+        value = str(params.get(field, ""))
+        if value.startswith("attach://") or not value:
+            return f"fake-{field}-{next(self._file_ids)}"
+        return value
+
+    def _store(self, params: dict, deliver: bool = True, **content) -> dict:
+        chat_id = int(params["chat_id"])
+        message = {
+            "message_id": next(self._message_ids),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": self.me,
+            **{key: value for key, value in content.items() if value is not None}
+        }
+        markup = params.get("reply_markup")
+        # В Message попадает только inline-клавиатура
+        if markup and "inline_keyboard" in markup:
+            message["reply_markup"] = markup
+        self._messages[(chat_id, message["message_id"])] = message
+        if deliver:
+            self._deliver(chat_id, message)
+        return message
+
+    def _edit(self, params: dict, **content):
+        if "inline_message_id" in params:
+            # Inline-сообщения бот не отправляет, как и Telegram, отвечаем ошибкой
+            raise KeyError(params["inline_message_id"])
+        chat_id = int(params["chat_id"])
+        message = dict(self._messages[(chat_id, int(params["message_id"]))])
+        message.update({key: value for key, value in content.items() if value is not None})
+        markup = params.get("reply_markup")
+        if markup and "inline_keyboard" in markup:
+            message["reply_markup"] = markup
+        else:
+            message.pop("reply_markup", None)
+        message["edit_date"] = int(time.time())
+        self._messages[(chat_id, message["message_id"])] = message
+        self._deliver(chat_id, message)
+        return message
+
+    def _deliver(self, chat_id: int, message: dict) -> None:
+        inbox = self._inboxes.get(chat_id)
+        if inbox is not None:
+            inbox.put_nowait(message)
+
+    # --- Клиентская сторона ---
+
+    def subscribe(self, chat_id: int) -> asyncio.Queue:
+        """Очередь сообщений, которые бот отправляет или редактирует в чате"""
+        return self._inboxes.setdefault(chat_id, asyncio.Queue())
+
+    def bot_message(self, chat_id: int, text: str, reply_markup: Optional[dict] = None) -> dict:
+        """Сообщение, будто отправленное ботом раньше (например, рассылка нового задания)"""
+        params = {"chat_id": chat_id}
+        if reply_markup:
+            params["reply_markup"] = reply_markup
+        return self._store(params, deliver=False, text=text)
+
+    def expect_answer(self, callback_query_id: str) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self._answers[callback_query_id] = future
+        return future
+
+    def push_update(self, update: dict) -> int:
+        update_id = next(self._update_ids)
+        self._updates.append({"update_id": update_id, **update})
+        self._has_updates.set()
+        return update_id
+
+
+class FakeUser:
+    """Пользователь Telegram: отправляет боту сообщения и нажимает кнопки"""
+
+    def __init__(self, api: FakeBotAPI, telegram_id: int, username: str):
+        self.api = api
+        self.telegram_id = telegram_id
+        self.profile = {"id": telegram_id, "is_bot": False, "first_name": username, "username": username}
+        self.inbox = api.subscribe(telegram_id)
+        # Полученные, но еще не обработанные сценарием сообщения
+        self._pending: List[dict] = []
+        self._message_ids = itertools.count(1_000_000)
+        self._callback_ids = itertools.count(1)
+
+    def _message(self, **content) -> dict:
+        return {
+            "message_id": next(self._message_ids),
+            "date": int(time.time()),
+            "chat": {"id": self.telegram_id, "type": "private", "username": self.profile["username"]},
+            "from": self.profile,
+            **content
+        }
+
+    def send_text(self, text: str) -> None:
+        self.api.push_update({"message": self._message(text=text)})
+
+    def send_photo(self, file_id: str) -> None:
+        photo = [
+            {"file_id": f"{file_id}-s", "file_unique_id": f"{file_id}-s", "width": 320, "height": 240},
+            {"file_id": file_id, "file_unique_id": file_id, "width": 1280, "height": 960}
+        ]
+        self.api.push_update({"message": self._message(photo=photo)})
+
+    def click(self, message: dict, data: str) -> asyncio.Future:
+        """Нажимает inline-кнопку; возвращает future с текстом answerCallbackQuery"""
+        callback_id = f"{self.telegram_id}-{next(self._callback_ids)}"
+        answer = self.api.expect_answer(callback_id)
+        self.api.push_update({"callback_query": {
+            "id": callback_id,
+            "from": self.profile,
+            "chat_instance": str(self.telegram_id),
+            "message": message,
+            "data": data
+        }})
+        return answer
+
+    async def expect(self, match: Callable[[dict], bool], timeout: float) -> dict:
+        """Ждет сообщение бота, подходящее под match; остальные сохраняются для следующих ожиданий"""
+        for i, message in enumerate(self._pending):
+            if match(message):
+                return self._pending.pop(i)
+        deadline = asyncio.get_running_loop().time() + timeout
+        while True:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                raise asyncio.TimeoutError
+            message = await asyncio.wait_for(self.inbox.get(), remaining)
+            if match(message):
+                return message
+            self._pending.append(message)
+            # Старые непрошенные сообщения (списки, подсказки) сценарию уже не нужны
+            del self._pending[:-50]
+
+    async def expect_button(self, prefix: str, timeout: float) -> tuple:
+        """Ждет сообщение с кнопкой prefix...; возвращает (сообщение, callback_data)"""
+        message = await self.expect(lambda m: find_button(m, prefix) is not None, timeout)
+        return message, find_button(message, prefix)
+
+    async def expect_text(self, fragment: str, timeout: float) -> dict:
+        return await self.expect(lambda m: fragment in (m.get("text") or m.get("caption") or ""), timeout)
+
+
+async def _serve(args) -> None:
+    api = FakeBotAPI(
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        rate_limit=args.rate_limit,
+        retry_after=args.retry_after
+    )
+    await api.start(args.host, args.port)
+    print(f"Fake Bot API: {api.base_url} (TELEGRAM_API_URL), Ctrl+C для остановки")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await api.stop()
+        print(f"Calls: {dict(api.calls)}, 429: {dict(api.rate_limited)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--rate-limit", type=float, default=0, help="доля ответов 429 (0..1)")
+    parser.add_argument("--retry-after", type=int, default=1)
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -1,70 +1,73 @@
 import asyncio
 import logging
-from aiogram import Bot, Dispatcher
-from aiogram.fsm.storage.memory import MemoryStorage
-from aiogram.enums.parse_mode import ParseMode
-from dotenv import load_dotenv
-import os
-from pathlib import Path
-from aiogram.client.default import DefaultBotProperties
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
-from src.config.bot_config import BOT_TOKEN, DATABASE_URL
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from src.config.bot_config import BOT_MODE, OUTBOX_ENABLED, BOT_WORKERS
 from src.utils.logging_config import setup_logging
 
-from src.handlers import admin, media, common, superadmin, set_commands
-from src.middlewares.auth import AuthMiddleware
-from src.middlewares.db_middleware import DbSessionMiddleware
-from src.middlewares.user_middleware import UserMiddleware
+from src.handlers import set_commands
+from src.app import create_bot, create_dispatcher
 from src.database.engine import engine
-from src.database.base import Base
-from aiogram import Router
-
-# Настраиваем логирование
-setup_logging()
+from src.services.broadcast_service import Broadcaster
+from src.services.outbox_dispatcher import OutboxDispatcher
+from src.services.deadline_scheduler import DeadlineScheduler
+from src.sharding import ShardPool, ShardRoutingMiddleware
+from src.webhook import run_webhook
+from src.metrics_server import MetricsServer
 
 async def main():
-    # Настраиваем логирование
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        handlers=[
-            logging.FileHandler("bot.log"),
-            logging.StreamHandler()
-        ]
-    )
+    # Настраиваем логирование (воркеры при шардировании импортируют этот модуль, поэтому не при импорте)
+    setup_logging()
     
     # Инициализация бота и диспетчера
-    bot = Bot(token=BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
-    storage = MemoryStorage()
-    dp = Dispatcher(storage=storage)
+    bot = create_bot()
     
     # Инициализация сессии базы данных
     async_session = async_sessionmaker(engine, expire_on_commit=False)
     
-    # Добавляем middleware
-    dp.update.middleware(DbSessionMiddleware(session_pool=async_session))
-    dp.message.middleware(AuthMiddleware())
-    dp.callback_query.middleware(UserMiddleware())
-    
-    # Регистрация роутеров
-    dp.include_router(superadmin.router)
-    dp.include_router(admin.router)
-    dp.include_router(media.router)
-    dp.include_router(common.router)
-    
-    # Добавляем бота в данные диспетчера
-    dp["bot"] = bot
+    # В режиме шардирования апдейты обрабатывают процессы-воркеры, а этот процесс
+    # только принимает их и доставляет уведомления из outbox
+    shard_pool = ShardPool() if BOT_WORKERS > 0 else None
+    broadcaster = Broadcaster(global_rate=shard_pool.broadcast_rate) if shard_pool else Broadcaster()
+    dp = create_dispatcher(bot, async_session, broadcaster)
+    if shard_pool:
+        dp.update.outer_middleware(ShardRoutingMiddleware(shard_pool))
+        shard_pool.start()
     
     # Устанавливаем команды бота
     await set_commands(bot, async_session)
     
-    logging.info("Starting bot...")
+    # Запускаем фоновую доставку уведомлений из outbox
+    outbox_dispatcher = OutboxDispatcher(bot, broadcaster, async_session)
+    if OUTBOX_ENABLED:
+        outbox_dispatcher.start()
+    
+    # Истечение сроков заданий и напоминания о дедлайнах
+    deadline_scheduler = DeadlineScheduler(async_session)
+    deadline_scheduler.start()
+    
+    # Метрики Prometheus на внутреннем порту; при шардировании вместе с метриками воркеров
+    metrics_server = MetricsServer(sources=shard_pool.metrics_sources if shard_pool else None)
+    await metrics_server.start()
+    
+    logging.info(f"Starting bot in {BOT_MODE} mode...")
     
     try:
-        await dp.start_polling(bot)
+        if BOT_MODE == "webhook":
+            await run_webhook(dp, bot, health_check=shard_pool.health_report if shard_pool else None)
+        else:
+            # При переходе с webhook на polling Telegram не отдает апдейты, пока webhook не удален
+            await bot.delete_webhook()
+            await dp.start_polling(bot)
     except Exception as e:
         logging.error(f"Ошибка при запуске бота: {e}")
     finally:
+        await metrics_server.stop()
+        await deadline_scheduler.stop()
+        if shard_pool:
+            await shard_pool.stop()
+        await outbox_dispatcher.stop()
+        await broadcaster.close()
+        await dp.storage.close()
         await bot.session.close()
 
 if __name__ == "__main__":
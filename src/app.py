@@ -0,0 +1,59 @@
+from typing import Optional
+from aiogram import Bot, Dispatcher
+from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.enums.parse_mode import ParseMode
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from src.config.bot_config import BOT_TOKEN, TELEGRAM_API_URL
+from src.handlers import admin, media, common, superadmin
+from src.middlewares.request_context import RequestContextMiddleware
+from src.middlewares.metrics import HandlerMetricsMiddleware, TelegramMetricsMiddleware
+from src.database.fsm_storage import SQLAlchemyStorage
+from src.services.broadcast_service import Broadcaster
+from src.services.report_cache import ReportCache
+
+
+def create_bot() -> Bot:
+    session = None
+    if TELEGRAM_API_URL:
+        session = AiohttpSession(api=TelegramAPIServer.from_base(TELEGRAM_API_URL))
+    bot = Bot(token=BOT_TOKEN, session=session, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+    bot.session.middleware(TelegramMetricsMiddleware())
+    return bot
+
+
+def create_dispatcher(
+    bot: Bot,
+    session_pool: async_sessionmaker[AsyncSession],
+    broadcaster: Optional[Broadcaster] = None
+) -> Dispatcher:
+    """Собирает диспетчер со всеми роутерами и общими сервисами.
+
+    Используется и в однопроцессном режиме, и в каждом воркере при шардировании.
+    Хранилище FSM и рассыльщик доступны как dp.storage и dp["broadcaster"],
+    их нужно закрыть при остановке.
+    """
+    # Состояния FSM храним в БД, чтобы они переживали перезапуск бота
+    storage = SQLAlchemyStorage(session_pool)
+    dp = Dispatcher(storage=storage)
+
+    # Добавляем middleware: одна сессия и один поиск пользователя на апдейт
+    dp.update.middleware(RequestContextMiddleware(session_pool=session_pool))
+    # Метрики обработчиков: inner-middleware диспетчера действуют на все вложенные роутеры
+    handler_metrics = HandlerMetricsMiddleware()
+    for name, observer in dp.observers.items():
+        if name not in ('update', 'error'):
+            observer.middleware(handler_metrics)
+
+    # Регистрация роутеров
+    dp.include_router(superadmin.router)
+    dp.include_router(admin.router)
+    dp.include_router(media.router)
+    dp.include_router(common.router)
+
+    # Добавляем бота и общие сервисы в данные диспетчера
+    dp["bot"] = bot
+    dp["broadcaster"] = broadcaster or Broadcaster()
+    dp["report_cache"] = ReportCache()
+    return dp
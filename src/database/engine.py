@@ -1,13 +1,100 @@
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
-from dotenv import load_dotenv
-import os
-from typing import AsyncGenerator
+from dataclasses import dataclass
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession, AsyncEngine
+from typing import AsyncGenerator, List, Optional
+from src.config.bot_config import (
+    DATABASE_URL,
+    DB_ECHO,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    SQLITE_JOURNAL_MODE,
+    SQLITE_SYNCHRONOUS,
+    SQLITE_MMAP_SIZE,
+    SQLITE_CACHE_SIZE,
+    SQLITE_BUSY_TIMEOUT_MS
+)
+from src.utils.metrics import db_usage, DB_QUERY_DURATION
 
-load_dotenv()
 
-# Convert SQLite URL to async format
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///media_bot.db")
-engine = create_async_engine(DATABASE_URL, echo=True)
+@dataclass
+class SQLiteProfile:
+    """Набор PRAGMA, которые выставляются на каждом новом соединении с SQLite"""
+    journal_mode: Optional[str] = SQLITE_JOURNAL_MODE
+    synchronous: Optional[str] = SQLITE_SYNCHRONOUS
+    mmap_size: Optional[int] = SQLITE_MMAP_SIZE
+    cache_size: Optional[int] = SQLITE_CACHE_SIZE
+    busy_timeout: Optional[int] = SQLITE_BUSY_TIMEOUT_MS
+
+    def pragmas(self) -> List[str]:
+        values = [
+            ('journal_mode', self.journal_mode),
+            ('synchronous', self.synchronous),
+            ('mmap_size', self.mmap_size),
+            ('cache_size', self.cache_size),
+            ('busy_timeout', self.busy_timeout),
+        ]
+        return [f"PRAGMA {name}={value}" for name, value in values if value not in (None, '')]
+
+
+def apply_sqlite_profile(engine: AsyncEngine, profile: SQLiteProfile) -> None:
+    @event.listens_for(engine.sync_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in profile.pragmas():
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Замеряет время SQL-запросов по типу (select, insert, ...) и учитывает
+    их в метриках текущего обработчика"""
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        # Запросы одного соединения идут последовательно; если запрос упал, значение перезапишет следующий
+        conn.info['query_started'] = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info.pop('query_started')
+        operation = statement.lstrip().split(None, 1)[0].lower() if statement.strip() else 'unknown'
+        DB_QUERY_DURATION.labels(operation).observe(elapsed)
+        usage = db_usage.get()
+        if usage is not None:
+            usage[0] += 1
+            usage[1] += elapsed
+
+
+def build_engine(
+    url: str = DATABASE_URL,
+    echo: bool = DB_ECHO,
+    sqlite_profile: Optional[SQLiteProfile] = None
+) -> AsyncEngine:
+    """Создает движок БД; для SQLite применяет профиль настроек соединения,
+    для серверных СУБД (PostgreSQL) настраивает пул соединений"""
+    options = {}
+    if make_url(url).get_backend_name() != 'sqlite':
+        options = dict(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            # Проверяем соединение перед выдачей из пула, чтобы не получить разорванное сервером
+            pool_pre_ping=True
+        )
+    engine = create_async_engine(url, echo=echo, **options)
+    if engine.dialect.name == 'sqlite':
+        apply_sqlite_profile(engine, sqlite_profile or SQLiteProfile())
+    instrument_engine(engine)
+    return engine
+
+
+engine = build_engine()
 AsyncSessionLocal = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
@@ -0,0 +1,231 @@
+import asyncio
+import json
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Mapping, Optional, Set
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StorageKey, StateType, DefaultKeyBuilder
+from sqlalchemy import delete
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from src.database.models import FSMRecord
+from src.config.bot_config import FSM_FLUSH_INTERVAL, FSM_STATE_TTL_HOURS, FSM_CACHE_SIZE, FSM_SHARED
+import logging
+
+
+@dataclass
+class _Record:
+    state: Optional[str] = None
+    data: Dict[str, Any] = field(default_factory=dict)
+    updated_at: datetime = field(default_factory=datetime.now)
+
+    @property
+    def is_empty(self) -> bool:
+        return self.state is None and not self.data
+
+
+class SQLAlchemyStorage(BaseStorage):
+    """Хранилище FSM в таблице fsm_storage.
+
+    Чтение идет через LRU-кэш в памяти, запись откладывается и сбрасывается
+    в БД пакетом раз в flush_interval секунд (и при закрытии). Состояния,
+    которые не менялись дольше state_ttl, считаются брошенными и удаляются.
+
+    Кэш рассчитан на то, что каждый ключ читает и пишет один процесс: один бот
+    или воркер ShardPool, которому достаются все апдейты пользователя. Если
+    апдейты одного пользователя могут попасть в разные экземпляры (несколько
+    webhook-экземпляров за балансировщиком без привязки по пользователю),
+    нужен shared=True: каждое чтение идет в БД, каждая запись сразу сохраняется
+    отдельной транзакцией (рассчитано на PostgreSQL, на SQLite записи упираются в блокировку файла).
+    """
+
+    # Ограничение на число параметров в одном IN (...) для SQLite
+    CHUNK_SIZE = 500
+    # 4 параметра на строку в пакетном upsert: не больше 999 параметров на запрос в старых версиях SQLite
+    UPSERT_CHUNK_SIZE = 200
+    # Как часто удалять брошенные состояния, сек
+    CLEANUP_INTERVAL = 3600
+
+    def __init__(
+        self,
+        session_pool: async_sessionmaker[AsyncSession],
+        flush_interval: float = FSM_FLUSH_INTERVAL,
+        state_ttl: timedelta = timedelta(hours=FSM_STATE_TTL_HOURS),
+        cache_size: int = FSM_CACHE_SIZE,
+        shared: bool = FSM_SHARED
+    ):
+        self.session_pool = session_pool
+        self.shared = shared
+        self.flush_interval = flush_interval
+        self.state_ttl = state_ttl
+        self.cache_size = cache_size
+        self.key_builder = DefaultKeyBuilder(with_bot_id=True, with_destiny=True)
+        self._cache: "OrderedDict[str, _Record]" = OrderedDict()
+        self._dirty: Set[str] = set()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self._last_cleanup = datetime.min
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        record = await self._get_record(key)
+        record.state = state.state if isinstance(state, State) else state
+        await self._save(key, record)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        record = await self._get_record(key)
+        return record.state
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        record = await self._get_record(key)
+        record.data = dict(data)
+        await self._save(key, record)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        record = await self._get_record(key)
+        return dict(record.data)
+
+    async def close(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+            self._flush_task = None
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Записывает все измененные состояния в БД одной транзакцией"""
+        async with self._flush_lock:
+            if not self._dirty:
+                return
+            keys = list(self._dirty)
+            self._dirty.clear()
+
+            try:
+                await self._write({storage_key: self._cache[storage_key] for storage_key in keys})
+            except Exception as e:
+                # Вернем ключи в очередь, чтобы повторить запись при следующем сбросе
+                self._dirty.update(keys)
+                logging.error(f"Error flushing FSM storage: {e}", exc_info=True)
+                return
+
+            self._evict()
+
+    async def _write(self, records: Dict[str, _Record]) -> None:
+        """Сохраняет записи одной транзакцией; пустые записи удаляются"""
+        rows = [
+            {
+                'key': storage_key,
+                'state': record.state,
+                'data': json.dumps(record.data, ensure_ascii=False, default=str),
+                'updated_at': record.updated_at
+            }
+            for storage_key, record in records.items()
+            if not record.is_empty
+        ]
+        empty = [storage_key for storage_key, record in records.items() if record.is_empty]
+        async with self.session_pool() as session:
+            # Upsert, а не DELETE + INSERT: два экземпляра, одновременно пишущие один ключ,
+            # иначе получили бы ошибку первичного ключа
+            insert = postgresql.insert if session.bind.dialect.name == 'postgresql' else sqlite.insert
+            for chunk in self._chunks(rows, self.UPSERT_CHUNK_SIZE):
+                statement = insert(FSMRecord).values(chunk)
+                await session.execute(statement.on_conflict_do_update(
+                    index_elements=[FSMRecord.key],
+                    set_={name: statement.excluded[name] for name in ('state', 'data', 'updated_at')}
+                ))
+            for chunk in self._chunks(empty):
+                await session.execute(delete(FSMRecord).where(FSMRecord.key.in_(chunk)))
+            await session.commit()
+
+    async def _get_record(self, key: StorageKey) -> _Record:
+        storage_key = self.key_builder.build(key)
+        if self.shared:
+            # Состояние могли изменить другие экземпляры, поэтому без кэша
+            record = await self._load(storage_key)
+            self._reset_if_abandoned(record)
+            return record
+
+        record = self._cache.get(storage_key)
+        if record is None:
+            loaded = await self._load(storage_key)
+            # Пока шел запрос, запись могла появиться в кэше из другого обработчика
+            record = self._cache.get(storage_key)
+            if record is None:
+                record = loaded
+                self._cache[storage_key] = record
+
+        self._cache.move_to_end(storage_key)
+
+        if self._reset_if_abandoned(record):
+            self._dirty.add(storage_key)
+
+        self._evict()
+        return record
+
+    def _reset_if_abandoned(self, record: _Record) -> bool:
+        if not record.is_empty and record.updated_at < datetime.now() - self.state_ttl:
+            # Состояние брошено пользователем, начинаем с чистого листа
+            record.state = None
+            record.data = {}
+            return True
+        return False
+
+    async def _load(self, storage_key: str) -> _Record:
+        async with self.session_pool() as session:
+            row = await session.get(FSMRecord, storage_key)
+        if row is None:
+            return _Record()
+        return _Record(
+            state=row.state,
+            data=json.loads(row.data) if row.data else {},
+            updated_at=row.updated_at
+        )
+
+    async def _save(self, key: StorageKey, record: _Record) -> None:
+        record.updated_at = datetime.now()
+        if self.shared:
+            await self._write({self.key_builder.build(key): record})
+            await self._cleanup_if_needed()
+            return
+        self._dirty.add(self.key_builder.build(key))
+        self._ensure_flusher()
+
+    def _ensure_flusher(self) -> None:
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+            await self._cleanup_if_needed()
+
+    async def _cleanup_if_needed(self) -> None:
+        now = datetime.now()
+        if now - self._last_cleanup < timedelta(seconds=self.CLEANUP_INTERVAL):
+            return
+        self._last_cleanup = now
+        threshold = now - self.state_ttl
+        try:
+            async with self.session_pool() as session:
+                await session.execute(delete(FSMRecord).where(FSMRecord.updated_at < threshold))
+                await session.commit()
+        except Exception as e:
+            logging.error(f"Error cleaning up FSM storage: {e}", exc_info=True)
+
+    def _evict(self) -> None:
+        """Вытесняет самые старые записи, которые уже сохранены в БД"""
+        overflow = len(self._cache) - self.cache_size
+        if overflow <= 0:
+            return
+        for storage_key in list(self._cache):
+            if overflow <= 0:
+                break
+            if storage_key in self._dirty:
+                continue
+            del self._cache[storage_key]
+            overflow -= 1
+
+    def _chunks(self, items: List, size: Optional[int] = None) -> List[List]:
+        size = size or self.CHUNK_SIZE
+        return [items[i:i + size] for i in range(0, len(items), size)]
@@ -0,0 +1,30 @@
+from typing import Any, Optional
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+
+class LazySession:
+    """Обертка над AsyncSession, которая создает сессию при первом обращении.
+
+    Обработчики и сервисы работают с ней как с обычной AsyncSession. Если за время
+    обработки апдейта к сессии никто не обратился, она так и не создается.
+    """
+
+    def __init__(self, session_pool: async_sessionmaker[AsyncSession]):
+        self._session_pool = session_pool
+        self._session: Optional[AsyncSession] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._session is not None
+
+    def _get_session(self) -> AsyncSession:
+        if self._session is None:
+            self._session = self._session_pool()
+        return self._session
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._get_session(), name)
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
@@ -2,5 +2,8 @@ from .user import User
 from .task import Task
 from .task_assignment import TaskAssignment
 from .submission import Submission, SubmissionStatus
+from .submission_event import SubmissionEvent
+from .notification import NotificationOutbox, OutboxStatus
+from .fsm import FSMRecord
 
-__all__ = ['User', 'Task', 'TaskAssignment', 'Submission', 'SubmissionStatus']
\ No newline at end of file
+__all__ = ['User', 'Task', 'TaskAssignment', 'Submission', 'SubmissionStatus', 'SubmissionEvent', 'NotificationOutbox', 'OutboxStatus', 'FSMRecord']
\ No newline at end of file
@@ -0,0 +1,15 @@
+from datetime import datetime
+from sqlalchemy import Column, String, DateTime, Text
+from src.database.base import Base
+
+
+class FSMRecord(Base):
+    __tablename__ = 'fsm_storage'
+
+    key = Column(String, primary_key=True)  # Ключ StorageKey, собранный DefaultKeyBuilder
+    state = Column(String, nullable=True)
+    data = Column(Text, nullable=True)  # JSON с данными состояния
+    updated_at = Column(DateTime, nullable=False, default=datetime.now, index=True)
+
+    def __repr__(self):
+        return f"<FSMRecord {self.key} ({self.state})>"
\ No newline at end of file
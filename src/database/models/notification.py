@@ -0,0 +1,32 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Text, Index
+from src.database.base import Base
+
+
+class OutboxStatus:
+    PENDING = 'pending'  # Ожидает отправки (или повторной попытки)
+    SENT = 'sent'        # Успешно доставлено
+    DEAD = 'dead'        # Исчерпаны попытки доставки
+
+
+class NotificationOutbox(Base):
+    __tablename__ = 'notification_outbox'
+
+    id = Column(Integer, primary_key=True)
+    chat_id = Column(BigInteger, nullable=False)
+    text = Column(Text, nullable=True)
+    photo = Column(String, nullable=True)
+    reply_markup = Column(Text, nullable=True)  # JSON клавиатуры
+    status = Column(String, nullable=False, default=OutboxStatus.PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.now)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index('ix_notification_outbox_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+
+    def __repr__(self):
+        return f"<NotificationOutbox {self.id} -> {self.chat_id} ({self.status})>"
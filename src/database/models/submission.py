@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from src.database.base import Base
 from enum import Enum
@@ -26,9 +26,19 @@ class Submission(Base):
     previous_status = Column(SQLEnum(SubmissionStatus), nullable=True)
     revision_comment = Column(Text, nullable=True)
     published_link = Column(String, nullable=True)
+    updated_at = Column(DateTime, nullable=True, default=datetime.now, onupdate=datetime.now)
+    # Версия строки для оптимистичной блокировки: каждое изменение статуса увеличивает ее на 1
+    version = Column(Integer, nullable=False, default=1, server_default='1')
 
     task = relationship('Task', back_populates='submissions')
     user = relationship('User', back_populates='submissions')
 
+    __table_args__ = (
+        # Очередь модерации: фильтр по статусу и сортировка по дате отправки
+        Index('ix_submissions_status_submitted_at', 'status', 'submitted_at', 'id'),
+        # Публикация пользователя по заданию и все публикации задания
+        Index('ix_submissions_task_user', 'task_id', 'user_id'),
+    )
+
     def __repr__(self):
         return f"<Submission {self.id} - Task {self.task_id}>"
\ No newline at end of file
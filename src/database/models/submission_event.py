@@ -0,0 +1,24 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from src.database.base import Base
+
+
+class SubmissionEvent(Base):
+    """Журнал смен статуса публикаций (строки только добавляются)"""
+    __tablename__ = 'submission_events'
+
+    id = Column(Integer, primary_key=True)
+    submission_id = Column(Integer, ForeignKey('submissions.id', ondelete='CASCADE'), nullable=False)
+    action = Column(String(32), nullable=False)
+    from_status = Column(String(16), nullable=True)  # None - публикация создана
+    to_status = Column(String(16), nullable=False)
+    actor_id = Column(Integer, nullable=True)  # users.id модератора или автора
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
+
+    __table_args__ = (
+        # История публикации по порядку
+        Index('ix_submission_events_submission', 'submission_id', 'id'),
+    )
+
+    def __repr__(self):
+        return f"<SubmissionEvent {self.submission_id}: {self.from_status} -> {self.to_status}>"
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from src.database.base import Base
 
@@ -27,10 +27,21 @@ class Task(Base):
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     created_by = Column(Integer, ForeignKey('users.id'), nullable=False)
     photo = Column(String, nullable=True)
+    # За сколько минут до дедлайна отправлено последнее напоминание
+    last_reminder_offset = Column(Integer, nullable=True)
+    # Время последнего изменения (используется для инвалидации кэша отчетов)
+    updated_at = Column(DateTime, nullable=True, default=datetime.now, onupdate=datetime.now)
 
     assigned_media = relationship('TaskAssignment', back_populates='task')
     submissions = relationship('Submission', back_populates='task')
     creator = relationship("User", back_populates="created_tasks")
 
+    __table_args__ = (
+        # Активные задания: статус и дедлайн
+        Index('ix_tasks_status_deadline', 'status', 'deadline'),
+        # Фильтр очереди модерации по создателю задания
+        Index('ix_tasks_created_by', 'created_by'),
+    )
+
     def __repr__(self):
         return f"<Task {self.id} ({self.status})>"
\ No newline at end of file
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from src.database.base import Base
 
@@ -12,8 +12,14 @@ class TaskAssignment(Base):
     media_outlet = Column(String)
     assigned_at = Column(DateTime, default=datetime.utcnow)
     status = Column(String)  # in_progress, completed
+    updated_at = Column(DateTime, nullable=True, default=datetime.now, onupdate=datetime.now)
 
     task = relationship('Task', back_populates='assigned_media')
 
+    __table_args__ = (
+        # Назначение СМИ на задание и все задания, взятые СМИ
+        Index('ix_task_assignments_outlet_task', 'media_outlet', 'task_id'),
+    )
+
     def __repr__(self):
         return f"<TaskAssignment {self.task_id} - {self.media_outlet}>"
\ No newline at end of file
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Boolean
+from datetime import datetime
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, DateTime
 from sqlalchemy.orm import relationship
 from src.database.base import Base
 
@@ -7,11 +8,13 @@ class User(Base):
     __tablename__ = 'users'
 
     id = Column(Integer, primary_key=True, index=True)
-    telegram_id = Column(Integer, unique=True, index=True)
+    # ID в Telegram не помещаются в 32 бита
+    telegram_id = Column(BigInteger, unique=True, index=True)
     username = Column(String, nullable=True)
     is_admin = Column(Boolean, default=False)
     is_superadmin = Column(Boolean, default=False)
-    media_outlet = Column(String, nullable=True)
+    media_outlet = Column(String, nullable=True, index=True)
+    updated_at = Column(DateTime, nullable=True, default=datetime.now, onupdate=datetime.now)
 
     # Добавляем связь с заданиями
     created_tasks = relationship("Task", back_populates="creator")
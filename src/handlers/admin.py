@@ -1,6 +1,7 @@
 from aiogram import Router, F, Bot
 from aiogram.filters import Command
-from aiogram.types import Message, CallbackQuery, FSInputFile, InlineKeyboardMarkup, InlineKeyboardButton
+from aiogram.types import Message, CallbackQuery, FSInputFile, InlineKeyboardMarkup, InlineKeyboardButton, InputMediaPhoto
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.fsm.context import FSMContext
 from aiogram.filters import BaseFilter
 from datetime import datetime
@@ -8,17 +9,23 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from src.states.task_states import TaskStates, AdminStates
 from src.services.task_service import TaskService
 from src.services.submission_service import SubmissionService
-from src.services.export_service import ExportService
+from src.services.submission_transitions import AlreadyHandled
+from src.services.report_cache import ReportCache
+from src.services.moderation_service import ModerationService, ModerationPage
 from src.services.user_service import UserService
 from src.keyboards.admin_kb import get_admin_main_keyboard, get_moderation_keyboard
-from src.keyboards.moderation_kb import get_moderation_keyboard
+from src.keyboards.moderation_kb import (
+    get_moderation_keyboard, get_review_keyboard, parse_moderation_data, strip_moderation_buttons
+)
 from src.utils.logger import logger
 from src.database.models import User, Task
 from src.database.models.submission import SubmissionStatus
 from src.utils.check_admin import check_admin
+from src.services.broadcast_service import Broadcaster, BroadcastReport
+from src.services.notification_service import NotificationService
+import asyncio
 import logging
-from typing import List
-from src.handlers.media import send_user_notification
+from typing import List, Optional
 
 # Создаем роутер
 router = Router(name='admin')
@@ -31,8 +38,18 @@ async def check_admin(user: User) -> bool:
     logging.info(f"  check result: {is_admin}")
     return is_admin
 
+async def send_all_tasks_report(message: Message, session: AsyncSession, report_cache: ReportCache):
+    """Отправляет общий отчет, повторно используя уже загруженный в Telegram файл"""
+    artifact = await report_cache.get_all_tasks_report(session)
+    sent = await message.answer_document(
+        artifact.file_id or FSInputFile(artifact.path),
+        caption="Отчет по всем заданиям"
+    )
+    if not artifact.file_id and sent.document:
+        report_cache.remember_file_id(artifact, sent.document.file_id)
+
 @router.callback_query(F.data == "export_reports")
-async def export_reports(callback: CallbackQuery, session: AsyncSession, user: User):
+async def export_reports(callback: CallbackQuery, session: AsyncSession, user: User, report_cache: ReportCache):
     if not await check_admin(user):
         await callback.answer("У вас нет прав администратора", show_alert=True)
         return
@@ -41,14 +58,8 @@ async def export_reports(callback: CallbackQuery, session: AsyncSession, user: U
         logging.info(f"Admin {callback.from_user.id} called export_reports")
         logging.info(f"Callback data: {callback.data}")
         
-        export_service = ExportService(session)
-        filename = await export_service.export_all_tasks_report()
-        
         # Отправляем файл
-        await callback.message.answer_document(
-            FSInputFile(filename),
-            caption="Отчет по всем заданиям"
-        )
+        await send_all_tasks_report(callback.message, session, report_cache)
         await callback.answer()
         
     except Exception as e:
@@ -90,7 +101,8 @@ async def handle_deadline(
     state: FSMContext, 
     session: AsyncSession,
     user: User,
-    bot: Bot
+    bot: Bot,
+    broadcaster: Broadcaster
 ):
     try:
         data = await state.get_data()
@@ -114,49 +126,19 @@ async def handle_deadline(
         user_service = UserService(session)
         media_users = await user_service.get_all_media_outlets()
         
-        notification_sent = 0  # Счетчик успешно отправленных уведомлений
-        for media_user in media_users:
-            try:
-                if task.photo:  # Если есть фото, отправляем его
-                    await bot.send_photo(
-                        chat_id=media_user.telegram_id,
-                        photo=task.photo,
-                        caption=(
-                            f"[ANNOUNCE] Новое задание #{task.id}\n"
-                            f"Создано администратором: @{user.username}\n"
-                            f"Пресс-релиз: {task.press_release_link}\n"
-                            f"Дедлайн: {task.deadline.strftime('%d.%m.%Y %H:%M')}"
-                        ),
-                        reply_markup=InlineKeyboardMarkup(inline_keyboard=[[
-                            InlineKeyboardButton(
-                                text="Взять в работу",
-                                callback_data=f"take_task_{task.id}"
-                            )
-                        ]])
-                    )
-                else:  # Если фото нет, отправляем просто текст
-                    await bot.send_message(
-                        chat_id=media_user.telegram_id,
-                        text=(
-                            f"[ANNOUNCE] Новое задание #{task.id}\n"
-                            f"Создано администратором: @{user.username}\n"
-                            f"Пресс-релиз: {task.press_release_link}\n"
-                            f"Дедлайн: {task.deadline.strftime('%d.%m.%Y %H:%M')}"
-                        ),
-                        reply_markup=InlineKeyboardMarkup(inline_keyboard=[[
-                            InlineKeyboardButton(
-                                text="Взять в работу",
-                                callback_data=f"take_task_{task.id}"
-                            )
-                        ]])
-                    )
-                notification_sent += 1  # Увеличиваем счетчик, если уведомление отправлено успешно
-            except Exception as e:
-                print(f"Не удалось отправить уведомление пользователю {media_user.username} (ID: {media_user.telegram_id}): {e}")
+        # Рассылка идет в фоне, администратор сразу получает ответ, а итог - по завершении
+        notify_media_about_new_task(
+            bot,
+            broadcaster,
+            task,
+            media_users,
+            creator_username=user.username,
+            report_chat_id=message.chat.id
+        )
         
         await message.answer(
             f"✅ Задание #{task.id} создано\n"
-            f"Уведомления отправлены: {notification_sent} из {len(media_users)} СМИ",
+            f"Рассылка уведомлений {len(media_users)} СМИ запущена, по завершении придет отчет",
             reply_markup=get_admin_main_keyboard()
         )
         await state.clear()
@@ -168,6 +150,29 @@ async def handle_deadline(
         await message.answer("Произошла ошибка при создании задания")
         await state.clear()
 
+async def send_review_page(message: Message, page: ModerationPage):
+    """Отправляет страницу очереди модерации новым сообщением"""
+    keyboard = await get_review_keyboard(page.submission_id, page.version, page.cursor, page.has_prev, page.has_next)
+    if page.photo:
+        await message.answer_photo(photo=page.photo, caption=page.text, reply_markup=keyboard)
+    else:
+        await message.answer(page.text, reply_markup=keyboard)
+
+async def replace_review_page(message: Message, page: ModerationPage):
+    """Показывает страницу очереди модерации в том же сообщении"""
+    keyboard = await get_review_keyboard(page.submission_id, page.version, page.cursor, page.has_prev, page.has_next)
+    if page.photo and message.photo:
+        await message.edit_media(
+            InputMediaPhoto(media=page.photo, caption=page.text),
+            reply_markup=keyboard
+        )
+    elif not page.photo and not message.photo:
+        await message.edit_text(page.text, reply_markup=keyboard)
+    else:
+        # Сообщение с фото нельзя превратить в текстовое и наоборот
+        await message.delete()
+        await send_review_page(message, page)
+
 @router.callback_query(F.data == "review_posts")
 async def review_posts(callback: CallbackQuery, session: AsyncSession, user: User):
     logging.info(f"Вызов функции review_posts пользователем {user.telegram_id}")
@@ -177,101 +182,73 @@ async def review_posts(callback: CallbackQuery, session: AsyncSession, user: Use
             await callback.answer("У вас нет прав администратора", show_alert=True)
             return
     
-        await callback.answer("Загружаю задания...", show_alert=False)
-        submission_service = SubmissionService(session)
+        await callback.answer()
         
-        logging.info(f"Получение публикаций на модерацию для admin_id={user.id}, is_superadmin={bool(user.is_superadmin)}")
-        submissions = await submission_service.get_pending_submissions(
+        logging.info(f"Получение очереди модерации для admin_id={user.id}, is_superadmin={bool(user.is_superadmin)}")
+        page = await ModerationService(session).get_page(
             admin_id=user.id,
             is_superadmin=bool(user.is_superadmin)
         )
         
-        logging.info(f"Получено {len(submissions)} публикаций на модерацию")
-        
-        if not submissions:
+        if not page:
             logging.info("Нет публикаций на модерацию")
             await callback.message.answer("Нет публикаций на модерацию")
             return
         
-        for submission in submissions:
-            logging.info(f"Формирование сообщения для задания {submission.id}")
-            # Формируем текст с полной информацией
-            text = (
-                f"[NEW] Задание #{submission.task_id}\n"
-                f"От: {submission.user.media_outlet}\n"
-                f"ID пользователя: {submission.user.telegram_id}\n"
-                f"Имя пользователя: @{submission.user.username}\n"
-                f"Создатель задания: {submission.task.created_by}\n"  # Добавляем информацию о создателе
-                f"Текст задания:\n{submission.content}\n"
-                f"Дата отправки: {submission.submitted_at.strftime('%d.%m.%Y %H:%M')}"
-            )
-            
-            try:
-                # Если есть фото, отправляем его с текстом
-                if submission.photo:
-                    logging.info(f"Отправка фото для задания {submission.id}")
-                    
-                    # Ограничиваем длину подписи до 850 символов
-                    caption = text
-                    if len(caption) > 850:
-                        caption = caption[:847] + "..."
-                        logging.info(f"Обрезана подпись к фото для задания {submission.id} до 850 символов")
-                    
-                    await callback.message.answer_photo(
-                        photo=submission.photo,
-                        caption=caption,
-                        reply_markup=await get_moderation_keyboard(submission.id)
-                    )
-                else:
-                    logging.info(f"Отправка текста для задания {submission.id}")
-                    
-                    # Ограничиваем длину текста до 4000 символов (максимальный размер сообщения в Telegram)
-                    message_text = text
-                    if len(message_text) > 4000:
-                        message_text = message_text[:3997] + "..."
-                        logging.info(f"Обрезан текст для задания {submission.id} до 4000 символов")
-                    
-                    await callback.message.answer(
-                        message_text,
-                        reply_markup=await get_moderation_keyboard(submission.id)
-                    )
-            except Exception as e:
-                logging.error(f"Ошибка при отправке сообщения для задания {submission.id}: {e}", exc_info=True)
-                # Пробуем отправить короткую версию при ошибке
-                try:
-                    short_text = (
-                        f"[NEW] Задание #{submission.task_id}\n"
-                        f"От: {submission.user.media_outlet}\n"
-                        f"Имя пользователя: @{submission.user.username}\n"
-                        f"(Текст задания слишком длинный и был обрезан)"
-                    )
-                    
-                    if submission.photo:
-                        await callback.message.answer_photo(
-                            photo=submission.photo,
-                            caption=short_text[:850],
-                            reply_markup=await get_moderation_keyboard(submission.id)
-                        )
-                    else:
-                        await callback.message.answer(
-                            short_text,
-                            reply_markup=await get_moderation_keyboard(submission.id)
-                        )
-                except Exception as nested_e:
-                    logging.error(f"Вторичная ошибка при отправке сообщения: {nested_e}", exc_info=True)
+        await send_review_page(callback.message, page)
         
     except Exception as e:
         logging.error(f"Ошибка в функции review_posts: {e}", exc_info=True)
         await callback.message.answer("Произошла ошибка при получении заданий на модерацию")
         await callback.answer("Произошла ошибка", show_alert=True)
 
+@router.callback_query(F.data.startswith("review_prev_") | F.data.startswith("review_next_"))
+async def review_navigate(callback: CallbackQuery, session: AsyncSession, user: User):
+    if not await check_admin(user):
+        await callback.answer("У вас нет прав администратора", show_alert=True)
+        return
+
+    try:
+        backward = callback.data.startswith("review_prev_")
+        cursor = callback.data.split("_", 2)[2]
+        page = await ModerationService(session).get_page(
+            admin_id=user.id,
+            is_superadmin=bool(user.is_superadmin),
+            cursor=cursor,
+            backward=backward
+        )
+        
+        if not page:
+            await callback.message.edit_reply_markup(reply_markup=None)
+            await callback.answer("Нет публикаций на модерацию", show_alert=True)
+            return
+        
+        await replace_review_page(callback.message, page)
+        await callback.answer()
+        
+    except TelegramBadRequest as e:
+        # Страница не изменилась (повторное нажатие)
+        logging.warning(f"Не удалось обновить страницу модерации: {e}")
+        await callback.answer()
+    except Exception as e:
+        logging.error(f"Ошибка в функции review_navigate: {e}", exc_info=True)
+        await callback.answer("Произошла ошибка", show_alert=True)
+
+async def drop_moderation_buttons(message: Message) -> None:
+    """Убирает с сообщения кнопки модерации уже обработанной публикации"""
+    try:
+        await message.edit_reply_markup(reply_markup=strip_moderation_buttons(message.reply_markup))
+    except TelegramBadRequest as e:
+        logging.warning(f"Не удалось убрать кнопки модерации: {e}")
+
 @router.callback_query(F.data.startswith("approve_submission_"))
 async def approve_submission(callback: CallbackQuery, session: AsyncSession, user: User, bot: Bot):
     if not await check_admin(user):
         await callback.answer("У вас нет прав администратора", show_alert=True)
         return
 
-    submission_id = int(callback.data.split("_")[-1])
+    # Версия публикации, которую видел модератор, когда ему прислали кнопки
+    submission_id, version = parse_moderation_data(callback.data)
     submission_service = SubmissionService(session)
 
     try:
@@ -292,34 +269,40 @@ async def approve_submission(callback: CallbackQuery, session: AsyncSession, use
 
         # Пытаемся одобрить задание
         try:
-            submission = await submission_service.approve_submission(submission_id)
+            submission = await submission_service.approve_submission(
+                submission_id, actor_id=user.id, expected_version=version
+            )
             logging.info(f"Submission {submission_id} approved successfully")
+        except AlreadyHandled as e:
+            await drop_moderation_buttons(callback.message)
+            await callback.answer(str(e), show_alert=True)
+            return
         except ValueError as e:
             await callback.answer(str(e), show_alert=True)
             return
 
-        # Формируем текст сообщения
+        # Формируем текст сообщения; кнопки модерации убираем, навигация очереди остается
+        reply_markup = strip_moderation_buttons(callback.message.reply_markup)
         if callback.message.text:
             message_text = callback.message.text + "\n\nСтатус: Одобрено ✅"
             await callback.message.edit_text(
                 message_text,
-                reply_markup=callback.message.reply_markup
+                reply_markup=reply_markup
             )
         elif callback.message.caption:
             message_text = callback.message.caption + "\n\nСтатус: Одобрено ✅"
             await callback.message.edit_caption(
-                message_text,
-                reply_markup=callback.message.reply_markup
+                caption=message_text,
+                reply_markup=reply_markup
             )
         else:
             message_text = f"[NEW] Задание #{submission.task_id} одобрено ✅"
             await callback.message.edit_text(
                 message_text,
-                reply_markup=callback.message.reply_markup
+                reply_markup=reply_markup
             )
             
-        # Отправляем уведомление пользователю о статусе публикации
-        await send_user_notification(bot, submission)
+        # Уведомление пользователю о статусе публикации уже записано в outbox вместе с одобрением
         
         # Сообщаем об успешной операции
         await callback.answer("Публикация одобрена")
@@ -335,7 +318,7 @@ async def request_revision(callback: CallbackQuery, state: FSMContext, session:
         return
 
     try:
-        submission_id = int(callback.data.split("_")[-1])
+        submission_id, version = parse_moderation_data(callback.data)
         
         # Получаем задание для проверки статуса
         submission_service = SubmissionService(session)
@@ -354,6 +337,12 @@ async def request_revision(callback: CallbackQuery, state: FSMContext, session:
             await callback.answer("У вас нет прав на модерацию этого задания", show_alert=True)
             return
             
+        # Публикация изменилась после того, как модератору прислали кнопки
+        if version is not None and version != submission.version:
+            await drop_moderation_buttons(callback.message)
+            await callback.answer(str(AlreadyHandled()), show_alert=True)
+            return
+            
         # Проверяем возможность отправки на доработку
         if submission.status == SubmissionStatus.REVISION.value:
             await callback.message.answer("❌ Задание уже находится на доработке")
@@ -377,6 +366,7 @@ async def request_revision(callback: CallbackQuery, state: FSMContext, session:
             
         await state.update_data(
             submission_id=submission_id,
+            expected_version=submission.version,
             is_photo_revision=is_photo_revision,
             can_send_text=True
         )
@@ -411,16 +401,14 @@ async def handle_revision_comment(
         submission_service = SubmissionService(session)
         
         try:
-            # Запрашиваем доработку
-            submission = await submission_service.request_revision(
-                submission_id=submission_id,
-                comment=message.text,
-                is_photo_revision=is_photo_revision
-            )
-            
-            # Получаем обновленное задание с данными пользователя
+            # Получаем задание с данными пользователя
             submission = await submission_service.get_submission_with_user(submission_id)
             
+            if not submission:
+                await state.clear()
+                await message.answer("Произошла ошибка: задание не найдено")
+                return
+            
             if not submission.user:
                 await state.clear()
                 await message.answer("Произошла ошибка: пользователь не найден")
@@ -431,23 +419,28 @@ async def handle_revision_comment(
                 await message.answer("Произошла ошибка: не найден Telegram ID пользователя")
                 return
             
-            # Отправляем уведомление пользователю
+            # Уведомление пользователю записываем в outbox до смены статуса:
+            # request_revision зафиксирует его в той же транзакции
             content_type = "фото" if is_photo_revision else "текста"
-            try:
-                await bot.send_message(
-                    chat_id=submission.user.telegram_id,
-                    text=f"⚠️ {content_type.capitalize()} для задания #{submission.task_id} требует доработки.\n"
-                         f"Комментарий от администратора @{message.from_user.username}:\n{message.text}",
-                    reply_markup=InlineKeyboardMarkup(inline_keyboard=[[
-                        InlineKeyboardButton(
-                            text="Отправить исправленный текст",
-                            callback_data=f"submit_revision_{submission.id}"
-                        )
-                    ]])
-                )
-            except Exception as e:
-                logging.error(f"Error sending revision notification to user: {e}")
-                await message.answer("Ошибка при отправке уведомления пользователю")
+            NotificationService(session).enqueue(
+                submission.user.telegram_id,
+                text=f"⚠️ {content_type.capitalize()} для задания #{submission.task_id} требует доработки.\n"
+                     f"Комментарий от администратора @{message.from_user.username}:\n{message.text}",
+                reply_markup=InlineKeyboardMarkup(inline_keyboard=[[
+                    InlineKeyboardButton(
+                        text="Отправить исправленный текст",
+                        callback_data=f"submit_revision_{submission.id}"
+                    )
+                ]])
+            )
+            
+            # Запрашиваем доработку
+            submission = await submission_service.request_revision(
+                submission_id=submission_id,
+                comment=message.text,
+                is_photo_revision=is_photo_revision,
+                expected_version=data.get('expected_version')
+            )
             
             await message.answer("✅ Комментарий отправлен пользователю")
             await state.clear()
@@ -488,106 +481,30 @@ async def cmd_review(message: Message, session: AsyncSession, user: User):
             await message.answer("У вас нет прав администратора")
             return
     
-        await message.answer("Загружаю задания на модерацию...")
-        
-        submission_service = SubmissionService(session)
-        submissions = await submission_service.get_pending_submissions(
+        page = await ModerationService(session).get_page(
             admin_id=user.id,
             is_superadmin=bool(user.is_superadmin)
         )
         
-        logging.info(f"Получено {len(submissions)} заданий на модерацию")
-        
-        if not submissions:
+        if not page:
             logging.info("Нет заданий на модерацию")
             await message.answer("Нет заданий на модерацию")
             return
         
-        for submission in submissions:
-            logging.info(f"Формирование сообщения для задания {submission.id}")
-            # Формируем текст с полной информацией
-            text = (
-                f"📨 Задание #{submission.task_id}\n"
-                f"От: {submission.user.media_outlet}\n"
-                f"ID пользователя: {submission.user.telegram_id}\n"
-                f"Имя пользователя: @{submission.user.username}\n"
-                f"Создатель задания: {submission.task.created_by}\n"  # Добавляем информацию о создателе
-                f"Текст задания:\n{submission.content}\n"
-                f"Дата отправки: {submission.submitted_at.strftime('%d.%m.%Y %H:%M')}"
-            )
-            
-            try:
-                # Если есть фото, отправляем его с текстом
-                if submission.photo:
-                    logging.info(f"Отправка фото для задания {submission.id}")
-                    
-                    # Ограничиваем длину подписи до 850 символов
-                    caption = text
-                    if len(caption) > 850:
-                        caption = caption[:847] + "..."
-                        logging.info(f"Обрезана подпись к фото для задания {submission.id} до 850 символов")
-                    
-                    await message.answer_photo(
-                        photo=submission.photo,
-                        caption=caption,
-                        reply_markup=await get_moderation_keyboard(submission.id)
-                    )
-                else:
-                    logging.info(f"Отправка текста для задания {submission.id}")
-                    
-                    # Ограничиваем длину текста до 4000 символов (максимальный размер сообщения в Telegram)
-                    message_text = text
-                    if len(message_text) > 4000:
-                        message_text = message_text[:3997] + "..."
-                        logging.info(f"Обрезан текст для задания {submission.id} до 4000 символов")
-                    
-                    await message.answer(
-                        message_text,
-                        reply_markup=await get_moderation_keyboard(submission.id)
-                    )
-            except Exception as e:
-                logging.error(f"Ошибка при отправке сообщения для задания {submission.id}: {e}", exc_info=True)
-                # Пробуем отправить короткую версию при ошибке
-                try:
-                    short_text = (
-                        f"📨 Задание #{submission.task_id}\n"
-                        f"От: {submission.user.media_outlet}\n"
-                        f"Имя пользователя: @{submission.user.username}\n"
-                        f"(Текст задания слишком длинный и был обрезан)"
-                    )
-                    
-                    if submission.photo:
-                        await message.answer_photo(
-                            photo=submission.photo,
-                            caption=short_text[:850],
-                            reply_markup=await get_moderation_keyboard(submission.id)
-                        )
-                    else:
-                        await message.answer(
-                            short_text,
-                            reply_markup=await get_moderation_keyboard(submission.id)
-                        )
-                except Exception as nested_e:
-                    logging.error(f"Вторичная ошибка при отправке сообщения: {nested_e}", exc_info=True)
-                    
+        await send_review_page(message, page)
+
     except Exception as e:
         logging.error(f"Ошибка в функции cmd_review: {e}", exc_info=True)
         await message.answer("Произошла ошибка при получении заданий на модерацию")
 
 @router.message(Command("export"))
-async def cmd_export(message: Message, session: AsyncSession, user: User):
+async def cmd_export(message: Message, session: AsyncSession, user: User, report_cache: ReportCache):
     if not await check_admin(user):
         await message.answer("У вас нет прав администратора")
         return
 
     try:
-        export_service = ExportService(session)
-        filename = await export_service.export_all_tasks_report()
-        
-        await message.answer_document(
-            FSInputFile(filename),
-            caption="Отчет по всем заданиям"
-        )
+        await send_all_tasks_report(message, session, report_cache)
         
     except Exception as e:
         logging.error(f"Error in export_reports: {e}", exc_info=True)
@@ -640,7 +557,7 @@ async def review_submission(callback: CallbackQuery, session: AsyncSession):
         
         await callback.message.answer(
             message_text,
-            reply_markup=await get_moderation_keyboard(submission.id)
+            reply_markup=await get_moderation_keyboard(submission.id, submission.version)
         )
         await callback.answer()
     except Exception as e:
@@ -656,7 +573,7 @@ async def review_submission(callback: CallbackQuery, session: AsyncSession):
             
             await callback.message.answer(
                 short_text,
-                reply_markup=await get_moderation_keyboard(submission.id)
+                reply_markup=await get_moderation_keyboard(submission.id, submission.version)
             )
         except Exception as nested_e:
             logging.error(f"Вторичная ошибка при отправке сообщения: {nested_e}", exc_info=True)
@@ -696,9 +613,6 @@ async def handle_link_submission(
             await state.clear()
             return
         
-        # Добавляем ссылку на задание
-        submission = await submission_service.add_published_link(submission_id, message.text)
-        
         # Готовим текст уведомления
         notification_text = (
             f"ℹ️ Информация о задании\n"
@@ -706,61 +620,22 @@ async def handle_link_submission(
             f"{message.text}"
         )
         
-        # Получаем ТОЛЬКО суперадминов из базы данных
+        # Получателями являются суперадмины и создатель задания (без повторов)
         user_service = UserService(session)
         superadmins = await user_service.get_superadmins()
         logging.info(f"Найдено {len(superadmins)} суперадминов в базе данных")
+        recipients = [admin.telegram_id for admin in superadmins if admin.telegram_id]
         
-        # Множество для отслеживания уже уведомленных пользователей
-        notified_user_telegrams = set()
-        
-        # Отправляем уведомления всем суперадминам
-        notified_count = 0
-        for admin in superadmins:
-            try:
-                if admin.telegram_id:
-                    try:
-                        # Преобразуем telegram_id к int
-                        admin_telegram_id = int(admin.telegram_id)
-                        
-                        # Отправляем уведомление
-                        await bot.send_message(
-                            admin_telegram_id,
-                            notification_text
-                        )
-                        notified_user_telegrams.add(admin_telegram_id)
-                        notified_count += 1
-                        logging.info(f"✅ Уведомление отправлено суперадмину {admin.username} (ID: {admin_telegram_id})")
-                    except (ValueError, TypeError) as e:
-                        logging.error(f"❌ Ошибка преобразования telegram_id для {admin.username}: {e}")
-                else:
-                    logging.warning(f"⚠️ У суперадмина {admin.username} отсутствует telegram_id")
-            except Exception as e:
-                logging.error(f"Не удалось отправить уведомление суперадмину {admin.username}: {e}")
-        
-        # Получаем задание, чтобы узнать его создателя
-        task_service = TaskService(session)
-        task = await task_service.get_task_by_id(submission.task_id)
-        
-        # Получаем создателя задания и отправляем ему уведомление, если он еще не получил его как суперадмин
-        if task and task.created_by:
-            creator = await user_service.get_user_by_id(task.created_by)
+        if submission.task and submission.task.created_by:
+            creator = await user_service.get_user_by_id(submission.task.created_by)
             if creator and creator.telegram_id:
-                try:
-                    creator_telegram_id = int(creator.telegram_id)
-                    
-                    # Проверяем, не получил ли создатель уже уведомление как суперадмин
-                    if creator_telegram_id not in notified_user_telegrams:
-                        await bot.send_message(
-                            creator_telegram_id,
-                            notification_text
-                        )
-                        notified_count += 1
-                        logging.info(f"✅ Уведомление отправлено создателю задания {creator.username} (ID: {creator_telegram_id})")
-                except Exception as e:
-                    logging.error(f"Не удалось отправить уведомление создателю задания {creator.username if creator else 'unknown'}: {e}")
+                recipients.append(creator.telegram_id)
+        
+        # Уведомления записываются в outbox и фиксируются вместе со ссылкой
+        notifications = NotificationService(session).enqueue_many(recipients, text=notification_text)
+        submission = await submission_service.add_published_link(submission_id, message.text)
         
-        logging.info(f"📊 Отправлено уведомлений {notified_count} пользователям (суперадмины + создатель задания)")
+        logging.info(f"📊 В очередь поставлено уведомлений {len(notifications)} пользователям (суперадмины + создатель задания)")
         
         await message.answer("✅ Ссылка успешно отправлена!")
         await state.clear()
@@ -877,53 +752,67 @@ def get_admin_main_keyboard() -> InlineKeyboardMarkup:
         ]
     ])
 
-async def notify_media_about_new_task(
+def notify_media_about_new_task(
     bot: Bot, 
+    broadcaster: Broadcaster,
     task: Task, 
-    media_users: List[User]
-):
-    for user in media_users:
-        try:
-            if task.photo:
-                await bot.send_photo(
-                    chat_id=user.telegram_id,
-                    photo=task.photo,
-                    caption=(
-                        f"[ANNOUNCE] Новое задание #{task.id}\n"
-                        f"Пресс-релиз: {task.press_release_link}\n"
-                        f"Дедлайн: {task.deadline.strftime('%d.%m.%Y %H:%M')}"
-                    ),
-                    reply_markup=InlineKeyboardMarkup(inline_keyboard=[[
-                        InlineKeyboardButton(
-                            text="Взять в работу",
-                            callback_data=f"take_task_{task.id}"
-                        )
-                    ]])
-                )
-            else:
-                await bot.send_message(
-                    chat_id=user.telegram_id,
-                    text=(
-                        f"[ANNOUNCE] Новое задание #{task.id}\n"
-                        f"Пресс-релиз: {task.press_release_link}\n"
-                        f"Дедлайн: {task.deadline.strftime('%d.%m.%Y %H:%M')}"
-                    ),
-                    reply_markup=InlineKeyboardMarkup(inline_keyboard=[[
-                        InlineKeyboardButton(
-                            text="Взять в работу",
-                            callback_data=f"take_task_{task.id}"
-                        )
-                    ]])
-                )
-        except Exception as e:
-            logging.error(f"Не удалось отправить уведомление пользователю {user.username} (ID: {user.telegram_id}): {e}")
+    media_users: List[User],
+    creator_username: Optional[str] = None,
+    report_chat_id: Optional[int] = None
+) -> asyncio.Task:
+    """Запускает фоновую рассылку о новом задании и отправляет отчет администратору"""
+    # Все данные берем заранее: сессия обработчика закроется раньше, чем закончится рассылка
+    task_id = task.id
+    photo = task.photo
+    text = f"[ANNOUNCE] Новое задание #{task_id}\n"
+    if creator_username:
+        text += f"Создано администратором: @{creator_username}\n"
+    text += (
+        f"Пресс-релиз: {task.press_release_link}\n"
+        f"Дедлайн: {task.deadline.strftime('%d.%m.%Y %H:%M')}"
+    )
+    keyboard = InlineKeyboardMarkup(inline_keyboard=[[
+        InlineKeyboardButton(
+            text="Взять в работу",
+            callback_data=f"take_task_{task_id}"
+        )
+    ]])
+    usernames = {media_user.telegram_id: media_user.username for media_user in media_users}
+    
+    async def send(chat_id: int):
+        if photo:  # Если есть фото, отправляем его
+            await bot.send_photo(chat_id=chat_id, photo=photo, caption=text, reply_markup=keyboard)
+        else:  # Если фото нет, отправляем просто текст
+            await bot.send_message(chat_id=chat_id, text=text, reply_markup=keyboard)
+    
+    async def report(result: BroadcastReport):
+        for failed in result.failed:
+            logging.error(f"Не удалось отправить уведомление пользователю {usernames.get(failed.chat_id)} (ID: {failed.chat_id}): {failed.error}")
+        if report_chat_id is None:
+            return
+        report_text = f"📣 Задание #{task_id}: уведомления доставлены {result.delivered} из {result.total} СМИ"
+        if result.failed:
+            failed_list = "\n".join(
+                f"• @{usernames.get(failed.chat_id)} ({failed.chat_id})" for failed in result.failed[:20]
+            )
+            report_text += f"\n\nНе доставлено:\n{failed_list}"
+            if len(result.failed) > 20:
+                report_text += f"\n...и еще {len(result.failed) - 20}"
+        await bot.send_message(report_chat_id, report_text)
+    
+    return broadcaster.start(
+        [media_user.telegram_id for media_user in media_users if media_user.telegram_id],
+        send,
+        on_done=report
+    )
 
 @router.message(AdminStates.waiting_for_task_photo)
 async def handle_task_photo(
     message: Message, 
     state: FSMContext, 
     session: AsyncSession,
-    user: User
+    user: User,
+    broadcaster: Broadcaster
 ):
     try:
         if not message.photo:
@@ -949,7 +838,7 @@ async def handle_task_photo(
         
         # Уведомляем СМИ
         media_users = await task_service.get_media_users()
-        await notify_media_about_new_task(message.bot, task, media_users)
+        notify_media_about_new_task(message.bot, broadcaster, task, media_users, report_chat_id=message.chat.id)
         
         await message.answer(
             f"✅ Задание #{task.id} успешно создано",
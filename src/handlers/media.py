@@ -5,9 +5,11 @@ from aiogram.fsm.context import FSMContext
 from src.states.task_states import TaskStates
 from src.services.task_service import TaskService
 from src.services.submission_service import SubmissionService
+from src.services.submission_transitions import AlreadyHandled
 from src.services.user_service import UserService
+from src.services.notification_service import NotificationService
 from src.keyboards.media_kb import get_media_main_keyboard, get_task_keyboard
-from src.keyboards.moderation_kb import get_moderation_keyboard
+from src.keyboards.moderation_kb import parse_moderation_data, strip_moderation_buttons
 from src.utils.logger import logger
 from src.database.models import User, Submission
 from src.database.models.submission import SubmissionStatus
@@ -15,6 +17,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 import logging
 from aiogram.exceptions import TelegramBadRequest
 import re
+from typing import List
 from sqlalchemy import select
 
 router = Router()
@@ -28,7 +31,10 @@ async def show_active_tasks(
 ):
     try:
         task_service = TaskService(session)
-        tasks = await task_service.get_active_tasks()
+        # Задания и назначения текущего СМИ получаем одним запросом
+        tasks = await task_service.get_active_tasks_with_assignments(
+            user.media_outlet, filter_by_media_outlet=False
+        )
         
         logging.info(f"Received {len(tasks)} tasks")
         
@@ -43,12 +49,10 @@ async def show_active_tasks(
         # Удаляем предыдущее сообщение с заданиями
         await callback.message.delete()
         
-        for task in tasks:
+        for task, assignment in tasks:
             logging.info(f"Processing task {task.id}, photo={task.photo}")
             
             # Проверяем, взято ли задание текущим пользователем
-            assignment = await task_service.get_task_assignment(task.id, user.media_outlet)
-            
             if assignment:
                 # Если задание уже взято, показываем кнопку "Отправить текст"
                 keyboard = InlineKeyboardMarkup(inline_keyboard=[[
@@ -281,13 +285,23 @@ async def handle_revision_request(
         logging.error(f"Error in handle_revision_request: {e}", exc_info=True)
         await callback.answer("Произошла ошибка при обработке запроса", show_alert=True)
 
+async def get_review_recipients(session: AsyncSession, task) -> List[int]:
+    """Суперадмины и создатель задания: им уходит текст на проверку"""
+    user_service = UserService(session)
+    superadmins = await user_service.get_superadmins()
+    recipients = [admin.telegram_id for admin in superadmins if admin.telegram_id]
+    if task and task.created_by:
+        creator = await user_service.get_user_by_id(task.created_by)
+        if creator and creator.telegram_id:
+            recipients.append(creator.telegram_id)
+    return recipients
+
 @router.message(TaskStates.waiting_for_text)
 async def handle_submission_text(
     message: Message, 
     state: FSMContext, 
     session: AsyncSession,
-    user: User,
-    bot: Bot
+    user: User
 ):
     try:
         logging.info(f"Пользователь {user.username} отправил текст")
@@ -309,15 +323,18 @@ async def handle_submission_text(
         submission_id = data.get('submission_id')
         is_revision = submission_id is not None
         
+        submission_service = SubmissionService(session)
         if is_revision:
             # Обновляем текст существующей публикации
             logging.info(f"Обновление текста для публикации {submission_id}")
-            submission_service = SubmissionService(session)
-            submission = await submission_service.update_submission_content(submission_id, content=message.text)
-            
-            # После обновления получаем обновленную публикацию с данными задания
-            submission = await submission_service.get_submission_with_user(submission_id)
-            task_id = submission.task_id
+            existing = await submission_service.get_submission(submission_id)
+            # Публикация возвращается вместе с пользователем и заданием
+            submission = await submission_service.update_submission_content(
+                submission_id,
+                content=message.text,
+                actor_id=user.id,
+                notify_admins=await get_review_recipients(session, existing.task if existing else None)
+            )
             
         else:
             # Получаем ID задания из состояния
@@ -331,72 +348,17 @@ async def handle_submission_text(
                 
             logging.info(f"Создание новой публикации для задания {task_id} от пользователя {user.username}")
             
-            # Создаем публикацию
-            submission_service = SubmissionService(session)
+            # Создаем публикацию; уведомления суперадминам и создателю задания
+            # записываются в outbox в той же транзакции
+            task = await TaskService(session).get_task_by_id(task_id)
             submission = await submission_service.create_submission(
                 task_id=task_id,
                 user_id=user.id,
-                content=message.text
+                content=message.text,
+                notify_admins=await get_review_recipients(session, task)
             )
             
         if submission:
-            # Получаем информацию о задании и его создателе
-            task_service = TaskService(session)
-            task = await task_service.get_task_by_id(task_id)
-            
-            # Уведомляем суперадминов
-            from src.config.users import ADMINS
-            for admin in ADMINS:
-                try:
-                    await bot.send_message(
-                        admin["telegram_id"],
-                        f"📨 {'Исправленный' if is_revision else 'Новый'} текст для задания #{submission.task_id}\n"
-                        f"От: {user.media_outlet}\n"
-                        f"Пользователь: @{user.username}\n\n"
-                        f"{message.text[:1000]}{'...' if len(message.text) > 1000 else ''}",
-                        reply_markup=InlineKeyboardMarkup(inline_keyboard=[[
-                            InlineKeyboardButton(
-                                text="Просмотреть",
-                                callback_data=f"review_submission_{submission.id}"
-                            )
-                        ]])
-                    )
-                except Exception as e:
-                    logging.error(f"Не удалось отправить уведомление администратору {admin['username']}: {e}")
-            
-            # НОВОЕ: Уведомляем создателя задания, если он не суперадмин
-            if task and task.created_by:
-                # Получаем пользователя-создателя
-                user_service = UserService(session)
-                creator = await user_service.get_user_by_id(task.created_by)
-                
-                # Проверяем, что создатель существует и не получил уведомление как суперадмин
-                if creator and creator.telegram_id:
-                    is_creator_superadmin = False
-                    for admin in ADMINS:
-                        if str(creator.telegram_id) == str(admin["telegram_id"]):
-                            is_creator_superadmin = True
-                            break
-                    
-                    if not is_creator_superadmin:
-                        try:
-                            logging.info(f"Отправка уведомления создателю задания {task.id}: {creator.telegram_id}")
-                            await bot.send_message(
-                                creator.telegram_id,
-                                f"📨 {'Исправленный' if is_revision else 'Новый'} текст для задания #{submission.task_id}\n"
-                                f"От: {user.media_outlet}\n"
-                                f"Пользователь: @{user.username}\n\n"
-                                f"{message.text[:1000]}{'...' if len(message.text) > 1000 else ''}",
-                                reply_markup=InlineKeyboardMarkup(inline_keyboard=[[
-                                    InlineKeyboardButton(
-                                        text="Просмотреть",
-                                        callback_data=f"review_submission_{submission.id}"
-                                    )
-                                ]])
-                            )
-                        except Exception as e:
-                            logging.error(f"Не удалось отправить уведомление создателю задания (telegram_id: {creator.telegram_id}): {e}")
-            
             await message.answer(f"✅ Текст для задания #{submission.task_id} успешно отправлен и ожидает проверки")
         else:
             await message.answer("❌ Не удалось создать публикацию. Пожалуйста, попробуйте позже или обратитесь к администратору.")
@@ -410,7 +372,7 @@ async def handle_submission_text(
 
 @router.callback_query(F.data.startswith("approve_submission_"))
 async def approve_submission(callback: CallbackQuery, session: AsyncSession, bot: Bot):
-    submission_id = int(callback.data.split("_")[-1])
+    submission_id, version = parse_moderation_data(callback.data)
     submission_service = SubmissionService(session)
 
     try:
@@ -420,7 +382,7 @@ async def approve_submission(callback: CallbackQuery, session: AsyncSession, bot
         logging.info(f"Initial status: {submission.status}, Has photo: {bool(submission.photo)}")
         
         # Одобряем публикацию
-        submission = await submission_service.approve_submission(submission_id)
+        submission = await submission_service.approve_submission(submission_id, expected_version=version)
         logging.info(f"After approval status: {submission.status}")
         
         # Обновляем сообщение админа
@@ -433,12 +395,12 @@ async def approve_submission(callback: CallbackQuery, session: AsyncSession, bot
                 if callback.message.photo:
                     await callback.message.edit_caption(
                         caption=message_text,
-                        reply_markup=callback.message.reply_markup
+                        reply_markup=strip_moderation_buttons(callback.message.reply_markup)
                     )
                 else:
                     await callback.message.edit_text(
                         text=message_text,
-                        reply_markup=callback.message.reply_markup
+                        reply_markup=strip_moderation_buttons(callback.message.reply_markup)
                     )
             except Exception as e:
                 logging.error(f"Error updating admin message: {e}")
@@ -457,33 +419,15 @@ async def approve_submission(callback: CallbackQuery, session: AsyncSession, bot
             all_admins = await user_service.get_all_admins()
             logging.info(f"Найдено {len(all_admins)} администраторов в базе данных")
             
-            # Отправляем уведомления всем администраторам
-            notified_count = 0
-            for admin in all_admins:
-                try:
-                    if admin.telegram_id:
-                        try:
-                            # Преобразуем telegram_id к int
-                            admin_telegram_id = int(admin.telegram_id)
-                            
-                            # Отправляем уведомление
-                            await bot.send_message(
-                                admin_telegram_id,
-                                notification_text
-                            )
-                            notified_count += 1
-                            logging.info(f"✅ Уведомление отправлено администратору {admin.username} (ID: {admin_telegram_id})")
-                        except (ValueError, TypeError) as e:
-                            logging.error(f"❌ Ошибка преобразования telegram_id для {admin.username}: {e}")
-                    else:
-                        logging.warning(f"⚠️ У администратора {admin.username} отсутствует telegram_id")
-                except Exception as e:
-                    logging.error(f"Не удалось отправить уведомление администратору {admin.username}: {e}")
-            
-            logging.info(f"📊 Отправлено уведомлений {notified_count} администраторам из {len(all_admins)}")
+            # Ставим уведомления администраторам в outbox, доставят их фоновые воркеры
+            notifications = NotificationService(session).enqueue_many(
+                [admin.telegram_id for admin in all_admins],
+                text=notification_text
+            )
+            await session.commit()
+            logging.info(f"📊 В очередь поставлено уведомлений {len(notifications)} администраторам из {len(all_admins)}")
 
-        # Отправляем только уведомление через send_user_notification
-        await send_user_notification(bot, submission)
+        # Уведомление пользователю о статусе публикации записано в outbox вместе с одобрением
         
         # Отправляем ответ на callback
         if submission.status == SubmissionStatus.TEXT_APPROVED.value:
@@ -491,6 +435,8 @@ async def approve_submission(callback: CallbackQuery, session: AsyncSession, bot
         elif submission.status == SubmissionStatus.APPROVED.value:
             await callback.answer("Задание полностью одобрено.")
         
+    except AlreadyHandled as e:
+        await callback.answer(str(e), show_alert=True)
     except Exception as e:
         logging.error(f"Error approving submission: {e}", exc_info=True)
         await callback.answer("Произошла ошибка при одобрении задания")
@@ -554,8 +500,7 @@ async def prompt_for_photo(callback: CallbackQuery, state: FSMContext):
 async def handle_photo_submission(
     message: Message, 
     state: FSMContext, 
-    session: AsyncSession,
-    bot: Bot
+    session: AsyncSession
 ):
     try:
         # Проверяем, что есть фото
@@ -580,13 +525,18 @@ async def handle_photo_submission(
             await state.clear()
             return
             
-        # Обновляем фото публикации
+        # Получаем всех администраторов из базы данных
+        all_admins = await UserService(session).get_all_admins()
+        logging.info(f"Найдено {len(all_admins)} администраторов в базе данных")
+            
+        # Обновляем фото публикации; фото администраторам записывается в outbox в той же транзакции
         try:
             # Берем самую крупную версию фото
             photo = message.photo[-1].file_id
             submission = await submission_service.update_submission_content(
                 submission_id=submission_id,
-                photo=photo
+                photo=photo,
+                notify_admins=[admin.telegram_id for admin in all_admins]
             )
         except ValueError as e:
             await message.answer(f"❌ Ошибка: {str(e)}")
@@ -594,55 +544,6 @@ async def handle_photo_submission(
             return
             
         if submission:
-            # Получаем информацию о задании и его создателе
-            task_service = TaskService(session)
-            task = await task_service.get_task_by_id(submission.task_id)
-            
-            # Определяем, является ли это исправленным фото
-            is_revision = submission.status == SubmissionStatus.REVISION.value
-            
-            # Готовим текст для уведомления
-            caption = (
-                f"📸 {'Исправленное' if is_revision else 'Новое'} фото для задания #{submission.task_id}\n"
-                f"От: {submission.user.media_outlet}\n"
-                f"Пользователь: @{submission.user.username}"
-            )
-            
-            # Получаем всех администраторов из базы данных
-            user_service = UserService(session)
-            all_admins = await user_service.get_all_admins()
-            logging.info(f"Найдено {len(all_admins)} администраторов в базе данных")
-            
-            # Отправляем уведомления всем администраторам
-            notified_count = 0
-            for admin in all_admins:
-                try:
-                    if admin.telegram_id:
-                        try:
-                            # Преобразуем telegram_id к int
-                            admin_telegram_id = int(admin.telegram_id)
-                            
-                            # Отправляем фото с подписью
-                            await bot.send_photo(
-                                admin_telegram_id,
-                                photo=photo,
-                                caption=caption,
-                                reply_markup=await get_moderation_keyboard(submission.id)
-                            )
-                            notified_count += 1
-                            logging.info(f"✅ Фото отправлено администратору {admin.username} (ID: {admin_telegram_id})")
-                        except (ValueError, TypeError) as e:
-                            logging.error(f"❌ Ошибка преобразования telegram_id для {admin.username}: {e}")
-                    else:
-                        logging.warning(f"⚠️ У администратора {admin.username} отсутствует telegram_id")
-                except Exception as e:
-                    logging.error(f"Не удалось отправить фото администратору {admin.username}: {e}")
-            
-            logging.info(f"📊 Отправлено фото {notified_count} администраторам из {len(all_admins)}")
-            
-            # Отправляем уведомление пользователю через send_user_notification
-            await send_user_notification(bot, submission)
-            
             await message.answer("✅ Фото успешно добавлено к заданию и ожидает проверки")
             
         await state.clear()
@@ -879,17 +780,6 @@ async def handle_link_submission(
             await state.clear()
             return
         
-        # Сохраняем ссылку
-        submission = await submission_service.add_published_link(
-            submission_id=submission_id,
-            published_link=message.text
-        )
-        
-        # Получаем задание, чтобы узнать его создателя
-        task_service = TaskService(session)
-        task = await task_service.get_task_by_id(submission.task_id)
-        logging.info(f"Получено задание {task.id} с created_by={task.created_by} (тип: {type(task.created_by)})")
-        
         # Готовим текст уведомления
         notification_text = (
             f"ℹ️ Информация о задании\n"
@@ -897,57 +787,28 @@ async def handle_link_submission(
             f"{message.text}"
         )
         
-        # Получаем ТОЛЬКО суперадминов из базы данных
+        # Получателями являются суперадмины и создатель задания (без повторов)
         user_service = UserService(session)
         superadmins = await user_service.get_superadmins()
         logging.info(f"Найдено {len(superadmins)} суперадминов в базе данных")
+        recipients = [admin.telegram_id for admin in superadmins if admin.telegram_id]
         
-        # Множество для отслеживания уже уведомленных пользователей
-        notified_user_telegrams = set()
-        
-        # Отправляем уведомления всем суперадминам
-        notified_count = 0
-        for admin in superadmins:
-            try:
-                if admin.telegram_id:
-                    try:
-                        # Преобразуем telegram_id к int
-                        admin_telegram_id = int(admin.telegram_id)
-                        
-                        # Отправляем уведомление
-                        await bot.send_message(
-                            admin_telegram_id,
-                            notification_text
-                        )
-                        notified_user_telegrams.add(admin_telegram_id)
-                        notified_count += 1
-                        logging.info(f"✅ Уведомление отправлено суперадмину {admin.username} (ID: {admin_telegram_id})")
-                    except (ValueError, TypeError) as e:
-                        logging.error(f"❌ Ошибка преобразования telegram_id для {admin.username}: {e}")
-                else:
-                    logging.warning(f"⚠️ У суперадмина {admin.username} отсутствует telegram_id")
-            except Exception as e:
-                logging.error(f"Не удалось отправить уведомление суперадмину {admin.username}: {e}")
-        
-        # Получаем создателя задания и отправляем ему уведомление, если он еще не получил его как суперадмин
+        task = submission.task
         if task and task.created_by:
             creator = await user_service.get_user_by_id(task.created_by)
             if creator and creator.telegram_id:
-                try:
-                    creator_telegram_id = int(creator.telegram_id)
-                    
-                    # Проверяем, не получил ли создатель уже уведомление как суперадмин
-                    if creator_telegram_id not in notified_user_telegrams:
-                        await bot.send_message(
-                            creator_telegram_id,
-                            notification_text
-                        )
-                        notified_count += 1
-                        logging.info(f"✅ Уведомление отправлено создателю задания {creator.username} (ID: {creator_telegram_id})")
-                except Exception as e:
-                    logging.error(f"Не удалось отправить уведомление создателю задания {creator.username if creator else 'unknown'}: {e}")
+                recipients.append(creator.telegram_id)
+        
+        # Уведомления записываются в outbox и фиксируются в одной транзакции со ссылкой
+        notifications = NotificationService(session).enqueue_many(recipients, text=notification_text)
+        
+        # Сохраняем ссылку
+        submission = await submission_service.add_published_link(
+            submission_id=submission_id,
+            published_link=message.text
+        )
         
-        logging.info(f"📊 Отправлено уведомлений {notified_count} пользователям (суперадмины + создатель задания)")
+        logging.info(f"📊 В очередь поставлено уведомлений {len(notifications)} пользователям (суперадмины + создатель задания)")
         
         await message.answer(
             "✅ Ссылка успешно добавлена. Спасибо!",
@@ -971,49 +832,6 @@ async def handle_link_submission(
             'can_send_text': False
         })
 
-async def send_user_notification(bot: Bot, submission: Submission):
-    """Отправляет уведомление пользователю о статусе публикации"""
-    try:
-        if not submission.user or not submission.user.telegram_id:
-            logging.error(f"No user or telegram_id found for submission {submission.id}")
-            return
-            
-        if submission.status == SubmissionStatus.TEXT_APPROVED.value:
-            # Если текст одобрен, отправляем сообщение с кнопкой для фото
-            keyboard = InlineKeyboardMarkup(inline_keyboard=[[
-                InlineKeyboardButton(
-                    text="📎 Прикрепить фото",
-                    callback_data=f"attach_photo_{submission.id}"
-                )
-            ]])
-            await bot.send_message(
-                chat_id=submission.user.telegram_id,
-                text=f"✅ Ваш текст для задания #{submission.task_id} одобрен!\nТеперь необходимо прикрепить фото к публикации.",
-                reply_markup=keyboard
-            )
-        elif submission.status == SubmissionStatus.APPROVED.value:
-            # Если публикация полностью одобрена
-            keyboard = InlineKeyboardMarkup(inline_keyboard=[[
-                InlineKeyboardButton(
-                    text="🔗 Отправить ссылку",
-                    callback_data=f"send_link_{submission.id}"
-                )
-            ]])
-            await bot.send_message(
-                chat_id=submission.user.telegram_id,
-                text=f"✅ Ваша публикация для задания #{submission.task_id} полностью одобрена!\nТеперь отправьте ссылку на опубликованный материал.",
-                reply_markup=keyboard
-            )
-        elif submission.status == SubmissionStatus.COMPLETED.value:
-            # Если публикация завершена
-            await bot.send_message(
-                chat_id=submission.user.telegram_id,
-                text=f"✅ Ваша публикация для задания #{submission.task_id} успешно завершена! Спасибо за сотрудничество.",
-                reply_markup=get_media_main_keyboard()
-            )
-    except Exception as e:
-        logging.error(f"Error in send_user_notification: {e}", exc_info=True)
-
 @router.message(F.text == "Активные задания")
 async def handle_active_tasks_button(
     message: Message, 
@@ -1023,7 +841,7 @@ async def handle_active_tasks_button(
 ):
     try:
         task_service = TaskService(session)
-        tasks = await task_service.get_active_tasks(user.media_outlet)
+        tasks = await task_service.get_active_tasks_with_assignments(user.media_outlet)
         
         if not tasks:
             await message.answer("У вас нет активных заданий")
@@ -1032,12 +850,11 @@ async def handle_active_tasks_button(
         logging.info(f"Received {len(tasks)} tasks")
         
         # Отправляем каждое задание отдельным сообщением
-        for task in tasks:
+        for task, assignment in tasks:
             try:
                 logging.info(f"Processing task {task.id}, photo={task.photo}")
                 
                 # Проверяем, взято ли задание в работу
-                assignment = await task_service.get_task_assignment(task.id, user.media_outlet)
                 status_text = "✅ В работе" if assignment else "🆕 Доступно"
                 
                 # Обрезаем ссылку если она слишком длинная
@@ -1242,16 +1059,6 @@ async def handle_revision_comment(
             await state.clear()
             return
 
-        # Сохраняем комментарий
-        submission = await submission_service.add_revision_comment(
-            submission_id=submission_id,
-            comment=message.text
-        )
-        
-        # Получаем задание, чтобы узнать его создателя
-        task_service = TaskService(session)
-        task = await task_service.get_task_by_id(submission.task_id)
-        
         # Готовим текст уведомления
         notification_text = (
             f"📨 Добавлен комментарий к заданию #{submission.task_id}\n"
@@ -1266,30 +1073,19 @@ async def handle_revision_comment(
         all_admins = await user_service.get_all_admins()
         logging.info(f"Найдено {len(all_admins)} администраторов в базе данных")
         
-        # Отправляем уведомления всем администраторам
-        notified_count = 0
-        for admin in all_admins:
-            try:
-                if admin.telegram_id:
-                    try:
-                        # Преобразуем telegram_id к int
-                        admin_telegram_id = int(admin.telegram_id)
-                        
-                        # Отправляем уведомление
-                        await bot.send_message(
-                            admin_telegram_id,
-                            notification_text
-                        )
-                        notified_count += 1
-                        logging.info(f"✅ Уведомление отправлено администратору {admin.username} (ID: {admin_telegram_id})")
-                    except (ValueError, TypeError) as e:
-                        logging.error(f"❌ Ошибка преобразования telegram_id для {admin.username}: {e}")
-                else:
-                    logging.warning(f"⚠️ У администратора {admin.username} отсутствует telegram_id")
-            except Exception as e:
-                logging.error(f"Не удалось отправить уведомление администратору {admin.username}: {e}")
+        # Уведомления администраторам фиксируются вместе с комментарием
+        notifications = NotificationService(session).enqueue_many(
+            [admin.telegram_id for admin in all_admins],
+            text=notification_text
+        )
+        
+        # Сохраняем комментарий
+        submission = await submission_service.add_revision_comment(
+            submission_id=submission_id,
+            comment=message.text
+        )
         
-        logging.info(f"📊 Отправлено уведомлений {notified_count} администраторам из {len(all_admins)}")
+        logging.info(f"📊 В очередь поставлено уведомлений {len(notifications)} администраторам из {len(all_admins)}")
         
         await message.answer(
             "✅ Комментарий успешно добавлен. Спасибо!",
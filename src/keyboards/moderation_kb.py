@@ -1,9 +1,39 @@
+from typing import Optional, Tuple
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from src.database.models.submission import SubmissionStatus
 import logging
 
-async def get_moderation_keyboard(submission_id: int) -> InlineKeyboardMarkup:
-    """Возвращает клавиатуру для модерации публикации"""
+# Префиксы callback_data кнопок действий модерации
+MODERATION_ACTIONS = ("approve_submission_", "request_revision_", "request_link_")
+
+
+def parse_moderation_data(data: str) -> Tuple[int, Optional[int]]:
+    """ID публикации и версия, которую видел модератор, из callback_data кнопки модерации.
+
+    В кнопках, отправленных до появления версии, ее нет: тогда версия None.
+    """
+    submission_id, _, version = data.split("_", 2)[2].partition("_")
+    return int(submission_id), int(version) if version else None
+
+
+def strip_moderation_buttons(markup: Optional[InlineKeyboardMarkup]) -> Optional[InlineKeyboardMarkup]:
+    """Клавиатура без кнопок модерации (навигация очереди остается); None, если кнопок не осталось"""
+    if markup is None:
+        return None
+    rows = [
+        [button for button in row if not (button.callback_data or "").startswith(MODERATION_ACTIONS)]
+        for row in markup.inline_keyboard
+    ]
+    rows = [row for row in rows if row]
+    return InlineKeyboardMarkup(inline_keyboard=rows) if rows else None
+
+
+async def get_moderation_keyboard(submission_id: int, version: int) -> InlineKeyboardMarkup:
+    """Возвращает клавиатуру для модерации публикации.
+
+    Версия публикации в callback_data: если до нажатия публикацию изменил
+    другой модератор, действие будет отклонено.
+    """
     logging.info(f"Создание клавиатуры модерации для submission_id={submission_id}")
     buttons = []
     
@@ -11,7 +41,7 @@ async def get_moderation_keyboard(submission_id: int) -> InlineKeyboardMarkup:
     buttons.append(
         InlineKeyboardButton(
             text="✅ Одобрить",
-            callback_data=f"approve_submission_{submission_id}"
+            callback_data=f"approve_submission_{submission_id}_{version}"
         )
     )
     
@@ -19,7 +49,7 @@ async def get_moderation_keyboard(submission_id: int) -> InlineKeyboardMarkup:
     buttons.append(
         InlineKeyboardButton(
             text="📝 На доработку",
-            callback_data=f"request_revision_{submission_id}"
+            callback_data=f"request_revision_{submission_id}_{version}"
         )
     )
     
@@ -34,4 +64,19 @@ async def get_moderation_keyboard(submission_id: int) -> InlineKeyboardMarkup:
     keyboard = InlineKeyboardMarkup(inline_keyboard=[buttons])
     # Используем безопасное логирование без вывода эмодзи
     logging.info(f"Клавиатура модерации создана для submission_id={submission_id}")
-    return keyboard 
\ No newline at end of file
+    return keyboard 
+
+async def get_review_keyboard(
+    submission_id: int, version: int, cursor: str, has_prev: bool, has_next: bool
+) -> InlineKeyboardMarkup:
+    """Клавиатура страницы очереди модерации: действия с публикацией и навигация"""
+    keyboard = await get_moderation_keyboard(submission_id, version)
+
+    navigation = []
+    if has_prev:
+        navigation.append(InlineKeyboardButton(text="⬅️ Новее", callback_data=f"review_prev_{cursor}"))
+    if has_next:
+        navigation.append(InlineKeyboardButton(text="Старше ➡️", callback_data=f"review_next_{cursor}"))
+    if navigation:
+        keyboard.inline_keyboard.append(navigation)
+    return keyboard
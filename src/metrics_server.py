@@ -0,0 +1,49 @@
+from typing import Callable, Dict, List, Optional, Tuple
+from aiohttp import web
+from src.config.bot_config import METRICS_HOST, METRICS_PORT
+from src.utils.metrics import REGISTRY, Snapshot
+import logging
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class MetricsServer:
+    """GET /metrics в текстовом формате Prometheus.
+
+    Слушает отдельный внутренний порт, чтобы метрики не были доступны снаружи
+    вместе с webhook. sources возвращает метрики воркеров при шардировании,
+    по умолчанию отдаются метрики только этого процесса.
+    """
+
+    def __init__(
+        self,
+        host: str = METRICS_HOST,
+        port: int = METRICS_PORT,
+        sources: Optional[Callable[[], List[Tuple[Dict[str, str], Snapshot]]]] = None
+    ):
+        self.host = host
+        self.port = port
+        self.sources = sources
+        self._runner: Optional[web.AppRunner] = None
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle_metrics)
+        return app
+
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        body = REGISTRY.render(self.sources() if self.sources else None)
+        return web.Response(body=body.encode(), headers={"Content-Type": CONTENT_TYPE})
+
+    async def start(self) -> None:
+        if not self.port or self._runner:
+            return
+        self._runner = web.AppRunner(self.create_app(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logging.info(f"Metrics available at http://{self.host}:{self.port}/metrics")
+
+    async def stop(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
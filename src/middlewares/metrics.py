@@ -0,0 +1,74 @@
+from typing import Any, Awaitable, Callable, Dict
+import time
+from aiogram import Bot, BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.dispatcher.event.bases import SkipHandler, CancelHandler
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import Response, TelegramType
+from aiogram.types import TelegramObject
+from src.utils.metrics import (
+    db_usage,
+    HANDLER_DURATION,
+    HANDLER_ERRORS,
+    HANDLER_DB_QUERIES,
+    HANDLER_DB_SECONDS,
+    TELEGRAM_REQUEST_DURATION,
+    TELEGRAM_REQUESTS
+)
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Inner-middleware: время, ошибки и SQL-запросы каждого обработчика.
+
+    Регистрируется на наблюдателях диспетчера и действует на обработчики всех
+    роутеров. Роутер в метках - имя модуля обработчика (admin, media, ...).
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        callback = data['handler'].callback
+        labels = (
+            callback.__module__.rsplit('.', 1)[-1],
+            getattr(callback, '__name__', type(callback).__name__)
+        )
+        usage = [0, 0.0]
+        token = db_usage.set(usage)
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except (SkipHandler, CancelHandler):
+            raise
+        except Exception:
+            HANDLER_ERRORS.labels(*labels).inc()
+            raise
+        finally:
+            HANDLER_DURATION.labels(*labels).observe(time.perf_counter() - started)
+            HANDLER_DB_QUERIES.labels(*labels).inc(usage[0])
+            HANDLER_DB_SECONDS.labels(*labels).inc(usage[1])
+            db_usage.reset(token)
+
+
+class TelegramMetricsMiddleware(BaseRequestMiddleware):
+    """Middleware сессии бота: число и время запросов к Bot API по методам"""
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType]
+    ) -> Response[TelegramType]:
+        name = method.__api_method__
+        result = 'ok'
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        except Exception as e:
+            result = type(e).__name__
+            raise
+        finally:
+            TELEGRAM_REQUEST_DURATION.labels(name).observe(time.perf_counter() - started)
+            TELEGRAM_REQUESTS.labels(name, result).inc()
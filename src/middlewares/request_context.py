@@ -0,0 +1,67 @@
+from typing import Callable, Dict, Any, Awaitable
+import time
+from aiogram import BaseMiddleware
+from aiogram.types import Update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from src.database.lazy_session import LazySession
+from src.services.user_service import UserService
+from src.config.bot_config import SLOW_UPDATE_MS
+from src.utils.metrics import UPDATE_DURATION
+from src.utils.logging_config import sample_debug
+import logging
+
+logger = logging.getLogger(__name__)
+
+class RequestContextMiddleware(BaseMiddleware):
+    """Единый контекст обработки апдейта.
+
+    Для любого типа апдейта создает одну ленивую сессию БД, один раз определяет
+    пользователя (через кэш), замеряет время обработки и решает, попадут ли
+    в лог отладочные записи апдейта.
+    """
+
+    def __init__(self, session_pool: async_sessionmaker[AsyncSession]):
+        self.session_pool = session_pool
+
+    async def __call__(
+        self,
+        handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any]
+    ) -> Any:
+        started = time.perf_counter()
+        sample_debug()
+        session = LazySession(self.session_pool)
+        data['session'] = session
+        
+        try:
+            from_user = data.get('event_from_user')
+            user = None
+            if from_user:
+                user = await UserService(session).get_cached_user(from_user.id)
+            
+            if user is None and (event.message or event.callback_query):
+                await self._deny_access(event)
+                return
+            
+            data['user'] = user
+            return await handler(event, data)
+        
+        finally:
+            await session.close()
+            elapsed = time.perf_counter() - started
+            UPDATE_DURATION.labels(event.event_type).observe(elapsed)
+            elapsed_ms = elapsed * 1000
+            log_level = logging.WARNING if elapsed_ms >= SLOW_UPDATE_MS else logging.DEBUG
+            logger.log(
+                log_level,
+                "Update %s (%s) handled in %.1f ms, db session %s",
+                event.update_id, event.event_type, elapsed_ms, 'used' if session.is_open else 'not used'
+            )
+
+    @staticmethod
+    async def _deny_access(event: Update) -> None:
+        if event.message:
+            await event.message.answer("У вас нет доступа к боту.")
+        else:
+            await event.callback_query.answer("У вас нет доступа к боту.", show_alert=True)
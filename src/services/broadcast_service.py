@@ -0,0 +1,179 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set
+from aiogram.exceptions import (
+    TelegramRetryAfter,
+    TelegramNetworkError,
+    TelegramForbiddenError,
+    TelegramBadRequest
+)
+from src.config.bot_config import (
+    BROADCAST_GLOBAL_RATE,
+    BROADCAST_PER_CHAT_RATE,
+    BROADCAST_CONCURRENCY,
+    BROADCAST_MAX_RETRIES
+)
+import logging
+
+
+class TokenBucket:
+    """Ограничитель частоты отправки по алгоритму token bucket"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """Ждет, пока в корзине появится токен, и забирает его"""
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        """Блокирует выдачу токенов на указанное время (используется при RetryAfter)"""
+        self._refill()
+        self._tokens = min(self._tokens, 0) - seconds * self.rate
+
+    @property
+    def idle_since(self) -> float:
+        return self._updated
+
+
+@dataclass
+class BroadcastResult:
+    chat_id: int
+    ok: bool
+    error: Optional[str] = None
+    attempts: int = 1
+    permanent: bool = False  # Ошибка не исправится повтором (бот заблокирован, неверный запрос)
+
+
+@dataclass
+class BroadcastReport:
+    results: List[BroadcastResult] = field(default_factory=list)
+
+    @property
+    def total(self) -> int:
+        return len(self.results)
+
+    @property
+    def delivered(self) -> int:
+        return sum(1 for result in self.results if result.ok)
+
+    @property
+    def failed(self) -> List[BroadcastResult]:
+        return [result for result in self.results if not result.ok]
+
+
+SendFunc = Callable[[int], Awaitable[object]]
+DoneCallback = Callable[[BroadcastReport], Awaitable[None]]
+
+
+class Broadcaster:
+    """Параллельная рассылка с учетом глобального лимита Telegram и лимита на отдельный чат"""
+
+    # Корзины отдельных чатов, не использовавшиеся дольше этого времени, удаляются
+    CHAT_BUCKET_TTL = 60.0
+
+    def __init__(
+        self,
+        global_rate: float = BROADCAST_GLOBAL_RATE,
+        per_chat_rate: float = BROADCAST_PER_CHAT_RATE,
+        concurrency: int = BROADCAST_CONCURRENCY,
+        max_retries: int = BROADCAST_MAX_RETRIES
+    ):
+        self.per_chat_rate = per_chat_rate
+        self.max_retries = max_retries
+        self._global_bucket = TokenBucket(global_rate)
+        self._chat_buckets: Dict[int, TokenBucket] = {}
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._background: Set[asyncio.Task] = set()
+
+    def _get_chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            self._prune_chat_buckets()
+            bucket = TokenBucket(self.per_chat_rate, capacity=1.0)
+            self._chat_buckets[chat_id] = bucket
+        return bucket
+
+    def _prune_chat_buckets(self) -> None:
+        threshold = time.monotonic() - self.CHAT_BUCKET_TTL
+        stale = [chat_id for chat_id, bucket in self._chat_buckets.items() if bucket.idle_since < threshold]
+        for chat_id in stale:
+            del self._chat_buckets[chat_id]
+
+    async def send(self, chat_id: int, send: SendFunc) -> BroadcastResult:
+        """Отправляет одно сообщение с соблюдением лимитов и повторами при RetryAfter"""
+        attempts = 0
+        async with self._semaphore:
+            while True:
+                attempts += 1
+                await self._get_chat_bucket(chat_id).acquire()
+                await self._global_bucket.acquire()
+                try:
+                    await send(chat_id)
+                    return BroadcastResult(chat_id=chat_id, ok=True, attempts=attempts)
+                except TelegramRetryAfter as e:
+                    if attempts > self.max_retries:
+                        return BroadcastResult(chat_id=chat_id, ok=False, error=str(e), attempts=attempts)
+                    logging.warning(f"Flood control при отправке в чат {chat_id}, ждем {e.retry_after} сек")
+                    # Лимит в Telegram общий для бота, поэтому притормаживаем всю рассылку
+                    self._global_bucket.pause(e.retry_after)
+                except TelegramNetworkError as e:
+                    if attempts > self.max_retries:
+                        return BroadcastResult(chat_id=chat_id, ok=False, error=str(e), attempts=attempts)
+                    await asyncio.sleep(2 ** attempts)
+                except (TelegramForbiddenError, TelegramBadRequest) as e:
+                    return BroadcastResult(chat_id=chat_id, ok=False, error=str(e), attempts=attempts, permanent=True)
+                except Exception as e:
+                    return BroadcastResult(chat_id=chat_id, ok=False, error=str(e), attempts=attempts)
+
+    async def broadcast(self, chat_ids: Iterable[int], send: SendFunc) -> BroadcastReport:
+        """Рассылает сообщение всем получателям и возвращает отчет по каждому"""
+        unique_ids = list(dict.fromkeys(chat_ids))
+        results = await asyncio.gather(*(self.send(chat_id, send) for chat_id in unique_ids))
+        report = BroadcastReport(results=list(results))
+        logging.info(f"Рассылка завершена: доставлено {report.delivered} из {report.total}")
+        return report
+
+    def start(
+        self,
+        chat_ids: Iterable[int],
+        send: SendFunc,
+        on_done: Optional[DoneCallback] = None
+    ) -> asyncio.Task:
+        """Запускает рассылку в фоне, не блокируя обработчик"""
+        chat_ids = list(chat_ids)
+
+        async def run() -> BroadcastReport:
+            report = await self.broadcast(chat_ids, send)
+            if on_done is not None:
+                try:
+                    await on_done(report)
+                except Exception as e:
+                    logging.error(f"Ошибка при отправке отчета о рассылке: {e}", exc_info=True)
+            return report
+
+        task = asyncio.create_task(run())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+
+    async def close(self) -> None:
+        """Дожидается завершения фоновых рассылок при остановке бота"""
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
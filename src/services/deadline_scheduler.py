@@ -0,0 +1,236 @@
+import asyncio
+import heapq
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import select, update, or_
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from src.database.models import Task, TaskAssignment, User
+from src.database.models.task import TaskStatus
+from src.services.notification_service import NotificationService
+from src.config.bot_config import DEADLINE_REMINDER_MINUTES, DEADLINE_RESYNC_INTERVAL
+import logging
+
+
+@dataclass(order=True)
+class _Event:
+    when: datetime
+    task_id: int = field(compare=False)
+    deadline: datetime = field(compare=False)
+    # За сколько минут до дедлайна напомнить; None - срок истек
+    offset: Optional[int] = field(compare=False, default=None)
+
+
+def _chunks(items: List[int], size: int) -> Iterable[List[int]]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _format_offset(minutes: int) -> str:
+    if minutes % 60 == 0:
+        return f"{minutes // 60} ч"
+    return f"{minutes} мин"
+
+
+class DeadlineScheduler:
+    """Истечение сроков заданий и напоминания о дедлайнах.
+
+    Ближайшие события (напоминания за reminder_offsets минут до дедлайна и сам
+    дедлайн) лежат в куче, планировщик спит до ближайшего из них. Все события,
+    наступившие одновременно, обрабатываются вместе: просроченные задания
+    помечаются одним UPDATE, напоминания пишутся в outbox одной транзакцией.
+    Расписание строится из БД при запуске, новые и измененные задания
+    подхватываются раз в resync_interval секунд (с перекрытием в один интервал,
+    повторно прочитанные задания schedule() пропускает). Обновления в БД условные
+    (по статусу и last_reminder_offset), поэтому повторный запуск или второй
+    экземпляр бота не приводят к повторным напоминаниям.
+    """
+
+    ACTIVE_STATUSES = (TaskStatus.NEW, TaskStatus.IN_PROGRESS)
+    # Ограничение на число параметров в одном IN (...) для SQLite
+    CHUNK_SIZE = 500
+    # Пауза перед повтором после ошибки БД, сек
+    RETRY_DELAY = 5
+
+    def __init__(
+        self,
+        session_pool: async_sessionmaker[AsyncSession],
+        reminder_offsets: List[int] = DEADLINE_REMINDER_MINUTES,
+        resync_interval: float = DEADLINE_RESYNC_INTERVAL
+    ):
+        self.session_pool = session_pool
+        self.reminder_offsets = sorted(reminder_offsets, reverse=True)
+        self.resync_interval = resync_interval
+        self._events: List[_Event] = []
+        # Дедлайн, под который построены события задания; события со старым дедлайном пропускаются
+        self._deadlines: Dict[int, datetime] = {}
+        self._watermark: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logging.info(f"Deadline scheduler started, reminders at {self.reminder_offsets} minutes")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def schedule(self, task_id: int, deadline: datetime, last_reminder_offset: Optional[int] = None) -> None:
+        """Добавляет события задания в расписание"""
+        if self._deadlines.get(task_id) == deadline:
+            return
+        self._deadlines[task_id] = deadline
+        heapq.heappush(self._events, _Event(deadline, task_id, deadline))
+        for offset in self.reminder_offsets:
+            if last_reminder_offset is None or offset < last_reminder_offset:
+                heapq.heappush(self._events, _Event(deadline - timedelta(minutes=offset), task_id, deadline, offset))
+
+    async def _run(self) -> None:
+        next_resync = 0.0
+        loop = asyncio.get_running_loop()
+        while True:
+            failed = False
+            try:
+                if loop.time() >= next_resync:
+                    await self._resync()
+                    next_resync = loop.time() + self.resync_interval
+
+                due = self._pop_due(datetime.now())
+                if due:
+                    try:
+                        await self._fire(due)
+                    except Exception:
+                        # Возвращаем события в расписание, чтобы повторить их позже
+                        for event in due:
+                            heapq.heappush(self._events, event)
+                        raise
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Error in deadline scheduler: {e}", exc_info=True)
+                failed = True
+
+            delay = next_resync - loop.time()
+            if self._events:
+                delay = min(delay, (self._events[0].when - datetime.now()).total_seconds())
+            await asyncio.sleep(max(delay, self.RETRY_DELAY if failed else 0.1))
+
+    async def _resync(self) -> None:
+        """Подхватывает активные задания, созданные или измененные с прошлой синхронизации"""
+        query = select(Task.id, Task.deadline, Task.last_reminder_offset, Task.updated_at).where(
+            Task.status.in_(self.ACTIVE_STATUSES)
+        )
+        if self._watermark is not None:
+            # updated_at ставится до коммита: задание, закоммиченное после прошлой синхронизации,
+            # может иметь updated_at раньше watermark, поэтому берем с запасом в один интервал
+            query = query.where(Task.updated_at >= self._watermark - timedelta(seconds=self.resync_interval))
+        async with self.session_pool() as session:
+            rows = (await session.execute(query)).all()
+
+        for row in rows:
+            self.schedule(row.id, row.deadline, row.last_reminder_offset)
+            if row.updated_at and (self._watermark is None or row.updated_at > self._watermark):
+                self._watermark = row.updated_at
+        if self._watermark is None:
+            self._watermark = datetime.now()
+
+    def _pop_due(self, now: datetime) -> List[_Event]:
+        due = []
+        while self._events and self._events[0].when <= now:
+            event = heapq.heappop(self._events)
+            if self._deadlines.get(event.task_id) == event.deadline:
+                due.append(event)
+        return due
+
+    async def _fire(self, events: List[_Event]) -> None:
+        now = datetime.now()
+        expired = {event.task_id for event in events if event.offset is None}
+        # Если пропущено несколько напоминаний (например, бот был выключен), отправляем только последнее
+        reminders: Dict[int, int] = {}
+        for event in events:
+            if event.offset is not None and event.task_id not in expired:
+                reminders[event.task_id] = min(event.offset, reminders.get(event.task_id, event.offset))
+
+        async with self.session_pool() as session:
+            if expired:
+                updated = 0
+                for chunk in _chunks(sorted(expired), self.CHUNK_SIZE):
+                    result = await session.execute(
+                        update(Task)
+                        .where(
+                            Task.id.in_(chunk),
+                            Task.status.in_(self.ACTIVE_STATUSES),
+                            Task.deadline <= now
+                        )
+                        .values(status=TaskStatus.EXPIRED)
+                    )
+                    updated += result.rowcount
+                logging.info(f"Expired {updated} tasks")
+
+            by_offset: Dict[int, List[int]] = {}
+            for task_id, offset in reminders.items():
+                by_offset.setdefault(offset, []).append(task_id)
+            for offset, task_ids in by_offset.items():
+                await self._send_reminders(session, sorted(task_ids), offset, now)
+
+            await session.commit()
+
+        for task_id in expired:
+            self._deadlines.pop(task_id, None)
+
+    async def _send_reminders(self, session: AsyncSession, task_ids: List[int], offset: int, now: datetime) -> None:
+        claimed = []
+        for chunk in _chunks(task_ids, self.CHUNK_SIZE):
+            # Отмечаем напоминание до отправки: задания, которые уже отметил другой
+            # экземпляр, в RETURNING не попадут
+            result = await session.execute(
+                update(Task)
+                .where(
+                    Task.id.in_(chunk),
+                    Task.status.in_(self.ACTIVE_STATUSES),
+                    Task.deadline > now,
+                    or_(Task.last_reminder_offset.is_(None), Task.last_reminder_offset > offset)
+                )
+                # Напоминание не меняет данные отчета, updated_at оставляем прежним
+                .values(last_reminder_offset=offset, updated_at=Task.updated_at)
+                .returning(Task.id)
+            )
+            claimed.extend(result.scalars().all())
+        if not claimed:
+            return
+
+        recipients: Dict[int, List[int]] = {}
+        tasks: Dict[int, tuple] = {}
+        for chunk in _chunks(claimed, self.CHUNK_SIZE):
+            rows = await session.execute(
+                select(Task.id, Task.deadline, Task.press_release_link, User.telegram_id)
+                .join(TaskAssignment, TaskAssignment.task_id == Task.id)
+                .join(User, User.media_outlet == TaskAssignment.media_outlet)
+                .where(
+                    Task.id.in_(chunk),
+                    TaskAssignment.status != 'completed'
+                )
+            )
+            for row in rows:
+                tasks[row.id] = (row.deadline, row.press_release_link)
+                recipients.setdefault(row.id, []).append(row.telegram_id)
+
+        notification_service = NotificationService(session)
+        sent = 0
+        for task_id, chat_ids in recipients.items():
+            deadline, link = tasks[task_id]
+            # Напоминание могло запоздать (задание создано позже, бот был выключен), пишем фактический остаток
+            remaining = max(round((deadline - now).total_seconds() / 60), 1)
+            sent += len(notification_service.enqueue_many(
+                chat_ids,
+                text=(
+                    f"⏰ До дедлайна задания #{task_id} осталось {_format_offset(remaining)}\n"
+                    f"Пресс-релиз: {link}\n"
+                    f"Дедлайн: {deadline.strftime('%d.%m.%Y %H:%M')}"
+                )
+            ))
+        logging.info(f"Queued {sent} deadline reminders ({_format_offset(offset)}) for {len(recipients)} tasks")
@@ -1,6 +1,9 @@
+import asyncio
 import pandas as pd
-from typing import List
+from collections import defaultdict
+from typing import AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 from datetime import datetime
+from openpyxl import Workbook, load_workbook
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload, joinedload
@@ -8,7 +11,88 @@ from src.database.models import Task, Submission, User, TaskAssignment
 from src.database.models.task import TaskStatus, SubmissionStatus
 import logging
 
+logger = logging.getLogger(__name__)
+
+
+def _append_rows(sheet, rows: List[list]) -> None:
+    for row in rows:
+        sheet.append(row)
+
+
+def _previous_rows(workbook, title: str, columns: List[str]) -> Iterator[tuple]:
+    """Строки листа предыдущего отчета без заголовка (пусто, если лист - заглушка)"""
+    if title not in workbook.sheetnames:
+        return iter(())
+    rows = workbook[title].iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None or list(header[:len(columns)]) != columns:
+        return iter(())
+    return rows
+
+
+def _merge_report(
+    filename: str,
+    previous_filename: str,
+    sheets: List[tuple],
+    previous_task_ids: List[int],
+    task_ids: List[int],
+    changed_task_ids: Set[int],
+    fresh_rows: Dict[str, Dict[int, List[list]]]
+) -> None:
+    """Собирает новый отчет из свежих строк измененных заданий и строк предыдущего файла.
+
+    Порядок заданий в отчете не меняется со временем (по дате создания), поэтому
+    строки неизмененных заданий идут в старом файле в том же относительном порядке
+    и их можно копировать одним проходом по каждому листу.
+    """
+    previous_position = {task_id: position for position, task_id in enumerate(previous_task_ids)}
+    previous = load_workbook(previous_filename, read_only=True)
+    try:
+        workbook = Workbook(write_only=True)
+        for title, columns, empty_rows in sheets:
+            sheet = workbook.create_sheet(title)
+            old_rows = _previous_rows(previous, title, columns)
+            pending = next(old_rows, None)
+            has_rows = False
+
+            for task_id in task_ids:
+                if task_id in changed_task_ids:
+                    rows = fresh_rows[title].get(task_id, [])
+                else:
+                    rows = []
+                    position = previous_position[task_id]
+                    # Пропускаем строки удаленных и измененных заданий
+                    while pending is not None and previous_position.get(pending[0], -1) < position:
+                        pending = next(old_rows, None)
+                    while pending is not None and pending[0] == task_id:
+                        rows.append(pending)
+                        pending = next(old_rows, None)
+
+                if rows and not has_rows:
+                    sheet.append(columns)
+                    has_rows = True
+                for row in rows:
+                    sheet.append(row)
+
+            if not has_rows and empty_rows:
+                _append_rows(sheet, empty_rows)
+
+        workbook.save(filename)
+    finally:
+        previous.close()
+
+
 class ExportService:
+    # Колонки листов общего отчета
+    TASK_COLUMNS = ['ID задания', 'Пресс-релиз', 'Дедлайн', 'Статус', 'Дата создания']
+    ASSIGNMENT_COLUMNS = ['ID задания', 'СМИ', 'ID пользователя', 'Имя пользователя', 'Статус выполнения', 'Дата назначения']
+    SUBMISSION_COLUMNS = [
+        'ID задания', 'ID публикации', 'СМИ', 'Статус публикации', 'Дата отправки',
+        'Текст', 'Комментарий к доработке', 'Ссылка на публикацию'
+    ]
+    # Сколько строк за раз читаем из БД и передаем в поток записи
+    STREAM_BATCH_SIZE = 1000
+
     def __init__(self, session: AsyncSession):
         self.session = session
 
@@ -101,109 +185,253 @@ class ExportService:
                 else:
                     submissions_df.to_excel(writer, sheet_name='Публикации', index=False)
             
-            logging.info(f"Report created: {filename}")
-            logging.info(f"Task info: {task_info.to_dict()}")
-            logging.info(f"Submissions data: {submissions_data}")
+            logger.info(f"Report created: {filename}")
+            # Полные данные отчета выводятся только при включенной отладке модуля
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Task info: %s", task_info.to_dict())
+                logger.debug("Submissions data: %s", submissions_data)
             
             return filename
             
         except Exception as e:
-            logging.error(f"Error creating report: {e}", exc_info=True)
+            logger.error(f"Error creating report: {e}", exc_info=True)
             raise
 
-    async def export_all_tasks_report(self) -> str:
-        try:
-            # Получаем все задания
-            tasks_result = await self.session.execute(
-                select(Task).order_by(Task.created_at.desc())
+    def _all_tasks_query(self, task_ids: Optional[Iterable[int]] = None):
+        query = (
+            select(
+                Task.id,
+                Task.press_release_link,
+                Task.deadline,
+                Task.status,
+                Task.created_at
             )
-            tasks = tasks_result.scalars().all()
-            
-            all_submissions_data = []
-            all_assignments_data = []
-            all_tasks_data = []
-            
-            for task in tasks:
-                # Добавляем информацию о задании
-                all_tasks_data.append({
-                    'ID задания': task.id,
-                    'Пресс-релиз': task.press_release_link,
-                    'Дедлайн': task.deadline.strftime('%d.%m.%Y %H:%M'),
-                    'Статус': self._get_readable_task_status(task.status),
-                    'Дата создания': task.created_at.strftime('%d.%m.%Y %H:%M')
-                })
-                
-                # Получаем назначения для задания с информацией о пользователе
-                assignments_result = await self.session.execute(
-                    select(TaskAssignment, User)
-                    .select_from(TaskAssignment)
-                    .join(
-                        Submission,
-                        (Submission.task_id == TaskAssignment.task_id) &
-                        (Submission.user_id == User.id)
-                    )
-                    .join(
-                        User,
-                        User.media_outlet == TaskAssignment.media_outlet
-                    )
-                    .where(TaskAssignment.task_id == task.id)
-                    .group_by(TaskAssignment.id, User.id)
-                )
-                assignments = assignments_result.all()
-                
-                for assignment, user in assignments:
-                    all_assignments_data.append({
-                        'ID задания': task.id,
-                        'СМИ': assignment.media_outlet,
-                        'ID пользователя': user.telegram_id,
-                        'Имя пользователя': user.username,
-                        'Статус выполнения': '✅ Завершено' if assignment.status == 'completed' else '🔄 В работе',
-                        'Дата назначения': assignment.assigned_at.strftime('%d.%m.%Y %H:%M')
-                    })
-                
-                # Получаем публикации для задания
-                submissions_result = await self.session.execute(
-                    select(Submission)
-                    .options(joinedload(Submission.user))
-                    .where(Submission.task_id == task.id)
+            .order_by(Task.created_at.desc(), Task.id)
+        )
+        return self._filter_tasks(query, task_ids)
+
+    def _all_assignments_query(self, task_ids: Optional[Iterable[int]] = None):
+        # Назначения с пользователями СМИ, которые отправляли публикации по заданию
+        query = (
+            select(
+                TaskAssignment.task_id,
+                TaskAssignment.media_outlet,
+                TaskAssignment.status,
+                TaskAssignment.assigned_at,
+                User.telegram_id,
+                User.username
+            )
+            .select_from(TaskAssignment)
+            .join(Task, Task.id == TaskAssignment.task_id)
+            .join(User, User.media_outlet == TaskAssignment.media_outlet)
+            .where(
+                select(Submission.id)
+                .where(
+                    Submission.task_id == TaskAssignment.task_id,
+                    Submission.user_id == User.id
                 )
-                submissions = submissions_result.scalars().all()
-                
-                for submission in submissions:
-                    all_submissions_data.append({
-                        'ID задания': task.id,
-                        'ID публикации': submission.id,
-                        'СМИ': submission.user.media_outlet,
-                        'Статус публикации': self._get_readable_submission_status(submission.status),
-                        'Дата отправки': submission.submitted_at.strftime('%d.%m.%Y %H:%M'),
-                        'Текст': submission.content,
-                        'Комментарий к доработке': submission.revision_comment or '',
-                        'Ссылка на публикацию': submission.published_link or ''
-                    })
-            
-            # Создаем DataFrame для каждого типа данных
-            tasks_df = pd.DataFrame(all_tasks_data)
-            assignments_df = pd.DataFrame(all_assignments_data)
-            submissions_df = pd.DataFrame(all_submissions_data)
-            
+                .exists()
+            )
+            .order_by(Task.created_at.desc(), Task.id, TaskAssignment.id, User.id)
+        )
+        return self._filter_tasks(query, task_ids)
+
+    def _all_submissions_query(self, task_ids: Optional[Iterable[int]] = None):
+        # Публикации вместе с названием СМИ автора
+        query = (
+            select(
+                Submission.id,
+                Submission.task_id,
+                Submission.status,
+                Submission.submitted_at,
+                Submission.content,
+                Submission.revision_comment,
+                Submission.published_link,
+                User.media_outlet
+            )
+            .select_from(Submission)
+            .join(Task, Task.id == Submission.task_id)
+            .outerjoin(User, User.id == Submission.user_id)
+            .order_by(Task.created_at.desc(), Task.id, Submission.id)
+        )
+        return self._filter_tasks(query, task_ids)
+
+    def _filter_tasks(self, query, task_ids: Optional[Iterable[int]]):
+        if task_ids is None:
+            return query
+        return query.where(Task.id.in_(list(task_ids)))
+
+    def _report_sheets(self) -> list:
+        """Листы общего отчета: название, колонки, запрос, сборка строки, заглушка для пустого листа"""
+        return [
+            ('Задания', self.TASK_COLUMNS, self._all_tasks_query, self._task_row, None),
+            ('Назначения', self.ASSIGNMENT_COLUMNS, self._all_assignments_query, self._assignment_row, None),
+            ('Публикации', self.SUBMISSION_COLUMNS, self._all_submissions_query, self._submission_row,
+             [['Статус'], ['Нет публикаций']]),
+        ]
+
+    def _task_row(self, task) -> list:
+        return [
+            task.id,
+            task.press_release_link,
+            task.deadline.strftime('%d.%m.%Y %H:%M'),
+            self._get_readable_task_status(task.status),
+            task.created_at.strftime('%d.%m.%Y %H:%M')
+        ]
+
+    def _assignment_row(self, assignment) -> list:
+        return [
+            assignment.task_id,
+            assignment.media_outlet,
+            assignment.telegram_id,
+            assignment.username,
+            '✅ Завершено' if assignment.status == 'completed' else '🔄 В работе',
+            assignment.assigned_at.strftime('%d.%m.%Y %H:%M')
+        ]
+
+    def _submission_row(self, submission) -> list:
+        return [
+            submission.task_id,
+            submission.id,
+            submission.media_outlet,
+            self._get_readable_submission_status(submission.status),
+            submission.submitted_at.strftime('%d.%m.%Y %H:%M'),
+            submission.content,
+            submission.revision_comment or '',
+            submission.published_link or ''
+        ]
+
+    async def collect_all_tasks_data(self) -> Tuple[List[dict], List[dict], List[dict]]:
+        """Собирает строки общего отчета тремя запросами вне зависимости от числа заданий"""
+        tasks = (await self.session.execute(self._all_tasks_query())).all()
+        assignments = (await self.session.execute(self._all_assignments_query())).all()
+        submissions = (await self.session.execute(self._all_submissions_query())).all()
+
+        all_tasks_data = [dict(zip(self.TASK_COLUMNS, self._task_row(row))) for row in tasks]
+        all_assignments_data = [dict(zip(self.ASSIGNMENT_COLUMNS, self._assignment_row(row))) for row in assignments]
+        all_submissions_data = [dict(zip(self.SUBMISSION_COLUMNS, self._submission_row(row))) for row in submissions]
+
+        return all_tasks_data, all_assignments_data, all_submissions_data
+
+    async def _stream_rows(self, query, build_row: Callable) -> AsyncIterator[list]:
+        """Читает результат запроса порциями через серверный курсор"""
+        result = await self.session.stream(query.execution_options(yield_per=self.STREAM_BATCH_SIZE))
+        async for partition in result.partitions():
+            yield [build_row(row) for row in partition]
+
+    async def _write_all_tasks_report_streaming(self, filename: str) -> None:
+        """Пишет отчет постранично в write-only книгу openpyxl.
+
+        Чтение из БД идет в event loop, а запись каждой порции и сохранение файла
+        выполняются в отдельном потоке, поэтому в памяти держится только одна
+        порция строк и бот продолжает обрабатывать апдейты.
+        """
+        workbook = Workbook(write_only=True)
+
+        for title, columns, build_query, build_row, empty_rows in self._report_sheets():
+            sheet = workbook.create_sheet(title)
+            has_rows = False
+            async for rows in self._stream_rows(build_query(), build_row):
+                if not has_rows:
+                    rows.insert(0, columns)
+                    has_rows = True
+                await asyncio.to_thread(_append_rows, sheet, rows)
+            if not has_rows and empty_rows:
+                await asyncio.to_thread(_append_rows, sheet, empty_rows)
+
+        await asyncio.to_thread(workbook.save, filename)
+
+    def _write_all_tasks_report_in_memory(
+        self,
+        filename: str,
+        all_tasks_data: List[dict],
+        all_assignments_data: List[dict],
+        all_submissions_data: List[dict]
+    ) -> None:
+        # Создаем DataFrame для каждого типа данных
+        tasks_df = pd.DataFrame(all_tasks_data)
+        assignments_df = pd.DataFrame(all_assignments_data)
+        submissions_df = pd.DataFrame(all_submissions_data)
+
+        # Создаем Excel writer
+        with pd.ExcelWriter(filename, engine='openpyxl') as writer:
+            tasks_df.to_excel(writer, sheet_name='Задания', index=False)
+            assignments_df.to_excel(writer, sheet_name='Назначения', index=False)
+            if not all_submissions_data:
+                pd.DataFrame({'Статус': ['Нет публикаций']}).to_excel(writer, sheet_name='Публикации', index=False)
+            else:
+                submissions_df.to_excel(writer, sheet_name='Публикации', index=False)
+
+    async def export_all_tasks_report(self, streaming: bool = True, filename: Optional[str] = None) -> str:
+        """Формирует общий отчет по всем заданиям.
+
+        По умолчанию отчет пишется потоково (см. _write_all_tasks_report_streaming).
+        streaming=False собирает все данные в памяти и пишет их через pandas.
+        """
+        try:
             # Формируем имя файла
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"all_tasks_report_{timestamp}.xlsx"
-            
-            # Создаем Excel writer
-            with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-                tasks_df.to_excel(writer, sheet_name='Задания', index=False)
-                assignments_df.to_excel(writer, sheet_name='Назначения', index=False)
-                if not all_submissions_data:
-                    pd.DataFrame({'Статус': ['Нет публикаций']}).to_excel(writer, sheet_name='Публикации', index=False)
-                else:
-                    submissions_df.to_excel(writer, sheet_name='Публикации', index=False)
+            if filename is None:
+                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+                filename = f"all_tasks_report_{timestamp}.xlsx"
+
+            if streaming:
+                await self._write_all_tasks_report_streaming(filename)
+            else:
+                data = await self.collect_all_tasks_data()
+                await asyncio.to_thread(self._write_all_tasks_report_in_memory, filename, *data)
             
-            logging.info(f"Report created: {filename}")
+            logger.info(f"Report created: {filename}")
             return filename
             
         except Exception as e:
-            logging.error(f"Error creating report: {e}", exc_info=True)
+            logger.error(f"Error creating report: {e}", exc_info=True)
+            raise
+
+    async def rebuild_all_tasks_report(
+        self,
+        filename: str,
+        previous_filename: str,
+        previous_task_ids: List[int],
+        task_ids: List[int],
+        changed_task_ids: Set[int]
+    ) -> str:
+        """Пересобирает общий отчет, перечитывая из БД только измененные задания.
+
+        Строки остальных заданий копируются из предыдущего файла отчета.
+        task_ids - текущий порядок заданий в отчете, previous_task_ids - порядок
+        в previous_filename.
+        """
+        try:
+            fresh_rows: Dict[str, Dict[int, List[list]]] = {}
+            sheets = []
+            for title, columns, build_query, build_row, empty_rows in self._report_sheets():
+                rows_by_task = defaultdict(list)
+                changed = list(changed_task_ids)
+                for i in range(0, len(changed), self.STREAM_BATCH_SIZE):
+                    result = await self.session.execute(build_query(changed[i:i + self.STREAM_BATCH_SIZE]))
+                    for row in result:
+                        values = build_row(row)
+                        # Первая колонка каждого листа - ID задания
+                        rows_by_task[values[0]].append(values)
+                fresh_rows[title] = rows_by_task
+                sheets.append((title, columns, empty_rows))
+
+            await asyncio.to_thread(
+                _merge_report,
+                filename,
+                previous_filename,
+                sheets,
+                previous_task_ids,
+                task_ids,
+                changed_task_ids,
+                fresh_rows
+            )
+
+            logger.info(f"Report rebuilt: {filename} ({len(changed_task_ids)} of {len(task_ids)} tasks changed)")
+            return filename
+
+        except Exception as e:
+            logger.error(f"Error rebuilding report: {e}", exc_info=True)
             raise
 
     async def export_submissions_to_excel(self, task_id: int) -> str:
@@ -242,5 +470,5 @@ class ExportService:
             return filename
 
         except Exception as e:
-            logging.error(f"Error exporting submissions to Excel: {e}")
+            logger.error(f"Error exporting submissions to Excel: {e}")
             raise
\ No newline at end of file
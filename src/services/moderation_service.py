@@ -0,0 +1,117 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.database.models import Submission
+from src.services.submission_service import SubmissionService, moderation_page_cache
+import logging
+
+CURSOR_DATE_FORMAT = '%Y%m%d%H%M%S%f'
+
+# Максимальная длина подписи к фото и текста сообщения
+CAPTION_LIMIT = 850
+TEXT_LIMIT = 4000
+
+
+def encode_cursor(submission: Submission) -> str:
+    """Ключ публикации для callback_data: дата отправки и ID"""
+    return f"{submission.submitted_at.strftime(CURSOR_DATE_FORMAT)}_{submission.id}"
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    submitted_at, submission_id = cursor.split('_')
+    return datetime.strptime(submitted_at, CURSOR_DATE_FORMAT), int(submission_id)
+
+
+@dataclass
+class ModerationPage:
+    """Одна страница очереди модерации: публикация и ключи соседних страниц"""
+    submission_id: int
+    version: int
+    text: str
+    photo: Optional[str]
+    cursor: str
+    has_prev: bool
+    has_next: bool
+
+
+class ModerationService:
+    """Постраничный просмотр публикаций на модерации.
+
+    Каждая страница - одна публикация, соседние выбираются по ключу
+    (submitted_at, id), поэтому стоимость страницы не зависит от размера очереди.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self.submission_service = SubmissionService(session)
+
+    async def get_page(
+        self,
+        admin_id: int,
+        is_superadmin: bool,
+        cursor: Optional[str] = None,
+        backward: bool = False
+    ) -> Optional[ModerationPage]:
+        """Возвращает публикацию после (или перед, если backward) cursor; без cursor - самую новую"""
+        cache_key = (None if is_superadmin else admin_id, cursor, backward)
+        found, page = moderation_page_cache.lookup(cache_key)
+        if found:
+            return page
+
+        after = decode_cursor(cursor) if cursor else None
+        submissions = await self._fetch(admin_id, is_superadmin, after, backward, limit=2)
+
+        # Если соседних публикаций в эту сторону не осталось (например, их уже
+        # промодерировали), показываем ближайшую с другой стороны
+        if not submissions and after is not None:
+            backward = not backward
+            submissions = await self._fetch(admin_id, is_superadmin, after, backward, limit=2)
+
+        if not submissions:
+            page = None
+        else:
+            submission = submissions[0]
+            has_more = len(submissions) > 1
+            # Проверяем, есть ли публикации с другой стороны от текущей
+            has_other_side = bool(await self._fetch(
+                admin_id, is_superadmin, (submission.submitted_at, submission.id), not backward, limit=1
+            ))
+            page = ModerationPage(
+                submission_id=submission.id,
+                version=submission.version,
+                text=self._render(submission),
+                photo=submission.photo,
+                cursor=encode_cursor(submission),
+                has_prev=has_more if backward else has_other_side,
+                has_next=has_other_side if backward else has_more
+            )
+
+        if moderation_page_cache.ttl > 0:
+            moderation_page_cache.set(cache_key, page)
+        return page
+
+    async def _fetch(self, admin_id: int, is_superadmin: bool, after, backward: bool, limit: int):
+        return await self.submission_service.get_pending_submissions(
+            admin_id=admin_id,
+            is_superadmin=is_superadmin,
+            limit=limit,
+            after=after,
+            backward=backward
+        )
+
+    def _render(self, submission: Submission) -> str:
+        text = (
+            f"📨 Задание #{submission.task_id}\n"
+            f"От: {submission.user.media_outlet}\n"
+            f"ID пользователя: {submission.user.telegram_id}\n"
+            f"Имя пользователя: @{submission.user.username}\n"
+            f"Создатель задания: {submission.task.created_by}\n"
+            f"Текст задания:\n{submission.content}\n"
+            f"Дата отправки: {submission.submitted_at.strftime('%d.%m.%Y %H:%M')}"
+        )
+        limit = CAPTION_LIMIT if submission.photo else TEXT_LIMIT
+        if len(text) > limit:
+            text = text[:limit - 3] + "..."
+            logging.info(f"Обрезан текст для задания {submission.id} до {limit} символов")
+        return text
@@ -0,0 +1,114 @@
+import json
+from datetime import datetime
+from typing import Iterable, List, Optional, Union
+from sqlalchemy.ext.asyncio import AsyncSession
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, ReplyKeyboardMarkup
+from src.database.models import NotificationOutbox, Submission
+from src.database.models.notification import OutboxStatus
+from src.database.models.submission import SubmissionStatus
+from src.keyboards.media_kb import get_media_main_keyboard
+import logging
+
+Markup = Union[InlineKeyboardMarkup, ReplyKeyboardMarkup]
+
+
+def dump_markup(markup: Optional[Markup]) -> Optional[str]:
+    """Сериализует клавиатуру для хранения в outbox"""
+    if markup is None:
+        return None
+    return markup.model_dump_json(exclude_none=True)
+
+
+def load_markup(data: Optional[str]) -> Optional[Markup]:
+    """Восстанавливает клавиатуру из outbox"""
+    if not data:
+        return None
+    payload = json.loads(data)
+    if 'inline_keyboard' in payload:
+        return InlineKeyboardMarkup.model_validate(payload)
+    return ReplyKeyboardMarkup.model_validate(payload)
+
+
+class NotificationService:
+    """Запись уведомлений в outbox.
+
+    Методы только добавляют строки в сессию и не делают commit: уведомление
+    сохраняется в той же транзакции, что и изменение статуса, а доставку
+    выполняет OutboxDispatcher.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    def enqueue(
+        self,
+        chat_id: int,
+        text: Optional[str] = None,
+        photo: Optional[str] = None,
+        reply_markup: Optional[Markup] = None
+    ) -> NotificationOutbox:
+        now = datetime.now()
+        notification = NotificationOutbox(
+            chat_id=int(chat_id),
+            text=text,
+            photo=photo,
+            reply_markup=dump_markup(reply_markup),
+            status=OutboxStatus.PENDING,
+            attempts=0,
+            created_at=now,
+            next_attempt_at=now
+        )
+        self.session.add(notification)
+        return notification
+
+    def enqueue_many(
+        self,
+        chat_ids: Iterable[int],
+        text: Optional[str] = None,
+        photo: Optional[str] = None,
+        reply_markup: Optional[Markup] = None
+    ) -> List[NotificationOutbox]:
+        """Ставит одно и то же уведомление в очередь нескольким получателям (без дублей)"""
+        notifications = []
+        for chat_id in dict.fromkeys(int(chat_id) for chat_id in chat_ids if chat_id):
+            notifications.append(self.enqueue(chat_id, text=text, photo=photo, reply_markup=reply_markup))
+        return notifications
+
+    def enqueue_submission_status(self, submission: Submission) -> Optional[NotificationOutbox]:
+        """Ставит в очередь уведомление пользователю о новом статусе публикации"""
+        if not submission.user or not submission.user.telegram_id:
+            logging.error(f"No user or telegram_id found for submission {submission.id}")
+            return None
+
+        if submission.status == SubmissionStatus.TEXT_APPROVED.value:
+            # Если текст одобрен, отправляем сообщение с кнопкой для фото
+            return self.enqueue(
+                submission.user.telegram_id,
+                text=f"✅ Ваш текст для задания #{submission.task_id} одобрен!\nТеперь необходимо прикрепить фото к публикации.",
+                reply_markup=InlineKeyboardMarkup(inline_keyboard=[[
+                    InlineKeyboardButton(
+                        text="📎 Прикрепить фото",
+                        callback_data=f"attach_photo_{submission.id}"
+                    )
+                ]])
+            )
+        elif submission.status == SubmissionStatus.APPROVED.value:
+            # Если публикация полностью одобрена
+            return self.enqueue(
+                submission.user.telegram_id,
+                text=f"✅ Ваша публикация для задания #{submission.task_id} полностью одобрена!\nТеперь отправьте ссылку на опубликованный материал.",
+                reply_markup=InlineKeyboardMarkup(inline_keyboard=[[
+                    InlineKeyboardButton(
+                        text="🔗 Отправить ссылку",
+                        callback_data=f"send_link_{submission.id}"
+                    )
+                ]])
+            )
+        elif submission.status == SubmissionStatus.COMPLETED.value:
+            # Если публикация завершена
+            return self.enqueue(
+                submission.user.telegram_id,
+                text=f"✅ Ваша публикация для задания #{submission.task_id} успешно завершена! Спасибо за сотрудничество.",
+                reply_markup=get_media_main_keyboard()
+            )
+        return None
@@ -0,0 +1,203 @@
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List, Optional, Set
+from aiogram import Bot
+from sqlalchemy import select, update, delete
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from src.database.models import NotificationOutbox
+from src.database.models.notification import OutboxStatus
+from src.services.broadcast_service import Broadcaster
+from src.services.notification_service import load_markup
+from src.config.bot_config import (
+    OUTBOX_WORKERS,
+    OUTBOX_POLL_INTERVAL,
+    OUTBOX_BATCH_SIZE,
+    OUTBOX_MAX_ATTEMPTS,
+    OUTBOX_RETENTION_DAYS
+)
+import logging
+
+
+@dataclass
+class OutboxItem:
+    id: int
+    chat_id: int
+    text: Optional[str]
+    photo: Optional[str]
+    reply_markup: Optional[str]
+    attempts: int
+
+
+class OutboxDispatcher:
+    """Фоновая доставка уведомлений из таблицы notification_outbox.
+
+    Один опрашивающий цикл выбирает готовые к отправке строки и раскладывает их
+    по очередям воркеров по chat_id, поэтому сообщения в один чат уходят в том
+    порядке, в котором были записаны. Неудачные отправки повторяются с
+    экспоненциальной задержкой, после OUTBOX_MAX_ATTEMPTS строка помечается как dead.
+    """
+
+    # Максимальная задержка между повторными попытками, сек
+    MAX_BACKOFF = 300
+    # Как часто удалять старые доставленные уведомления, сек
+    CLEANUP_INTERVAL = 3600
+
+    def __init__(
+        self,
+        bot: Bot,
+        broadcaster: Broadcaster,
+        session_pool: async_sessionmaker[AsyncSession],
+        workers: int = OUTBOX_WORKERS,
+        poll_interval: float = OUTBOX_POLL_INTERVAL,
+        batch_size: int = OUTBOX_BATCH_SIZE,
+        max_attempts: int = OUTBOX_MAX_ATTEMPTS
+    ):
+        self.bot = bot
+        self.broadcaster = broadcaster
+        self.session_pool = session_pool
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self._queues: List[asyncio.Queue] = [asyncio.Queue() for _ in range(max(workers, 1))]
+        self._in_flight: Set[int] = set()
+        self._tasks: List[asyncio.Task] = []
+        self._last_cleanup = 0.0
+
+    def start(self) -> None:
+        """Запускает опрос outbox и воркеры доставки"""
+        if self._tasks:
+            return
+        self._tasks.append(asyncio.create_task(self._poll_loop()))
+        for queue in self._queues:
+            self._tasks.append(asyncio.create_task(self._worker(queue)))
+        logging.info(f"Outbox dispatcher started with {len(self._queues)} workers")
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Останавливает опрос и дает воркерам дослать уже выбранные уведомления.
+
+        Недоставленные строки остаются в статусе pending и будут отправлены
+        после следующего запуска.
+        """
+        if not self._tasks:
+            return
+        poller, workers = self._tasks[0], self._tasks[1:]
+        poller.cancel()
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(queue.join() for queue in self._queues)),
+                timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            logging.warning("Outbox dispatcher stopped with undelivered notifications in queue")
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _poll_loop(self) -> None:
+        while True:
+            try:
+                fetched = await self._fetch_due()
+                await self._cleanup_if_needed()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Error polling notification outbox: {e}", exc_info=True)
+                fetched = 0
+            # Если выбрали полный пакет, сразу идем за следующим
+            if fetched < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+    async def _fetch_due(self) -> int:
+        query = (
+            select(NotificationOutbox)
+            .where(
+                NotificationOutbox.status == OutboxStatus.PENDING,
+                NotificationOutbox.next_attempt_at <= datetime.now()
+            )
+            .order_by(NotificationOutbox.id)
+            .limit(self.batch_size + len(self._in_flight))
+        )
+        async with self.session_pool() as session:
+            rows = (await session.execute(query)).scalars().all()
+
+        fetched = 0
+        for row in rows:
+            if row.id in self._in_flight:
+                continue
+            self._in_flight.add(row.id)
+            item = OutboxItem(
+                id=row.id,
+                chat_id=row.chat_id,
+                text=row.text,
+                photo=row.photo,
+                reply_markup=row.reply_markup,
+                attempts=row.attempts
+            )
+            self._queues[item.chat_id % len(self._queues)].put_nowait(item)
+            fetched += 1
+            if fetched >= self.batch_size:
+                break
+        return fetched
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        while True:
+            item = await queue.get()
+            try:
+                await self._deliver(item)
+            except Exception as e:
+                logging.error(f"Error delivering outbox notification {item.id}: {e}", exc_info=True)
+            finally:
+                self._in_flight.discard(item.id)
+                queue.task_done()
+
+    async def _deliver(self, item: OutboxItem) -> None:
+        async def send(chat_id: int):
+            markup = load_markup(item.reply_markup)
+            if item.photo:
+                await self.bot.send_photo(chat_id, photo=item.photo, caption=item.text, reply_markup=markup)
+            else:
+                await self.bot.send_message(chat_id, item.text, reply_markup=markup)
+
+        result = await self.broadcaster.send(item.chat_id, send)
+        attempts = item.attempts + 1
+        now = datetime.now()
+
+        if result.ok:
+            values = dict(status=OutboxStatus.SENT, attempts=attempts, sent_at=now, last_error=None)
+        elif result.permanent or attempts >= self.max_attempts:
+            logging.error(f"Outbox notification {item.id} to {item.chat_id} moved to dead letters: {result.error}")
+            values = dict(status=OutboxStatus.DEAD, attempts=attempts, last_error=result.error)
+        else:
+            delay = min(2 ** attempts, self.MAX_BACKOFF)
+            logging.warning(f"Outbox notification {item.id} failed (attempt {attempts}), retry in {delay}s: {result.error}")
+            values = dict(
+                attempts=attempts,
+                last_error=result.error,
+                next_attempt_at=now + timedelta(seconds=delay)
+            )
+
+        async with self.session_pool() as session:
+            await session.execute(
+                update(NotificationOutbox)
+                .where(NotificationOutbox.id == item.id)
+                .values(**values)
+            )
+            await session.commit()
+
+    async def _cleanup_if_needed(self) -> None:
+        loop_time = asyncio.get_running_loop().time()
+        if loop_time - self._last_cleanup < self.CLEANUP_INTERVAL:
+            return
+        self._last_cleanup = loop_time
+        threshold = datetime.now() - timedelta(days=OUTBOX_RETENTION_DAYS)
+        async with self.session_pool() as session:
+            await session.execute(
+                delete(NotificationOutbox)
+                .where(
+                    NotificationOutbox.status == OutboxStatus.SENT,
+                    NotificationOutbox.sent_at < threshold
+                )
+            )
+            await session.commit()
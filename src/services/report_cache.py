@@ -0,0 +1,204 @@
+import asyncio
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.database.models import Task, Submission, User, TaskAssignment
+from src.services.export_service import ExportService
+from src.config.bot_config import REPORTS_DIR, REPORT_CACHE_MAX_MB, REPORT_REBUILD_RATIO
+import logging
+
+
+@dataclass
+class ReportArtifact:
+    path: str
+    watermark: str
+    file_id: Optional[str] = None
+
+
+@dataclass
+class _Snapshot:
+    """Версии данных, из которых строится общий отчет"""
+    task_ids: List[int]
+    versions: Dict[int, str]
+    users_version: str
+
+    @property
+    def watermark(self) -> str:
+        payload = json.dumps([self.users_version, [(task_id, self.versions[task_id]) for task_id in self.task_ids]])
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+
+class ReportCache:
+    """Кэш файла общего отчета по заданиям.
+
+    Отчет привязан к водяному знаку - хэшу версий всех заданий (updated_at задания,
+    его назначений и публикаций). Если данные не менялись, возвращается готовый файл
+    и его file_id в Telegram. Если изменилась часть заданий, из БД перечитываются
+    только они, а остальные строки копируются из предыдущего файла. Старые файлы
+    удаляются, когда их суммарный размер превышает REPORT_CACHE_MAX_MB.
+    """
+
+    MANIFEST_NAME = 'all_tasks_report.json'
+    FILE_PREFIX = 'all_tasks_report_'
+
+    def __init__(
+        self,
+        directory: Path = REPORTS_DIR,
+        max_size_mb: float = REPORT_CACHE_MAX_MB,
+        rebuild_ratio: float = REPORT_REBUILD_RATIO
+    ):
+        self.directory = Path(directory)
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.rebuild_ratio = rebuild_ratio
+        self._lock = asyncio.Lock()
+        self._manifest: Optional[dict] = None
+
+    async def get_all_tasks_report(self, session: AsyncSession) -> ReportArtifact:
+        """Возвращает актуальный общий отчет, пересобирая его только при изменении данных"""
+        async with self._lock:
+            manifest = self._load_manifest()
+            snapshot = await self._snapshot(session)
+            watermark = snapshot.watermark
+
+            if manifest and manifest['watermark'] == watermark and os.path.exists(manifest['path']):
+                logging.info(f"Report cache hit: {manifest['path']}")
+                return ReportArtifact(manifest['path'], watermark, manifest.get('file_id'))
+
+            self.directory.mkdir(parents=True, exist_ok=True)
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+            path = str(self.directory / f"{self.FILE_PREFIX}{timestamp}.xlsx")
+            export_service = ExportService(session)
+
+            changed_task_ids = self._changed_task_ids(manifest, snapshot)
+            if changed_task_ids is None:
+                await export_service.export_all_tasks_report(filename=path)
+            else:
+                await export_service.rebuild_all_tasks_report(
+                    filename=path,
+                    previous_filename=manifest['path'],
+                    previous_task_ids=manifest['task_ids'],
+                    task_ids=snapshot.task_ids,
+                    changed_task_ids=changed_task_ids
+                )
+
+            self._save_manifest({
+                'path': path,
+                'watermark': watermark,
+                'file_id': None,
+                'task_ids': snapshot.task_ids,
+                'versions': {str(task_id): version for task_id, version in snapshot.versions.items()},
+                'users_version': snapshot.users_version
+            })
+            await asyncio.to_thread(self._collect_garbage, path)
+            return ReportArtifact(path, watermark)
+
+    def remember_file_id(self, artifact: ReportArtifact, file_id: str) -> None:
+        """Запоминает file_id отправленного файла, чтобы не загружать его повторно"""
+        manifest = self._load_manifest()
+        if manifest and manifest['watermark'] == artifact.watermark:
+            manifest['file_id'] = file_id
+            self._save_manifest(manifest)
+
+    async def _snapshot(self, session: AsyncSession) -> _Snapshot:
+        tasks = (await session.execute(
+            select(Task.id, Task.updated_at).order_by(Task.created_at.desc(), Task.id)
+        )).all()
+        submissions = {
+            row.task_id: row
+            for row in await session.execute(
+                select(
+                    Submission.task_id,
+                    func.count(Submission.id).label('count'),
+                    func.max(Submission.updated_at).label('updated_at')
+                ).group_by(Submission.task_id)
+            )
+        }
+        assignments = {
+            row.task_id: row
+            for row in await session.execute(
+                select(
+                    TaskAssignment.task_id,
+                    func.count(TaskAssignment.id).label('count'),
+                    func.max(TaskAssignment.updated_at).label('updated_at')
+                ).group_by(TaskAssignment.task_id)
+            )
+        }
+        # Имена и СМИ пользователей попадают в строки всех заданий
+        users = (await session.execute(
+            select(func.count(User.id), func.max(User.updated_at))
+        )).one()
+
+        versions = {}
+        for task in tasks:
+            submission = submissions.get(task.id)
+            assignment = assignments.get(task.id)
+            versions[task.id] = '|'.join(str(value) for value in (
+                task.updated_at,
+                submission.count if submission else 0,
+                submission.updated_at if submission else None,
+                assignment.count if assignment else 0,
+                assignment.updated_at if assignment else None
+            ))
+
+        return _Snapshot(
+            task_ids=[task.id for task in tasks],
+            versions=versions,
+            users_version=f"{users[0]}|{users[1]}"
+        )
+
+    def _changed_task_ids(self, manifest: Optional[dict], snapshot: _Snapshot) -> Optional[set]:
+        """Задания, которые нужно перечитать из БД, или None, если отчет проще собрать заново"""
+        if not manifest or not os.path.exists(manifest['path']):
+            return None
+        if manifest.get('users_version') != snapshot.users_version:
+            return None
+        previous_versions = manifest.get('versions', {})
+        changed = {
+            task_id for task_id in snapshot.task_ids
+            if previous_versions.get(str(task_id)) != snapshot.versions[task_id]
+        }
+        if len(changed) > len(snapshot.task_ids) * self.rebuild_ratio:
+            return None
+        return changed
+
+    def _load_manifest(self) -> Optional[dict]:
+        if self._manifest is None:
+            manifest_path = self.directory / self.MANIFEST_NAME
+            if manifest_path.exists():
+                try:
+                    self._manifest = json.loads(manifest_path.read_text(encoding='utf-8'))
+                except (OSError, ValueError) as e:
+                    logging.warning(f"Report cache manifest is unreadable, ignoring it: {e}")
+        return self._manifest
+
+    def _save_manifest(self, manifest: dict) -> None:
+        self._manifest = manifest
+        manifest_path = self.directory / self.MANIFEST_NAME
+        tmp_path = manifest_path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(manifest, ensure_ascii=False), encoding='utf-8')
+        os.replace(tmp_path, manifest_path)
+
+    def _collect_garbage(self, current_path: str) -> None:
+        """Удаляет самые старые файлы отчетов, пока их размер превышает бюджет"""
+        files = sorted(
+            self.directory.glob(f"{self.FILE_PREFIX}*.xlsx"),
+            key=lambda file: file.stat().st_mtime,
+            reverse=True
+        )
+        total = 0
+        for file in files:
+            size = file.stat().st_size
+            total += size
+            if total > self.max_bytes and str(file) != current_path:
+                try:
+                    file.unlink()
+                    total -= size
+                    logging.info(f"Removed old report {file}")
+                except OSError as e:
+                    logging.warning(f"Could not remove old report {file}: {e}")
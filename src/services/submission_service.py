@@ -1,12 +1,31 @@
 from datetime import datetime, timedelta
-from typing import List, Optional
-from sqlalchemy import select, or_, and_
+from typing import Iterable, List, Optional, Tuple
+from sqlalchemy import select, update, insert, inspect, or_, and_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload, joinedload
-from src.database.models import Submission, Task, TaskAssignment
+from sqlalchemy.orm.attributes import set_committed_value
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+from src.database.models import Submission, SubmissionEvent, Task, TaskAssignment
 from src.database.models.submission import SubmissionStatus
+from src.services.submission_transitions import SubmissionAction, InvalidTransition, AlreadyHandled, resolve
 import logging
 from src.services.task_service import TaskService
+from src.services.notification_service import NotificationService
+from src.keyboards.moderation_kb import get_moderation_keyboard
+from src.config.bot_config import MODERATION_PAGE_CACHE_SIZE, MODERATION_PAGE_TTL
+from src.utils.ttl_cache import TTLCache
+from src.utils import invalidation
+
+logger = logging.getLogger(__name__)
+
+# Кэш отрисованных страниц очереди модерации, сбрасывается при любом изменении публикаций
+# (при шардировании - во всех воркерах); MODERATION_PAGE_TTL=0 отключает его
+moderation_page_cache: TTLCache = TTLCache(maxsize=MODERATION_PAGE_CACHE_SIZE, ttl=MODERATION_PAGE_TTL)
+invalidation.register('moderation_pages', lambda _: moderation_page_cache.clear())
+
+
+def invalidate_moderation_pages() -> None:
+    invalidation.invalidate('moderation_pages')
 
 
 class SubmissionService:
@@ -18,22 +37,24 @@ class SubmissionService:
         task_id: int, 
         user_id: int, 
         content: str, 
-        photo: str = None
+        photo: str = None,
+        notify_admins: Iterable[int] = ()
     ) -> Optional[Submission]:
+        """Создает публикацию; уведомления notify_admins записываются в outbox в той же транзакции"""
         # Проверяем, существует ли задание
         task_service = TaskService(self.session)
         task = await task_service.get_task_by_id(task_id)
         
         if not task:
-            logging.error(f"Task {task_id} not found when creating submission")
+            logger.error(f"Task {task_id} not found when creating submission")
             return None  # Задание не существует
             
-        logging.info(f"Found task {task_id} when creating submission: {task}")
+        logger.debug("Found task %s when creating submission: %s", task_id, task)
             
         # Проверяем, нет ли уже публикации от этого пользователя для данного задания
         existing_submission = await self.get_user_submission_for_task(user_id, task_id)
         if existing_submission:
-            logging.error(f"User {user_id} already has a submission for task {task_id}")
+            logger.error(f"User {user_id} already has a submission for task {task_id}")
             return None  # У пользователя уже есть публикация для этого задания
         
         try:
@@ -46,35 +67,58 @@ class SubmissionService:
                 status=SubmissionStatus.PENDING.value
             )
             self.session.add(submission)
+            await self.session.flush()
+            self.session.add(SubmissionEvent(
+                submission_id=submission.id,
+                action=SubmissionAction.CREATE.value,
+                from_status=None,
+                to_status=SubmissionStatus.PENDING.value,
+                actor_id=user_id,
+                created_at=submission.submitted_at
+            ))
+            if notify_admins:
+                await self.session.refresh(submission, ['user'])
+                await self._enqueue_review(submission, notify_admins, is_revision=False)
             await self.session.commit()
+            invalidate_moderation_pages()
             await self.session.refresh(submission)
             
-            logging.info(f"Created submission {submission.id} with task_id {submission.task_id}")
+            logger.info(f"Created submission {submission.id} with task_id {submission.task_id}")
             
             # Получаем публикацию с загруженным заданием
             submission = await self.get_submission_with_user(submission.id)
             if not submission:
-                logging.error(f"Failed to load submission {submission.id} after creation")
+                logger.error(f"Failed to load submission {submission.id} after creation")
                 return None
                 
             if not submission.task:
-                logging.error(f"Task not loaded for submission {submission.id}")
+                logger.error(f"Task not loaded for submission {submission.id}")
                 return None
                 
-            logging.info(f"Loaded submission {submission.id} with task {submission.task_id} and task object {submission.task}")
+            logger.debug("Loaded submission %s with task %s and task object %s", submission.id, submission.task_id, submission.task)
             return submission
             
         except Exception as e:
-            logging.error(f"Error creating submission: {e}", exc_info=True)
+            logger.error(f"Error creating submission: {e}", exc_info=True)
             await self.session.rollback()
             return None
 
-    async def get_pending_submissions(self, admin_id: int = None, is_superadmin: bool = False) -> List[Submission]:
+    async def get_pending_submissions(
+        self,
+        admin_id: int = None,
+        is_superadmin: bool = False,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[datetime, int]] = None,
+        backward: bool = False
+    ) -> List[Submission]:
         """Получает публикации, требующие действий от администратора
         
         Args:
             admin_id: ID администратора (для фильтрации по создателю задания)
             is_superadmin: Является ли пользователь суперадмином
+            limit: Максимальное число публикаций
+            after: Ключ (submitted_at, id) публикации, после которой начинать выборку
+            backward: Выбирать публикации перед ключом after (более новые), в обратном порядке
             
         Примечание:
             В соответствии с требованиями, задания на модерацию доступны только:
@@ -82,7 +126,7 @@ class SubmissionService:
             2. Администраторам, которые создали конкретное задание (видят только свои задания)
             Обычные администраторы НЕ могут видеть и модерировать задания других администраторов.
         """
-        logging.info(f"Вызов get_pending_submissions с admin_id={admin_id}, is_superadmin={is_superadmin}")
+        logger.debug("Вызов get_pending_submissions с admin_id=%s, is_superadmin=%s", admin_id, is_superadmin)
         query = (
             select(Submission)
             .options(joinedload(Submission.user))
@@ -98,121 +142,113 @@ class SubmissionService:
         
         # Если это не суперадмин, показываем только задания, созданные этим админом
         if not is_superadmin and admin_id is not None:
-            logging.info(f"Применяем фильтрацию по создателю задания: admin_id={admin_id}")
+            logger.debug("Применяем фильтрацию по создателю задания: admin_id=%s", admin_id)
             query = query.join(Task).where(Task.created_by == admin_id)
             
-        query = query.order_by(Submission.submitted_at.desc())
-        logging.info(f"SQL запрос: {query}")
+        # Постраничная выборка по ключу (submitted_at, id) вместо OFFSET
+        if after is not None:
+            submitted_at, submission_id = after
+            if backward:
+                query = query.where(or_(
+                    Submission.submitted_at > submitted_at,
+                    and_(Submission.submitted_at == submitted_at, Submission.id > submission_id)
+                ))
+            else:
+                query = query.where(or_(
+                    Submission.submitted_at < submitted_at,
+                    and_(Submission.submitted_at == submitted_at, Submission.id < submission_id)
+                ))
+            
+        if backward:
+            query = query.order_by(Submission.submitted_at.asc(), Submission.id.asc())
+        else:
+            query = query.order_by(Submission.submitted_at.desc(), Submission.id.desc())
+        if limit is not None:
+            query = query.limit(limit)
+        # Запрос компилируется в текст, только если запись будет выведена
+        logger.debug("SQL запрос: %s", query)
         
         try:
             result = await self.session.execute(query)
             submissions = result.scalars().all()
-            logging.info(f"Получено публикаций: {len(submissions)}")
+            logger.debug("Получено публикаций: %s", len(submissions))
             return submissions
         except Exception as e:
-            logging.error(f"Ошибка при выполнении get_pending_submissions: {e}", exc_info=True)
+            logger.error(f"Ошибка при выполнении get_pending_submissions: {e}", exc_info=True)
             raise
 
-    async def approve_submission(self, submission_id: int) -> Submission:
-        """Одобряет публикацию"""
-        submission = await self.get_submission_with_user(submission_id)
-        if not submission:
-            raise ValueError(f"Submission with id {submission_id} not found")
-
-        logging.info(f"Approving submission {submission_id}. Current photo: {submission.photo}, Current status: {submission.status}")
+    async def approve_submission(
+        self,
+        submission_id: int,
+        notify_user: bool = True,
+        actor_id: Optional[int] = None,
+        expected_version: Optional[int] = None
+    ) -> Submission:
+        """Одобряет публикацию
         
-        # Проверяем, можно ли одобрить публикацию
-        if submission.status == SubmissionStatus.APPROVED.value:
-            logging.warning(f"Submission {submission_id} is already approved")
-            raise ValueError("Публикация уже одобрена")
-            
-        if submission.status == SubmissionStatus.REVISION.value:
-            logging.warning(f"Cannot approve submission {submission_id} while it's in revision")
-            raise ValueError("Нельзя одобрить публикацию, которая находится на доработке")
-            
-        if submission.status == SubmissionStatus.COMPLETED.value:
-            logging.warning(f"Cannot approve submission {submission_id} that is already completed")
-            raise ValueError("Нельзя одобрить завершенную публикацию")
+        Уведомление пользователю о новом статусе записывается в outbox
+        в той же транзакции, что и смена статуса. expected_version - версия,
+        которую видел модератор: если публикация с тех пор изменилась, AlreadyHandled.
+        """
+        submission = await self._get_for_transition(submission_id)
+        logger.debug("Approving submission %s. Current photo: %s, Current status: %s", submission_id, submission.photo, submission.status)
         
-        # Если статус PENDING, значит одобряем текст
-        if submission.status == SubmissionStatus.PENDING.value:
-            # Устанавливаем статус TEXT_APPROVED независимо от наличия фото
-            submission.status = SubmissionStatus.TEXT_APPROVED.value
-            logging.info(f"Setting status to TEXT_APPROVED for submission {submission_id}")
+        await self._apply(submission, SubmissionAction.APPROVE, actor_id, expected_version=expected_version)
         
-        # Если статус PHOTO_PENDING, значит одобряем фото
-        elif submission.status == SubmissionStatus.PHOTO_PENDING.value:
-            submission.status = SubmissionStatus.APPROVED.value
-            logging.info(f"Setting status to APPROVED for submission {submission_id}")
+        if notify_user:
+            NotificationService(self.session).enqueue_submission_status(submission)
         
         await self.session.commit()
-        await self.session.refresh(submission)
-        logging.info(f"Final status for submission {submission_id}: {submission.status}")
+        invalidate_moderation_pages()
+        logger.info(f"Final status for submission {submission_id}: {submission.status}")
         return submission
 
-    async def request_revision(self, submission_id: int, comment: str, is_photo_revision: bool = False) -> Submission:
+    async def request_revision(
+        self,
+        submission_id: int,
+        comment: str,
+        is_photo_revision: bool = False,
+        actor_id: Optional[int] = None,
+        expected_version: Optional[int] = None
+    ) -> Submission:
         try:
-            # Получаем публикацию с данными пользователя
-            submission = await self.get_submission_with_user(submission_id)
-            if not submission:
-                logging.error(f"Submission with id {submission_id} not found")
-                raise ValueError(f"Submission with id {submission_id} not found")
+            submission = await self._get_for_transition(submission_id)
+            logger.info(f"Requesting revision for submission {submission_id}")
+            logger.debug("Current status: %s, Is photo revision: %s", submission.status, is_photo_revision)
             
-            logging.info(f"Requesting revision for submission {submission_id}")
-            logging.info(f"Current status: {submission.status}, Is photo revision: {is_photo_revision}")
-            
-            # Проверяем статус публикации
-            if submission.status == SubmissionStatus.REVISION.value:
-                logging.warning(f"Submission {submission_id} is already in revision")
-                raise ValueError("Публикация уже находится на доработке")
-                
-            if submission.status == SubmissionStatus.COMPLETED.value:
-                logging.warning(f"Cannot request revision for completed submission {submission_id}")
-                raise ValueError("Нельзя отправить на доработку завершенную публикацию")
-                
-            if submission.status == SubmissionStatus.APPROVED.value:
-                logging.warning(f"Cannot request revision for approved submission {submission_id}")
-                raise ValueError("Нельзя отправить на доработку одобренную публикацию")
-            
-            # Сохраняем предыдущий статус для возврата после доработки
-            if is_photo_revision:
-                submission.previous_status = SubmissionStatus.TEXT_APPROVED.value
-                # Очищаем фото, так как оно требует доработки
-                submission.photo = None
-            else:
-                submission.previous_status = SubmissionStatus.PENDING.value
-            
-            # Обновляем статус и комментарий
-            submission.status = SubmissionStatus.REVISION.value
-            submission.revision_comment = comment
+            action = SubmissionAction.REQUEST_PHOTO_REVISION if is_photo_revision else SubmissionAction.REQUEST_REVISION
+            await self._apply(
+                submission, action, actor_id, expected_version=expected_version, revision_comment=comment
+            )
             
             await self.session.commit()
-            await self.session.refresh(submission)
+            invalidate_moderation_pages()
             
-            logging.info(f"Revision requested successfully for submission {submission_id}")
-            logging.info(f"Previous status saved: {submission.previous_status}")
+            logger.info(f"Revision requested successfully for submission {submission_id}")
+            logger.debug("Previous status saved: %s", submission.previous_status)
             return submission
             
+        except InvalidTransition:
+            # Ожидаемый отказ (в т.ч. конфликт модераторов), уже залогирован в _apply
+            await self.session.rollback()
+            raise
         except Exception as e:
-            logging.error(f"Error in request_revision: {e}", exc_info=True)
+            logger.error(f"Error in request_revision: {e}", exc_info=True)
             await self.session.rollback()
             raise
 
     async def add_published_link(
         self, 
         submission_id: int, 
-        published_link: str
+        published_link: str,
+        actor_id: Optional[int] = None
     ) -> Submission:
         try:
-            submission = await self.session.get(Submission, submission_id)
-            if not submission:
-                raise ValueError(f"Submission with id {submission_id} not found")
-
-            submission.status = SubmissionStatus.COMPLETED.value
-            submission.published_link = published_link
+            submission = await self._get_for_transition(submission_id)
+            await self._apply(submission, SubmissionAction.PUBLISH, actor_id, published_link=published_link)
 
             await self.session.commit()
-            await self.session.refresh(submission)
+            invalidate_moderation_pages()
             return submission
 
         except Exception as e:
@@ -258,42 +294,145 @@ class SubmissionService:
         self, 
         submission_id: int, 
         content: str = None, 
-        photo: str = None
+        photo: str = None,
+        actor_id: Optional[int] = None,
+        notify_admins: Iterable[int] = ()
     ) -> Submission:
-        """Обновляет содержимое публикации"""
-        submission = await self.get_submission(submission_id)
+        """Обновляет содержимое публикации; уведомления notify_admins записываются в outbox в той же транзакции"""
+        submission = await self._get_for_transition(submission_id, required=False)
         if submission:
+            is_revision = content is not None or submission.status == SubmissionStatus.REVISION.value
             if content is not None:
-                submission.content = content
-                # Если публикация была на доработке, возвращаем предыдущий статус
-                if submission.status == SubmissionStatus.REVISION.value and submission.previous_status:
-                    submission.status = submission.previous_status
-                    submission.previous_status = None
-                    submission.revision_comment = None
-                else:
-                    submission.status = SubmissionStatus.PENDING.value
+                await self._apply(submission, SubmissionAction.UPDATE_TEXT, actor_id, content=content)
                     
             if photo is not None:
-                # Проверяем, что текст уже одобрен или это доработка фото
-                if (submission.status == SubmissionStatus.TEXT_APPROVED.value or 
-                    (submission.status == SubmissionStatus.REVISION.value and 
-                     submission.previous_status == SubmissionStatus.TEXT_APPROVED.value)):
-                    submission.photo = photo
-                    submission.status = SubmissionStatus.PHOTO_PENDING.value
-                    # Если это была доработка, очищаем поля доработки
-                    if submission.previous_status:
-                        submission.previous_status = None
-                        submission.revision_comment = None
-                    logging.info(f"Setting status to PHOTO_PENDING for submission {submission_id}")
-                else:
-                    logging.error(f"Cannot add photo before text is approved. Current status: {submission.status}")
-                    raise ValueError("Cannot add photo before text is approved")
+                try:
+                    await self._apply(submission, SubmissionAction.ATTACH_PHOTO, actor_id, photo=photo)
+                except InvalidTransition:
+                    logger.error(f"Cannot add photo before text is approved. Current status: {submission.status}")
+                    raise
+                logger.debug("Setting status to PHOTO_PENDING for submission %s", submission_id)
             
+            if notify_admins:
+                await self._enqueue_review(submission, notify_admins, is_revision)
             await self.session.commit()
-            await self.session.refresh(submission)
-            logging.info(f"Updated submission {submission_id}. New status: {submission.status}")
+            invalidate_moderation_pages()
+            logger.info(f"Updated submission {submission_id}. New status: {submission.status}")
+        return submission
+
+    async def _enqueue_review(self, submission: Submission, chat_ids: Iterable[int], is_revision: bool) -> None:
+        """Ставит в outbox уведомление администраторам о публикации, ожидающей проверки"""
+        notification_service = NotificationService(self.session)
+        user = submission.user
+        if submission.status == SubmissionStatus.PHOTO_PENDING.value:
+            notifications = notification_service.enqueue_many(
+                chat_ids,
+                text=(
+                    f"📸 {'Исправленное' if is_revision else 'Новое'} фото для задания #{submission.task_id}\n"
+                    f"От: {user.media_outlet}\n"
+                    f"Пользователь: @{user.username}"
+                ),
+                photo=submission.photo,
+                reply_markup=await get_moderation_keyboard(submission.id, submission.version)
+            )
+        else:
+            content = submission.content or ''
+            notifications = notification_service.enqueue_many(
+                chat_ids,
+                text=(
+                    f"📨 {'Исправленный' if is_revision else 'Новый'} текст для задания #{submission.task_id}\n"
+                    f"От: {user.media_outlet}\n"
+                    f"Пользователь: @{user.username}\n\n"
+                    f"{content[:1000]}{'...' if len(content) > 1000 else ''}"
+                ),
+                reply_markup=InlineKeyboardMarkup(inline_keyboard=[[
+                    InlineKeyboardButton(
+                        text="Просмотреть",
+                        callback_data=f"review_submission_{submission.id}"
+                    )
+                ]])
+            )
+        logger.info(f"Queued {len(notifications)} review notifications for submission {submission.id}")
+
+    async def _get_for_transition(self, submission_id: int, required: bool = True) -> Optional[Submission]:
+        """Публикация с пользователем и заданием; если обработчик уже загрузил ее в эту сессию, без запроса к БД"""
+        submission = await self.session.get(
+            Submission,
+            submission_id,
+            options=[joinedload(Submission.user), joinedload(Submission.task)]
+        )
+        if submission is None:
+            if required:
+                raise ValueError(f"Submission with id {submission_id} not found")
+            return None
+        unloaded = inspect(submission).unloaded
+        if 'user' in unloaded or 'task' in unloaded:
+            await self.session.refresh(submission, ['user', 'task'])
         return submission
 
+    async def _apply(
+        self,
+        submission: Submission,
+        action: SubmissionAction,
+        actor_id: Optional[int] = None,
+        expected_version: Optional[int] = None,
+        **values
+    ) -> None:
+        """Переводит публикацию в новый статус по таблице переходов.
+
+        Статус меняется одним условным UPDATE: только если версия строки не изменилась
+        с момента чтения (и совпадает с expected_version, если она задана),
+        иначе выбрасывается AlreadyHandled. Блокировки строк не
+        удерживаются между чтением и записью. Переход записывается в submission_events,
+        объект в сессии обновляется без повторного чтения из БД. Commit выполняет
+        вызывающий метод.
+        """
+        if expected_version is not None and expected_version != submission.version:
+            logger.warning(
+                f"Submission {submission.id} is at version {submission.version}, "
+                f"{action.value} for version {expected_version} rejected"
+            )
+            raise AlreadyHandled()
+
+        current = SubmissionStatus(submission.status)
+        previous = submission.previous_status
+        transition = resolve(current, previous, action)
+
+        values.update(status=transition.target, previous_status=transition.remember)
+        if transition.clear_photo:
+            values['photo'] = None
+        if transition.clear_revision_comment:
+            values['revision_comment'] = None
+        values['updated_at'] = datetime.now()
+        values['version'] = submission.version + 1
+
+        result = await self.session.execute(
+            update(Submission)
+            .where(
+                Submission.id == submission.id,
+                Submission.status == current,
+                Submission.version == submission.version
+            )
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            logger.warning(f"Submission {submission.id} changed concurrently, {action.value} rejected")
+            raise AlreadyHandled()
+
+        await self.session.execute(
+            insert(SubmissionEvent).values(
+                submission_id=submission.id,
+                action=action.value,
+                from_status=current.value,
+                to_status=transition.target.value,
+                actor_id=actor_id,
+                created_at=values['updated_at']
+            )
+        )
+        for key, value in values.items():
+            set_committed_value(submission, key, value)
+
     async def get_submission_with_user(self, submission_id: int) -> Submission:
         """Получает публикацию вместе с данными пользователя"""
         query = (
@@ -0,0 +1,96 @@
+from dataclasses import dataclass
+from enum import Enum
+from typing import Dict, Optional, Tuple
+from src.database.models.submission import SubmissionStatus
+
+
+class SubmissionAction(str, Enum):
+    CREATE = 'create'
+    APPROVE = 'approve'
+    REQUEST_REVISION = 'request_revision'
+    REQUEST_PHOTO_REVISION = 'request_photo_revision'
+    UPDATE_TEXT = 'update_text'
+    ATTACH_PHOTO = 'attach_photo'
+    PUBLISH = 'publish'
+
+
+class InvalidTransition(ValueError):
+    """Действие недоступно в текущем статусе публикации"""
+
+
+class AlreadyHandled(InvalidTransition):
+    """Публикацию изменили после того, как ее прочитали (например, другой модератор)"""
+
+    def __init__(self, message: str = "Публикация уже обработана другим модератором"):
+        super().__init__(message)
+
+
+@dataclass(frozen=True)
+class Transition:
+    target: SubmissionStatus
+    # Статус, в который публикация вернется после доработки (previous_status)
+    remember: Optional[SubmissionStatus] = None
+    clear_photo: bool = False
+    clear_revision_comment: bool = False
+
+
+S = SubmissionStatus
+A = SubmissionAction
+
+# Ключ - (статус, previous_status, действие). previous_status учитывается только
+# для REVISION: от него зависит, куда вернется публикация после доработки
+TRANSITIONS: Dict[Tuple[SubmissionStatus, Optional[SubmissionStatus], SubmissionAction], Transition] = {
+    (S.PENDING, None, A.APPROVE): Transition(S.TEXT_APPROVED),
+    (S.PHOTO_PENDING, None, A.APPROVE): Transition(S.APPROVED),
+
+    (S.PENDING, None, A.REQUEST_REVISION): Transition(S.REVISION, remember=S.PENDING),
+    (S.TEXT_APPROVED, None, A.REQUEST_REVISION): Transition(S.REVISION, remember=S.PENDING),
+    (S.PHOTO_PENDING, None, A.REQUEST_REVISION): Transition(S.REVISION, remember=S.PENDING),
+    (S.TEXT_APPROVED, None, A.REQUEST_PHOTO_REVISION): Transition(S.REVISION, remember=S.TEXT_APPROVED, clear_photo=True),
+    (S.PHOTO_PENDING, None, A.REQUEST_PHOTO_REVISION): Transition(S.REVISION, remember=S.TEXT_APPROVED, clear_photo=True),
+
+    (S.PENDING, None, A.UPDATE_TEXT): Transition(S.PENDING),
+    (S.TEXT_APPROVED, None, A.UPDATE_TEXT): Transition(S.PENDING),
+    (S.PHOTO_PENDING, None, A.UPDATE_TEXT): Transition(S.PENDING),
+    (S.REVISION, None, A.UPDATE_TEXT): Transition(S.PENDING, clear_revision_comment=True),
+    (S.REVISION, S.PENDING, A.UPDATE_TEXT): Transition(S.PENDING, clear_revision_comment=True),
+    (S.REVISION, S.TEXT_APPROVED, A.UPDATE_TEXT): Transition(S.TEXT_APPROVED, clear_revision_comment=True),
+
+    (S.TEXT_APPROVED, None, A.ATTACH_PHOTO): Transition(S.PHOTO_PENDING),
+    (S.REVISION, S.TEXT_APPROVED, A.ATTACH_PHOTO): Transition(S.PHOTO_PENDING, clear_revision_comment=True),
+
+    # Ссылку администратор может запросить на любом этапе, повторная отправка заменяет ее
+    **{(status, None, A.PUBLISH): Transition(S.COMPLETED) for status in S if status != S.REVISION},
+    **{(S.REVISION, previous, A.PUBLISH): Transition(S.COMPLETED) for previous in (None, S.PENDING, S.TEXT_APPROVED)},
+}
+
+# Сообщения пользователю для запрещенных переходов; остальные получают общее сообщение
+ERRORS: Dict[Tuple[SubmissionStatus, SubmissionAction], str] = {
+    (S.APPROVED, A.APPROVE): "Публикация уже одобрена",
+    (S.TEXT_APPROVED, A.APPROVE): "Текст уже одобрен, ожидается фото",
+    (S.REVISION, A.APPROVE): "Нельзя одобрить публикацию, которая находится на доработке",
+    (S.COMPLETED, A.APPROVE): "Нельзя одобрить завершенную публикацию",
+    (S.REVISION, A.REQUEST_REVISION): "Публикация уже находится на доработке",
+    (S.REVISION, A.REQUEST_PHOTO_REVISION): "Публикация уже находится на доработке",
+    (S.COMPLETED, A.REQUEST_REVISION): "Нельзя отправить на доработку завершенную публикацию",
+    (S.COMPLETED, A.REQUEST_PHOTO_REVISION): "Нельзя отправить на доработку завершенную публикацию",
+    (S.APPROVED, A.REQUEST_REVISION): "Нельзя отправить на доработку одобренную публикацию",
+    (S.APPROVED, A.REQUEST_PHOTO_REVISION): "Нельзя отправить на доработку одобренную публикацию",
+    (S.PENDING, A.ATTACH_PHOTO): "Cannot add photo before text is approved",
+    (S.REVISION, A.ATTACH_PHOTO): "Cannot add photo before text is approved",
+}
+
+
+def resolve(
+    status: SubmissionStatus,
+    previous_status: Optional[SubmissionStatus],
+    action: SubmissionAction
+) -> Transition:
+    """Находит переход по таблице или выбрасывает InvalidTransition"""
+    status = SubmissionStatus(status)
+    previous = SubmissionStatus(previous_status) if status == S.REVISION and previous_status else None
+    transition = TRANSITIONS.get((status, previous, action))
+    if transition is None:
+        message = ERRORS.get((status, action), f"Действие недоступно для публикации в статусе {status.value}")
+        raise InvalidTransition(message)
+    return transition
@@ -1,7 +1,8 @@
 from typing import List, Optional
-from sqlalchemy import select, update, delete, text
+from sqlalchemy import select, update, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.database.models import User
+from src.services.user_service import invalidate_user
 import logging
 
 class SuperadminService:
@@ -20,10 +21,9 @@ class SuperadminService:
                 logging.info(f"Обновляем существующего пользователя: {user.username} (ID: {user.telegram_id})")
                 logging.info(f"  Установлено is_admin={user.is_admin} (тип: {type(user.is_admin)})")
                 
-                # Дополнительно обновляем через SQL для решения проблем с SQLAlchemy/SQLite
+                # Дополнительно обновляем запросом, чтобы флаг был записан и при устаревшем состоянии объекта
                 await self.session.execute(
-                    text("UPDATE users SET is_admin = 1 WHERE telegram_id = :telegram_id"),
-                    {"telegram_id": telegram_id}
+                    update(User).where(User.telegram_id == telegram_id).values(is_admin=True)
                 )
                 
                 user.username = username
@@ -44,6 +44,7 @@ class SuperadminService:
             
             await self.session.commit()
             await self.session.refresh(user)
+            invalidate_user(telegram_id)
             
             # Проверяем результат
             logging.info(f"После сохранения в БД: {user.username} (ID: {user.telegram_id})")
@@ -68,6 +69,7 @@ class SuperadminService:
                 
             user.is_admin = False
             await self.session.commit()
+            invalidate_user(telegram_id)
             return True
             
         except Exception as e:
@@ -100,6 +102,7 @@ class SuperadminService:
             
             await self.session.commit()
             await self.session.refresh(user)
+            invalidate_user(telegram_id)
             return user
             
         except Exception as e:
@@ -116,6 +119,7 @@ class SuperadminService:
                 
             await self.session.delete(user)
             await self.session.commit()
+            invalidate_user(telegram_id)
             return True
             
         except Exception as e:
@@ -155,6 +159,7 @@ class SuperadminService:
             user.is_superadmin = not user.is_superadmin
             await self.session.commit()
             await self.session.refresh(user)
+            invalidate_user(telegram_id)
             return user
             
         except Exception as e:
@@ -1,13 +1,15 @@
 from datetime import datetime, timedelta
-from typing import List, Optional
-from sqlalchemy import select, delete, and_, or_
+from typing import List, Optional, Tuple
+from sqlalchemy import select, update, delete, and_, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload, joinedload
-from src.database.models import Task, TaskAssignment, Submission, User
+from src.database.models import Task, TaskAssignment, Submission, SubmissionEvent, User
 from src.database.models.task import TaskStatus
 from sqlalchemy.types import Date
 import logging
 
+logger = logging.getLogger(__name__)
+
 class TaskService:
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -65,21 +67,23 @@ class TaskService:
         )
         self.session.add(assignment)
         
-        task_query = select(Task).where(Task.id == task_id)
-        task_result = await self.session.execute(task_query)
-        task = task_result.scalar_one()
-        task.status = 'in_progress'
+        # Условное обновление: одновременное взятие задания несколькими СМИ не конфликтует
+        await self.session.execute(
+            update(Task)
+            .where(Task.id == task_id, Task.status == TaskStatus.NEW)
+            .values(status=TaskStatus.IN_PROGRESS)
+            .execution_options(synchronize_session=False)
+        )
         
         await self.session.commit()
         await self.session.refresh(assignment)
         return assignment
 
-    async def get_active_tasks(self, media_outlet: str = None) -> List[Task]:
-        """Получает активные задания, которые можно взять в работу или уже взяты данным СМИ"""
-        now = datetime.utcnow()
-        
-        # Базовый запрос для заданий, не просроченных по дедлайну
-        query = select(Task).where(Task.deadline >= now)
+    def _active_tasks_query(self, query, media_outlet: Optional[str]):
+        """Добавляет к запросу условия отбора активных заданий"""
+        # Просроченные задания помечает DeadlineScheduler; условие по дедлайну скрывает
+        # задания, которые он еще не успел пометить
+        query = query.where(Task.status != TaskStatus.EXPIRED, Task.deadline >= datetime.now())
         
         if media_outlet:
             # Подзапрос для получения ID заданий, которые уже выполнены этим СМИ
@@ -116,16 +120,52 @@ class TaskService:
             # Если СМИ не указано, показываем только новые задания
             query = query.where(Task.status == TaskStatus.NEW)
         
-        query = query.order_by(Task.created_at.desc())
+        return query.order_by(Task.created_at.desc())
+
+    async def get_active_tasks(self, media_outlet: str = None) -> List[Task]:
+        """Получает активные задания, которые можно взять в работу или уже взяты данным СМИ"""
+        query = self._active_tasks_query(select(Task), media_outlet)
         
         result = await self.session.execute(query)
         tasks = result.scalars().all()
         
-        for task in tasks:
-            logging.info(f"Task {task.id}: photo={task.photo}")
+        if logger.isEnabledFor(logging.DEBUG):
+            for task in tasks:
+                logger.debug("Task %s: photo=%s", task.id, task.photo)
         
         return tasks
 
+    async def get_active_tasks_with_assignments(
+        self,
+        media_outlet: Optional[str],
+        filter_by_media_outlet: bool = True
+    ) -> List[Tuple[Task, Optional[TaskAssignment]]]:
+        """Получает активные задания вместе с назначением на СМИ одним запросом.
+
+        Возвращает пары (задание, назначение или None). При filter_by_media_outlet=False
+        отбор заданий такой же, как у get_active_tasks() без СМИ (только новые).
+        """
+        query = self._active_tasks_query(
+            select(Task, TaskAssignment).outerjoin(
+                TaskAssignment,
+                and_(
+                    TaskAssignment.task_id == Task.id,
+                    TaskAssignment.media_outlet == media_outlet
+                )
+            ),
+            media_outlet if filter_by_media_outlet else None
+        )
+        result = await self.session.execute(query)
+        
+        # Назначение одного СМИ на задание должно быть единственным, но на случай
+        # дублей оставляем по одной строке на задание
+        tasks = {}
+        for task, assignment in result.all():
+            tasks.setdefault(task.id, (task, assignment))
+        
+        logger.debug("Loaded %s active tasks for media outlet %s", len(tasks), media_outlet)
+        return list(tasks.values())
+
     async def check_task_assignment(self, task_id: int, media_outlet: str) -> bool:
         query = select(TaskAssignment).where(
             TaskAssignment.task_id == task_id,
@@ -159,6 +199,14 @@ class TaskService:
         return result.scalar() is not None
 
     async def delete_task_with_related_data(self, task_id: int):
+        # Удаляем историю статусов публикаций задания
+        await self.session.execute(
+            delete(SubmissionEvent)
+            .where(SubmissionEvent.submission_id.in_(
+                select(Submission.id).where(Submission.task_id == task_id)
+            ))
+        )
+        
         # Удаляем все связанные публикации
         await self.session.execute(
             delete(Submission)
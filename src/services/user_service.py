@@ -1,9 +1,80 @@
+import time
 from typing import Optional, List
-from sqlalchemy import select, text
+from sqlalchemy import select, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.database.models import User
+from src.config.bot_config import USER_CACHE_SIZE, USER_CACHE_TTL, USER_CACHE_NEGATIVE_TTL, ADMIN_ROSTER_TTL
+from src.utils.ttl_cache import TTLCache
+from src.utils import invalidation
 import logging
 
+logger = logging.getLogger(__name__)
+
+# Кэш пользователей по telegram_id, общий для всех обработчиков процесса
+user_cache: TTLCache[Optional[User]] = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+
+def invalidate_user(telegram_id: int) -> None:
+    """Сбрасывает запись кэша и список админов после изменения пользователя или его ролей
+    (при шардировании - во всех воркерах)"""
+    invalidation.invalidate('user', int(telegram_id))
+
+
+def _invalidate_user_local(telegram_id: int) -> None:
+    user_cache.invalidate(telegram_id)
+    admin_roster.invalidate()
+
+
+def _detached_copy(user: User) -> User:
+    """Создает копию пользователя, не привязанную к сессии, для хранения в кэше"""
+    return User(
+        id=user.id,
+        telegram_id=user.telegram_id,
+        username=user.username,
+        is_admin=bool(user.is_admin),
+        is_superadmin=bool(user.is_superadmin),
+        media_outlet=user.media_outlet
+    )
+
+
+class AdminRoster:
+    """Админы и суперадмины в памяти процесса для рассылки уведомлений.
+
+    Загружается одним запросом при первом обращении и хранится ttl секунд.
+    Изменения ролей (SuperadminService, create_user) сбрасывают его через
+    invalidate_user(), при шардировании - во всех воркерах. Отдает копии пользователей, не привязанные к сессии.
+    """
+
+    def __init__(self, ttl: float = ADMIN_ROSTER_TTL):
+        self.ttl = ttl
+        self._users: Optional[List[User]] = None
+        self._expires_at = 0.0
+        # Загрузка, начатая до сброса, не должна сохранить устаревший список
+        self._generation = 0
+
+    def invalidate(self) -> None:
+        self._users = None
+        self._generation += 1
+
+    async def get(self, session: AsyncSession) -> List[User]:
+        if self._users is not None and time.monotonic() < self._expires_at:
+            return self._users
+
+        generation = self._generation
+        result = await session.execute(
+            select(User).where(or_(User.is_admin == True, User.is_superadmin == True))
+        )
+        users = [_detached_copy(user) for user in result.scalars().all()]
+        if generation == self._generation:
+            self._users = users
+            self._expires_at = time.monotonic() + self.ttl
+        return users
+
+
+admin_roster = AdminRoster()
+invalidation.register('user', _invalidate_user_local)
+
+
 class UserService:
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -13,36 +84,55 @@ class UserService:
         result = await self.session.execute(query)
         return result.scalar_one_or_none()
 
+    async def get_cached_user(self, telegram_id: int) -> Optional[User]:
+        """Получает пользователя по telegram_id через кэш, обращаясь к БД только при промахе"""
+        found, user = user_cache.lookup(telegram_id)
+        if found:
+            return user
+        
+        user = await self.get_user_by_telegram_id(telegram_id)
+        if user is None:
+            user_cache.set(telegram_id, None, ttl=USER_CACHE_NEGATIVE_TTL)
+            return None
+        
+        user = _detached_copy(user)
+        user_cache.set(telegram_id, user)
+        return user
+
     async def get_user_by_id(self, user_id: int) -> Optional[User]:
         """Получает пользователя по его внутреннему ID в базе данных"""
-        logging.info(f"🔍 Запрос пользователя с ID {user_id}")
+        logger.debug("🔍 Запрос пользователя с ID %s", user_id)
         try:
             query = select(User).where(User.id == user_id)
-            logging.info(f"🔍 SQL-запрос: {str(query)}")
+            # Запрос компилируется в текст, только если запись будет выведена
+            logger.debug("🔍 SQL-запрос: %s", query)
             
             result = await self.session.execute(query)
             user = result.scalar_one_or_none()
             
             if user:
-                logging.info(f"✅ Найден пользователь: id={user.id}, telegram_id={user.telegram_id}, username={user.username}, is_admin={user.is_admin}")
+                logger.debug(
+                    "✅ Найден пользователь: id=%s, telegram_id=%s, username=%s, is_admin=%s",
+                    user.id, user.telegram_id, user.username, user.is_admin
+                )
                 
                 # Проверка типов данных
-                logging.info(f"🔍 Типы данных: telegram_id: {type(user.telegram_id)}, is_admin: {type(user.is_admin)}")
+                logger.debug("🔍 Типы данных: telegram_id: %s, is_admin: %s", type(user.telegram_id), type(user.is_admin))
                 
                 # Проверяем, что telegram_id может быть преобразован в int
                 if user.telegram_id:
                     try:
                         telegram_id_int = int(user.telegram_id)
-                        logging.info(f"✅ telegram_id успешно конвертируется в int: {telegram_id_int}")
+                        logger.debug("✅ telegram_id успешно конвертируется в int: %s", telegram_id_int)
                     except (ValueError, TypeError) as e:
-                        logging.error(f"❌ Ошибка преобразования telegram_id в int: {e}")
+                        logger.error(f"❌ Ошибка преобразования telegram_id в int: {e}")
             else:
-                logging.warning(f"⚠️ Пользователь с ID={user_id} не найден в базе данных")
+                logger.warning(f"⚠️ Пользователь с ID={user_id} не найден в базе данных")
                 
             return user
             
         except Exception as e:
-            logging.error(f"❌ Ошибка при получении пользователя: {e}", exc_info=True)
+            logger.error(f"❌ Ошибка при получении пользователя: {e}", exc_info=True)
             return None
 
     async def get_all_media_outlets(self) -> List[User]:
@@ -51,69 +141,39 @@ class UserService:
         return result.scalars().all()
 
     async def get_all_admins(self) -> List[User]:
-        """Получает список всех администраторов из базы данных"""
-        logging.info("Запрос всех администраторов из базы данных")
+        """Получает список всех администраторов (из списка admin_roster)"""
+        logger.debug("Запрос всех администраторов")
         
         try:
-            # Используем сырой SQL-запрос для диагностики
-            raw_result = await self.session.execute(
-                text("SELECT id, telegram_id, username, is_admin, is_superadmin, media_outlet FROM users WHERE is_admin = 1 OR is_admin = 'true' OR is_admin = 't'")
-            )
-            raw_admins = raw_result.fetchall()
-            logging.info(f"Найдено {len(raw_admins)} администраторов через сырой SQL запрос")
-            
-            # Выводим информацию о каждом администраторе из результатов
-            admin_ids = []
-            for admin_row in raw_admins:
-                try:
-                    admin_id = admin_row[0]
-                    admin_ids.append(admin_id)
-                    logging.info(f"SQL данные админа: id={admin_row[0]}, telegram_id={admin_row[1]}, username={admin_row[2]}, is_admin={admin_row[3]}, is_superadmin={admin_row[4]}")
-                except Exception as e:
-                    logging.error(f"Ошибка при обработке данных админа: {e}")
-            
-            # Затем получаем через ORM
-            query = select(User).where(User.is_admin == True)
-            result = await self.session.execute(query)
-            admins = result.scalars().all()
+            admins = [user for user in await admin_roster.get(self.session) if user.is_admin]
             
-            logging.info(f"Через ORM найдено {len(admins)} администраторов")
-            
-            # Проверяем, всех ли администраторов получили через ORM
-            orm_admin_ids = [admin.id for admin in admins]
-            missing_admins = set(admin_ids) - set(orm_admin_ids)
-            if missing_admins:
-                logging.warning(f"Не все администраторы получены через ORM! Отсутствуют ID: {missing_admins}")
+            logger.debug("Найдено %s администраторов", len(admins))
+            if logger.isEnabledFor(logging.DEBUG):
+                for admin in admins:
+                    logger.debug(
+                        "Админ: id=%s, telegram_id=%s, username=%s, is_superadmin=%s",
+                        admin.id, admin.telegram_id, admin.username, admin.is_superadmin
+                    )
             
             return admins
             
         except Exception as e:
-            logging.error(f"Ошибка при получении списка администраторов: {e}", exc_info=True)
+            logger.error(f"Ошибка при получении списка администраторов: {e}", exc_info=True)
             return []
 
     async def get_superadmins(self) -> List[User]:
-        """Получает список всех суперадминов из базы данных"""
-        logging.info("Запрос всех суперадминов из базы данных")
+        """Получает список всех суперадминов (из списка admin_roster)"""
+        logger.debug("Запрос всех суперадминов")
         
         try:
-            # Используем сырой SQL-запрос для диагностики и надежной выборки
-            raw_result = await self.session.execute(
-                text("SELECT id, telegram_id, username, is_admin, is_superadmin, media_outlet FROM users WHERE is_superadmin = 1 OR is_superadmin = 'true' OR is_superadmin = 't'")
-            )
-            raw_superadmins = raw_result.fetchall()
-            logging.info(f"Найдено {len(raw_superadmins)} суперадминов через сырой SQL запрос")
-            
-            # Затем получаем через ORM для использования
-            query = select(User).where(User.is_superadmin == True)
-            result = await self.session.execute(query)
-            superadmins = result.scalars().all()
+            superadmins = [user for user in await admin_roster.get(self.session) if user.is_superadmin]
             
-            logging.info(f"Через ORM найдено {len(superadmins)} суперадминов")
+            logger.debug("Найдено %s суперадминов", len(superadmins))
             
             return superadmins
             
         except Exception as e:
-            logging.error(f"Ошибка при получении списка суперадминов: {e}", exc_info=True)
+            logger.error(f"Ошибка при получении списка суперадминов: {e}", exc_info=True)
             return []
 
     async def create_user(self, telegram_id: int, username: str, 
@@ -127,4 +187,5 @@ class UserService:
         self.session.add(user)
         await self.session.commit()
         await self.session.refresh(user)
+        invalidate_user(telegram_id)
         return user
\ No newline at end of file
@@ -0,0 +1,272 @@
+import csv
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import select, update, delete, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.database.models import User, Submission, Task
+from src.services.user_service import invalidate_user
+import logging
+
+ROLE_ADMIN = 'admin'
+ROLE_MEDIA = 'media'
+
+
+@dataclass
+class RosterEntry:
+    telegram_id: int
+    username: Optional[str] = None
+    # Есть СМИ - представитель СМИ, нет - администратор
+    media_outlet: Optional[str] = None
+
+    @property
+    def role(self) -> str:
+        return ROLE_MEDIA if self.media_outlet else ROLE_ADMIN
+
+
+def _text(value) -> Optional[str]:
+    """Строка без пробелов по краям; YAML может дать число или другой скаляр вместо строки"""
+    if value is None:
+        return None
+    return str(value).strip() or None
+
+
+def _entry(data: dict, role: Optional[str] = None) -> RosterEntry:
+    try:
+        telegram_id = int(str(data.get('telegram_id', '')).strip())
+    except ValueError:
+        raise ValueError(f"Некорректный telegram_id: {data.get('telegram_id')!r}")
+    username = _text(data.get('username'))
+    media_outlet = _text(data.get('media_outlet'))
+    role = (_text(role or data.get('role')) or '').lower() or None
+    if role == ROLE_MEDIA and not media_outlet:
+        raise ValueError(f"Для представителя СМИ {telegram_id} не указано СМИ")
+    if role == ROLE_ADMIN:
+        media_outlet = None
+    return RosterEntry(telegram_id, username, media_outlet)
+
+
+def _from_lists(admins: Iterable[dict], media_outlets: Iterable[dict]) -> List[RosterEntry]:
+    return [_entry(item, ROLE_ADMIN) for item in admins or ()] + \
+        [_entry(item, ROLE_MEDIA) for item in media_outlets or ()]
+
+
+def load_roster(path: Optional[str] = None) -> List[RosterEntry]:
+    """Читает список пользователей.
+
+    CSV: колонки telegram_id, username, media_outlet и необязательная role (admin/media).
+    YAML: ключи admins и media_outlets, как ADMINS и MEDIA_OUTLETS в src/config/users.py,
+    или список записей с теми же полями, что в CSV. Без пути - src/config/users.py.
+    """
+    if path is None:
+        from src.config.users import ADMINS, MEDIA_OUTLETS
+        entries = _from_lists(ADMINS, MEDIA_OUTLETS)
+    elif Path(path).suffix.lower() == '.csv':
+        with open(path, encoding='utf-8-sig', newline='') as f:
+            entries = [_entry(row) for row in csv.DictReader(f)]
+    elif Path(path).suffix.lower() in ('.yaml', '.yml'):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError("Для YAML нужен пакет PyYAML: pip install pyyaml")
+        with open(path, encoding='utf-8') as f:
+            data = yaml.safe_load(f) or []
+        if isinstance(data, dict):
+            entries = _from_lists(data.get('admins'), data.get('media_outlets'))
+        else:
+            entries = [_entry(item) for item in data]
+    else:
+        raise ValueError(f"Неизвестный формат файла: {path} (нужен .csv, .yaml или .yml)")
+
+    seen, duplicates = set(), set()
+    for entry in entries:
+        if entry.telegram_id in seen:
+            duplicates.add(entry.telegram_id)
+        seen.add(entry.telegram_id)
+    if duplicates:
+        raise ValueError(f"Пользователи указаны несколько раз: {', '.join(map(str, sorted(duplicates)))}")
+    return entries
+
+
+@dataclass
+class UserChange:
+    telegram_id: int
+    username: Optional[str]
+    # Поле: (было, стало)
+    fields: Dict[str, tuple] = field(default_factory=dict)
+
+    def __str__(self) -> str:
+        changes = ', '.join(f"{name}: {old!r} -> {new!r}" for name, (old, new) in self.fields.items())
+        return f"{self.telegram_id} ({self.username}){': ' + changes if changes else ''}"
+
+
+@dataclass
+class SyncReport:
+    created: List[UserChange] = field(default_factory=list)
+    updated: List[UserChange] = field(default_factory=list)
+    # Администраторы, которых нет в списке: снимается флаг is_admin, как в SuperadminService.remove_admin
+    demoted: List[UserChange] = field(default_factory=list)
+    # Представители СМИ, которых нет в списке: удаляются, как в SuperadminService.remove_media_outlet
+    removed: List[UserChange] = field(default_factory=list)
+    # Не удалены, потому что у них есть публикации или созданные задания
+    kept: List[UserChange] = field(default_factory=list)
+    # Суперадмины, роль которых список пытается изменить
+    skipped: List[UserChange] = field(default_factory=list)
+    unchanged: int = 0
+    # Строки users для пакетного upsert: добавленные и обновленные пользователи
+    rows: List[dict] = field(default_factory=list)
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.rows or self.demoted or self.removed)
+
+    def lines(self) -> List[str]:
+        result = [
+            f"Добавлено: {len(self.created)}, обновлено: {len(self.updated)}, "
+            f"снято с админов: {len(self.demoted)}, удалено: {len(self.removed)}, "
+            f"оставлено: {len(self.kept)}, пропущено: {len(self.skipped)}, без изменений: {self.unchanged}"
+        ]
+        sections = [
+            ("Добавлены", self.created),
+            ("Обновлены", self.updated),
+            ("Сняты с админов", self.demoted),
+            ("Удалены", self.removed),
+            ("Не удалены (есть публикации или задания)", self.kept),
+            ("Пропущены (суперадмины)", self.skipped),
+        ]
+        for title, changes in sections:
+            if changes:
+                result.append(f"{title}:")
+                result.extend(f"  {change}" for change in changes)
+        return result
+
+
+class UserSyncService:
+    """Синхронизация таблицы users со списком пользователей (CSV, YAML, src/config/users.py).
+
+    Сравнивает список с текущими пользователями и применяет разницу в одной
+    транзакции: добавления и изменения - пакетным INSERT ... ON CONFLICT по
+    telegram_id, снятие ролей и удаление - по одному запросу на пачку.
+    Суперадмины списком не меняются (кроме username).
+    """
+
+    # 6 параметров на строку: не больше 999 параметров на запрос в старых версиях SQLite
+    BATCH_SIZE = 150
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def plan(self, entries: List[RosterEntry], remove: bool = False) -> SyncReport:
+        """Вычисляет изменения без записи в БД; remove - убирать пользователей, которых нет в списке"""
+        report = SyncReport()
+        result = await self.session.execute(select(User))
+        existing = {user.telegram_id: user for user in result.scalars().all() if user.telegram_id is not None}
+        now = datetime.now()
+
+        for entry in entries:
+            user = existing.get(entry.telegram_id)
+            if user is None:
+                report.created.append(UserChange(entry.telegram_id, entry.username, {'role': (None, entry.role)}))
+                report.rows.append(self._row(entry.telegram_id, entry.username, entry.media_outlet, False, now))
+                continue
+
+            is_superadmin = bool(user.is_superadmin)
+            username = entry.username or user.username
+            if is_superadmin and entry.role != ROLE_ADMIN:
+                report.skipped.append(UserChange(entry.telegram_id, username, {'role': ('superadmin', entry.role)}))
+                continue
+
+            current = {'username': user.username, 'is_admin': bool(user.is_admin), 'media_outlet': user.media_outlet}
+            target = {'username': username, 'is_admin': entry.role == ROLE_ADMIN, 'media_outlet': entry.media_outlet}
+            fields = {name: (current[name], target[name]) for name in target if current[name] != target[name]}
+            if not fields:
+                report.unchanged += 1
+                continue
+            report.updated.append(UserChange(entry.telegram_id, username, fields))
+            report.rows.append(self._row(entry.telegram_id, username, entry.media_outlet, is_superadmin, now))
+
+        if remove:
+            listed = {entry.telegram_id for entry in entries}
+            missing = [
+                user for telegram_id, user in existing.items()
+                if telegram_id not in listed and not user.is_superadmin and (user.is_admin or user.media_outlet)
+            ]
+            referenced = await self._referenced_user_ids([user.id for user in missing if not user.is_admin])
+            for user in missing:
+                if user.is_admin:
+                    report.demoted.append(UserChange(user.telegram_id, user.username, {'is_admin': (True, False)}))
+                elif user.id in referenced:
+                    report.kept.append(UserChange(user.telegram_id, user.username))
+                else:
+                    report.removed.append(UserChange(user.telegram_id, user.username, {'media_outlet': (user.media_outlet, None)}))
+        return report
+
+    async def apply(self, report: SyncReport) -> None:
+        """Применяет изменения из plan() одной транзакцией"""
+        try:
+            if report.rows:
+                insert = postgresql.insert if self.session.bind.dialect.name == 'postgresql' else sqlite.insert
+                for batch in _batches(report.rows, self.BATCH_SIZE):
+                    statement = insert(User).values(batch)
+                    await self.session.execute(statement.on_conflict_do_update(
+                        index_elements=[User.telegram_id],
+                        set_={
+                            name: statement.excluded[name]
+                            for name in ('username', 'is_admin', 'is_superadmin', 'media_outlet', 'updated_at')
+                        }
+                    ))
+            for batch in _batches([change.telegram_id for change in report.demoted], self.BATCH_SIZE):
+                await self.session.execute(
+                    update(User).where(User.telegram_id.in_(batch)).values(is_admin=False, updated_at=datetime.now())
+                )
+            for batch in _batches([change.telegram_id for change in report.removed], self.BATCH_SIZE):
+                await self.session.execute(delete(User).where(User.telegram_id.in_(batch)))
+            await self.session.commit()
+        except Exception as e:
+            logging.error(f"Error syncing users: {e}", exc_info=True)
+            await self.session.rollback()
+            raise
+
+        for change in report.created + report.updated + report.demoted + report.removed:
+            invalidate_user(change.telegram_id)
+        logging.info(report.lines()[0])
+
+    async def sync(self, entries: List[RosterEntry], remove: bool = False, dry_run: bool = False) -> SyncReport:
+        report = await self.plan(entries, remove)
+        if report.has_changes and not dry_run:
+            await self.apply(report)
+        return report
+
+    @staticmethod
+    def _row(telegram_id: int, username: Optional[str], media_outlet: Optional[str], is_superadmin: bool, now: datetime) -> dict:
+        return {
+            'telegram_id': telegram_id,
+            'username': username,
+            'is_admin': not media_outlet,
+            'is_superadmin': is_superadmin,
+            'media_outlet': media_outlet,
+            'updated_at': now,
+        }
+
+    async def _referenced_user_ids(self, user_ids: List[int]) -> set:
+        """ID пользователей, на которых ссылаются публикации или задания"""
+        referenced = set()
+        for batch in _batches(user_ids, self.BATCH_SIZE):
+            result = await self.session.execute(
+                select(User.id).where(
+                    User.id.in_(batch),
+                    or_(
+                        User.id.in_(select(Submission.user_id)),
+                        User.id.in_(select(Task.created_by))
+                    )
+                )
+            )
+            referenced.update(result.scalars().all())
+        return referenced
+
+
+def _batches(items: list, size: int) -> Iterable[list]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
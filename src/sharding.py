@@ -0,0 +1,368 @@
+import asyncio
+import multiprocessing
+import queue
+import signal
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from src.app import create_bot, create_dispatcher
+from src.services.broadcast_service import Broadcaster
+from src.utils import invalidation
+from src.utils.metrics import REGISTRY, Snapshot
+from src.utils.logging_config import setup_logging, listen_queue
+from src.config.bot_config import (
+    BOT_WORKERS,
+    BROADCAST_GLOBAL_RATE,
+    SHARD_QUEUE_SIZE,
+    SHARD_WORKER_CONCURRENCY,
+    SHARD_MAX_PENDING,
+    SHARD_HEALTH_INTERVAL,
+    SHARD_HEARTBEAT_TIMEOUT,
+    SHARD_STOP_TIMEOUT
+)
+import logging
+
+# Как часто простаивающий воркер проверяет очередь апдейтов, сек
+_POLL_INTERVAL = 0.02
+# Сколько апдейтов (на один слот обработки) воркер держит взятыми из очереди, включая ждущие своей очереди
+_BACKLOG_PER_SLOT = 10
+
+
+@dataclass
+class ShardHealth:
+    index: int
+    alive: bool
+    pending: int
+    heartbeat_age: float
+    overloaded: bool
+    stalled: bool
+
+    @property
+    def ok(self) -> bool:
+        return self.alive and not self.overloaded and not self.stalled
+
+
+class _Shard:
+    def __init__(self, index: int, context, queue_size: int):
+        self.index = index
+        self.updates = context.Queue(maxsize=queue_size)
+        # Сколько апдейтов воркер взял из очереди и сколько обработал; разница - апдейты в работе
+        self.taken = context.Value('q', 0)
+        self.processed = context.Value('q', 0)
+        self.heartbeat = context.Value('d', time.time())
+        # telegram_id, чьи записи кэша пользователей воркер должен сбросить
+        self.invalidations = context.Queue()
+        self.buffer: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.sent = 0
+        self.process = None
+        self.feeder: Optional[asyncio.Task] = None
+
+
+class ShardPool:
+    """Распределение апдейтов по процессам-воркерам.
+
+    Основной процесс получает апдейты (polling или webhook) и отправляет каждый
+    в воркер по ID пользователя, поэтому все апдейты одного пользователя
+    обрабатывает один процесс и в порядке поступления. FSM и данные лежат в общей БД.
+    Если воркер не успевает, его очередь заполняется и прием апдейтов замедляется.
+    Упавший воркер перезапускается; апдейты, которые он обрабатывал в момент падения, теряются.
+    Сброс кэша в одном воркере (invalidate_user, invalidate_moderation_pages) пересылается всем воркерам,
+    иначе остальные воркеры видели бы старые роли и старую очередь модерации до истечения кэша.
+    """
+
+    def __init__(
+        self,
+        workers: int = BOT_WORKERS,
+        queue_size: int = SHARD_QUEUE_SIZE,
+        concurrency: int = SHARD_WORKER_CONCURRENCY,
+        max_pending: int = SHARD_MAX_PENDING,
+        health_interval: float = SHARD_HEALTH_INTERVAL,
+        heartbeat_timeout: float = SHARD_HEARTBEAT_TIMEOUT
+    ):
+        self.workers = max(workers, 1)
+        self.queue_size = queue_size
+        self.concurrency = concurrency
+        self.max_pending = max_pending
+        self.health_interval = health_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        # Лимит Telegram на рассылку общий для бота, делим его между основным процессом и воркерами
+        self.broadcast_rate = BROADCAST_GLOBAL_RATE / (self.workers + 1)
+        # spawn: дочерний процесс не наследует цикл событий и потоки основного
+        self._context = multiprocessing.get_context("spawn")
+        self._shards: List[_Shard] = []
+        self._monitor: Optional[asyncio.Task] = None
+        self._stopping = False
+        # Воркеры раз в health_interval присылают snapshot своих метрик
+        self._metrics_queue = self._context.Queue()
+        # Записи логов воркеров пишет основной процесс
+        self._log_queue = self._context.Queue()
+        self._log_listener = None
+        self._worker_metrics: Dict[int, Snapshot] = {}
+        # Воркеры присылают (вид, значение) сброшенного кэша, основной процесс рассылает их всем
+        self._invalidations = self._context.Queue()
+        self._relay: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._shards:
+            return
+        self._log_listener = listen_queue(self._log_queue)
+        for index in range(self.workers):
+            shard = _Shard(index, self._context, self.queue_size)
+            self._start_process(shard)
+            shard.feeder = asyncio.create_task(self._feed(shard))
+            self._shards.append(shard)
+        self._monitor = asyncio.create_task(self._monitor_loop())
+        self._relay = asyncio.create_task(self._relay_invalidations())
+        logging.info(f"Started {self.workers} update workers")
+
+    async def route(self, key: int, update: Update) -> None:
+        """Ставит апдейт в очередь воркера; ждет, если очередь заполнена"""
+        shard = self._shards[key % len(self._shards)]
+        await shard.buffer.put((key, update.model_dump_json(exclude_unset=True)))
+
+    def health(self) -> List[ShardHealth]:
+        now = time.time()
+        result = []
+        for shard in self._shards:
+            pending = shard.sent + shard.buffer.qsize() - shard.processed.value
+            heartbeat_age = now - shard.heartbeat.value
+            result.append(ShardHealth(
+                index=shard.index,
+                alive=shard.process.is_alive(),
+                pending=pending,
+                heartbeat_age=round(heartbeat_age, 1),
+                overloaded=pending >= self.max_pending,
+                stalled=heartbeat_age > self.heartbeat_timeout
+            ))
+        return result
+
+    def health_report(self) -> dict:
+        health = self.health()
+        return {
+            'ok': all(shard.ok for shard in health),
+            'workers': [asdict(shard) for shard in health]
+        }
+
+    def metrics_sources(self) -> List[Tuple[Dict[str, str], Snapshot]]:
+        """Метрики основного процесса и последние полученные метрики воркеров"""
+        self._collect_metrics()
+        sources = [({'worker': 'main'}, REGISTRY.snapshot())]
+        for index, snapshot in sorted(self._worker_metrics.items()):
+            sources.append(({'worker': str(index)}, snapshot))
+        return sources
+
+    def _collect_metrics(self) -> None:
+        while True:
+            try:
+                index, snapshot = self._metrics_queue.get_nowait()
+            except queue.Empty:
+                return
+            # Snapshot накопительный, достаточно последнего
+            self._worker_metrics[index] = snapshot
+
+    async def stop(self, timeout: float = SHARD_STOP_TIMEOUT) -> None:
+        """Досылает принятые апдейты в воркеры и ждет, пока они их обработают"""
+        if not self._shards:
+            return
+        self._stopping = True
+        self._monitor.cancel()
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(shard.buffer.join() for shard in self._shards)),
+                timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            logging.warning("Some updates were not passed to workers before shutdown")
+        for shard in self._shards:
+            shard.feeder.cancel()
+            # None - сигнал воркеру завершиться после уже полученных апдейтов
+            await asyncio.to_thread(shard.updates.put, None)
+
+        for shard in self._shards:
+            await asyncio.to_thread(shard.process.join, timeout)
+            if shard.process.is_alive():
+                logging.warning(f"Worker {shard.index} did not stop in time, terminating")
+                shard.process.terminate()
+        await asyncio.gather(self._monitor, *(shard.feeder for shard in self._shards), return_exceptions=True)
+        # None - сигнал потоку пересылки завершиться
+        self._invalidations.put(None)
+        await asyncio.gather(self._relay, return_exceptions=True)
+        self._shards = []
+        self._log_listener.stop()
+
+    def _start_process(self, shard: _Shard) -> None:
+        if shard.process is not None:
+            # Апдейты, которые упавший воркер взял, но не обработал, потеряны: они больше не ожидают обработки
+            lost = shard.taken.value - shard.processed.value
+            shard.processed.value = shard.taken.value
+            if lost:
+                logging.warning(f"Worker {shard.index} lost {lost} updates in progress")
+        shard.heartbeat.value = time.time()
+        shard.process = self._context.Process(
+            target=_worker_main,
+            args=(
+                shard.index, shard.updates, shard.taken, shard.processed, shard.heartbeat, self._metrics_queue,
+                self._log_queue, shard.invalidations, self._invalidations, self.concurrency, self.broadcast_rate, self.health_interval
+            ),
+            name=f"bot-worker-{shard.index}",
+            daemon=True
+        )
+        shard.process.start()
+
+    async def _feed(self, shard: _Shard) -> None:
+        # Один поставщик на воркер сохраняет порядок апдейтов
+        while True:
+            item = await shard.buffer.get()
+            try:
+                try:
+                    shard.updates.put_nowait(item)
+                except queue.Full:
+                    await asyncio.to_thread(shard.updates.put, item)
+                shard.sent += 1
+            finally:
+                shard.buffer.task_done()
+
+    async def _relay_invalidations(self) -> None:
+        while True:
+            item = await asyncio.to_thread(self._invalidations.get)
+            if item is None:
+                return
+            invalidation.invalidate(*item, propagate=False)
+            for shard in self._shards:
+                shard.invalidations.put(item)
+
+    async def _monitor_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_interval)
+            self._collect_metrics()
+            for health in self.health():
+                if not health.alive and not self._stopping:
+                    logging.error(f"Worker {health.index} died, restarting")
+                    self._start_process(self._shards[health.index])
+                elif health.stalled:
+                    logging.warning(f"Worker {health.index} has not responded for {health.heartbeat_age}s")
+                elif health.overloaded:
+                    logging.warning(f"Worker {health.index} is overloaded: {health.pending} pending updates")
+
+
+class ShardRoutingMiddleware(BaseMiddleware):
+    """Outer-middleware основного процесса: передает апдейт воркеру вместо обработки"""
+
+    def __init__(self, pool: ShardPool):
+        self.pool = pool
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any]
+    ) -> Any:
+        user = data.get("event_from_user")
+        chat = data.get("event_chat")
+        key = user.id if user else (chat.id if chat else 0)
+        await self.pool.route(abs(key), event)
+
+
+def _worker_main(
+    index, updates, taken, processed, heartbeat, metrics, log_queue, invalidations, invalidated,
+    concurrency: int, broadcast_rate: float, metrics_interval: float
+) -> None:
+    # Остановкой воркеров управляет основной процесс, Ctrl+C в терминале их не касается
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    setup_logging(log_queue)
+    asyncio.run(_run_worker(
+        index, updates, taken, processed, heartbeat, metrics, invalidations, invalidated,
+        concurrency, broadcast_rate, metrics_interval
+    ))
+
+
+def _apply_invalidations(invalidations) -> None:
+    """Сбрасывает кэш, измененный в других воркерах"""
+    while True:
+        try:
+            kind, value = invalidations.get_nowait()
+        except queue.Empty:
+            return
+        invalidation.invalidate(kind, value, propagate=False)
+
+
+async def _run_worker(
+    index, updates, taken, processed, heartbeat, metrics, invalidations, invalidated,
+    concurrency: int, broadcast_rate: float, metrics_interval: float
+) -> None:
+    from src.database.engine import engine
+
+    bot = create_bot()
+    session_pool = async_sessionmaker(engine, expire_on_commit=False)
+    broadcaster = Broadcaster(global_rate=broadcast_rate)
+    dp = create_dispatcher(bot, session_pool, broadcaster)
+
+    # Слот занимает только апдейт, который обрабатывается, а не ждет предыдущих апдейтов того же пользователя:
+    # иначе один пользователь, приславший много апдейтов подряд, занял бы все слоты воркера
+    slots = asyncio.Semaphore(max(concurrency, 1))
+    # Ограничение на взятые из очереди апдейты; когда оно исчерпано, очередь и прием апдейтов притормаживают
+    backlog = asyncio.Semaphore(max(concurrency, 1) * _BACKLOG_PER_SLOT)
+    locks: Dict[int, asyncio.Lock] = {}
+    waiting: Dict[int, int] = {}
+    tasks: Set[asyncio.Task] = set()
+
+    async def process(key: int, update: Update) -> None:
+        # Апдейты одного пользователя обрабатываются строго по очереди
+        lock = locks.setdefault(key, asyncio.Lock())
+        waiting[key] = waiting.get(key, 0) + 1
+        try:
+            async with lock, slots:
+                await dp.feed_update(bot, update)
+        except Exception as e:
+            logging.error(f"Worker {index}: error processing update {update.update_id}: {e}", exc_info=True)
+        finally:
+            waiting[key] -= 1
+            if not waiting[key]:
+                del waiting[key]
+                del locks[key]
+            backlog.release()
+            with processed.get_lock():
+                processed.value += 1
+
+    logging.info(f"Worker {index} started")
+    # Не ждем при выходе, пока основной процесс заберет последний snapshot метрик
+    metrics.cancel_join_thread()
+    # Сбросы кэша в этом воркере уходят основному процессу, а он рассылает их всем воркерам
+    invalidation.add_listener(lambda kind, value: invalidated.put((kind, value)))
+    invalidated.cancel_join_thread()
+    metrics_sent = 0.0
+    try:
+        while True:
+            heartbeat.value = time.time()
+            if heartbeat.value - metrics_sent >= metrics_interval:
+                metrics.put((index, REGISTRY.snapshot()))
+                metrics_sent = heartbeat.value
+            _apply_invalidations(invalidations)
+            try:
+                item = updates.get_nowait()
+            except queue.Empty:
+                # Не ждем в updates.get: он держит блокировку чтения очереди все время ожидания,
+                # и если воркер убьют в этот момент, перезапущенный воркер не сможет читать очередь
+                await asyncio.sleep(_POLL_INTERVAL)
+                continue
+            if item is None:
+                break
+            with taken.get_lock():
+                taken.value += 1
+            key, payload = item
+            update = Update.model_validate_json(payload, context={"bot": bot})
+            await backlog.acquire()
+            task = asyncio.create_task(process(key, update))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+    finally:
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        await broadcaster.close()
+        await dp.storage.close()
+        await bot.session.close()
+        await engine.dispose()
+        logging.info(f"Worker {index} stopped")
@@ -0,0 +1,28 @@
+from typing import Any, Callable, Dict, Hashable, List
+
+# Сброс кэша в этом процессе по виду кэша
+_handlers: Dict[str, Callable[[Hashable], None]] = {}
+# Получают (вид, значение) после сброса: так воркер ShardPool передает сброс остальным процессам
+_listeners: List[Callable[[str, Hashable], None]] = []
+
+
+def register(kind: str, handler: Callable[[Hashable], None]) -> None:
+    """Регистрирует сброс кэша вида kind в этом процессе"""
+    _handlers[kind] = handler
+
+
+def add_listener(listener: Callable[[str, Hashable], None]) -> None:
+    _listeners.append(listener)
+
+
+def invalidate(kind: str, value: Any = None, propagate: bool = True) -> None:
+    """Сбрасывает кэш в этом процессе и сообщает о сбросе слушателям.
+
+    propagate=False - сброс, пришедший из другого процесса, дальше не передается.
+    """
+    handler = _handlers.get(kind)
+    if handler is not None:
+        handler(value)
+    if propagate:
+        for listener in _listeners:
+            listener(kind, value)
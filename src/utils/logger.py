@@ -1,14 +1,4 @@
 import logging
 
-def setup_logger():
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler('bot.log'),
-            logging.StreamHandler()
-        ]
-    )
-    return logging.getLogger(__name__)
-
-logger = setup_logger()
\ No newline at end of file
+# Логирование настраивает setup_logging() при запуске бота
+logger = logging.getLogger(__name__)
\ No newline at end of file
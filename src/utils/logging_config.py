@@ -1,52 +1,190 @@
+import atexit
+import json
 import logging
+import logging.handlers
+import queue
+import random
 import re
 import sys
+from contextvars import ContextVar
+from datetime import datetime
+from typing import List
+from src.config.bot_config import (
+    LOG_LEVEL,
+    LOG_FILE,
+    LOG_MAX_BYTES,
+    LOG_BACKUP_COUNT,
+    LOG_DEBUG_MODULES,
+    LOG_DEBUG_SAMPLE_RATE
+)
 
-class EmojiFilter(logging.Filter):
-    """Фильтр для замены эмодзи на текстовые эквиваленты в логах"""
-    
-    EMOJI_TO_TEXT = {
-        '✅': '[OK]',
-        '❌': '[ERROR]',
-        '📨': '[NEW]',
-        '📸': '[PHOTO]',
-        '🕒': '[WAIT]',
-        '📝': '[EDIT]',
-        '⚠️': '[WARN]',
-        '🎉': '[CONGRATS]',
-        '🔗': '[LINK]',
-        '📣': '[ANNOUNCE]'
-    }
-    
-    def filter(self, record):
-        if isinstance(record.msg, str):
-            for emoji, text in self.EMOJI_TO_TEXT.items():
-                record.msg = record.msg.replace(emoji, text)
-        return True
-
-def setup_logging():
-    """Настройка логирования с фильтрацией эмодзи"""
-    
-    # Создаем форматтер для логов
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
-    
-    # Создаем обработчик для вывода в консоль
+EMOJI_TO_TEXT = {
+    '✅': '[OK]',
+    '❌': '[ERROR]',
+    '📨': '[NEW]',
+    '📸': '[PHOTO]',
+    '🕒': '[WAIT]',
+    '📝': '[EDIT]',
+    '⚠️': '[WARN]',
+    '🎉': '[CONGRATS]',
+    '🔗': '[LINK]',
+    '📣': '[ANNOUNCE]'
+}
+# Длинные последовательности первыми, чтобы '⚠️' заменялся целиком
+_EMOJI_RE = re.compile('|'.join(map(re.escape, sorted(EMOJI_TO_TEXT, key=len, reverse=True))))
+
+
+def replace_emoji(text: str) -> str:
+    """Заменяет эмодзи текстовыми эквивалентами за один проход"""
+    return _EMOJI_RE.sub(lambda match: EMOJI_TO_TEXT[match.group()], text)
+
+
+class EmojiSafeFormatter(logging.Formatter):
+    """Форматтер для вывода, который не умеет эмодзи (например, консоль Windows).
+
+    Сама запись не меняется: ее же получают остальные обработчики.
+    """
+
+    def format(self, record):
+        message = record.getMessage()
+        safe = replace_emoji(message)
+        if safe != message:
+            record = logging.makeLogRecord(vars(record))
+            record.msg = safe
+            record.args = None
+        return super().format(record)
+
+
+def _supports_emoji(stream) -> bool:
+    try:
+        ''.join(EMOJI_TO_TEXT).encode(getattr(stream, 'encoding', None) or 'ascii')
+    except (UnicodeEncodeError, LookupError):
+        return False
+    return True
+
+
+# Стандартные атрибуты LogRecord; остальные пришли через extra= и попадают в JSON как есть
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна запись - одна строка JSON"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'process': record.processName,
+            'message': record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = record.stack_info
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler, который не форматирует запись в цикле событий.
+
+    В очередь уходит запись с подставленными аргументами и текстом исключения,
+    а формат (текст для консоли, JSON для файла) выбирают обработчики в потоке
+    QueueListener.
+    """
+
+    def prepare(self, record):
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _create_handlers() -> List[logging.Handler]:
+    # Консоль - в привычном текстовом виде; эмодзи заменяются, только если кодировка их не поддерживает
     console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setFormatter(formatter)
-    
-    # Создаем обработчик для записи в файл
-    file_handler = logging.FileHandler('bot.log', encoding='utf-8')
-    file_handler.setFormatter(formatter)
-    
-    # Добавляем фильтр эмодзи к обоим обработчикам
-    emoji_filter = EmojiFilter()
-    console_handler.addFilter(emoji_filter)
-    file_handler.addFilter(emoji_filter)
-    
-    # Настраиваем корневой логгер
+    formatter_class = logging.Formatter if _supports_emoji(sys.stdout) else EmojiSafeFormatter
+    console_handler.setFormatter(formatter_class(
+        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    ))
+    handlers = [console_handler]
+
+    # Файл - JSON-строки с ротацией по размеру
+    if LOG_FILE:
+        file_handler = logging.handlers.RotatingFileHandler(
+            LOG_FILE, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding='utf-8'
+        )
+        # Файл всегда в UTF-8, эмодзи остаются как есть
+        file_handler.setFormatter(JsonFormatter())
+        handlers.append(file_handler)
+    return handlers
+
+
+# Пишутся ли отладочные записи текущего апдейта
+_debug_sampled: ContextVar[bool] = ContextVar('debug_sampled', default=True)
+
+
+def sample_debug() -> None:
+    """Решает для текущего апдейта, писать ли его отладочные записи (LOG_DEBUG_SAMPLE_RATE).
+
+    Решение общее для всех записей апдейта, поэтому отобранные апдейты видны в логе целиком.
+    """
+    if LOG_DEBUG_SAMPLE_RATE < 1:
+        _debug_sampled.set(random.random() < LOG_DEBUG_SAMPLE_RATE)
+
+
+class DebugSampler(logging.Filter):
+    def filter(self, record):
+        return record.levelno > logging.DEBUG or _debug_sampled.get()
+
+
+class _ForwardHandler(logging.Handler):
+    """Передает запись логгерам этого процесса, как будто она создана здесь"""
+
+    def emit(self, record):
+        logging.getLogger(record.name).handle(record)
+
+
+def listen_queue(log_queue) -> logging.handlers.QueueListener:
+    """Запускает поток, который передает записи из log_queue логированию этого процесса.
+
+    Так воркеры ShardPool пишут в консоль и файл через основной процесс,
+    и ротацию файла выполняет только он.
+    """
+    listener = logging.handlers.QueueListener(log_queue, _ForwardHandler())
+    listener.start()
+    return listener
+
+
+def setup_logging(log_queue=None):
+    """Настройка логирования: запись в цикле событий только ставится в очередь,
+    консоль и файл пишет отдельный поток.
+
+    Отладочные записи пишут только логгеры из LOG_DEBUG_MODULES. Если передана
+    log_queue (воркер ShardPool), записи уходят в нее, а пишет их основной процесс.
+    Повторный вызов ничего не делает.
+    """
     root_logger = logging.getLogger()
-    root_logger.setLevel(logging.INFO)
-    root_logger.addHandler(console_handler)
-    root_logger.addHandler(file_handler) 
\ No newline at end of file
+    if any(isinstance(handler, _QueueHandler) for handler in root_logger.handlers):
+        return
+
+    root_logger.setLevel(LOG_LEVEL)
+    for name in LOG_DEBUG_MODULES:
+        logging.getLogger(name).setLevel(logging.DEBUG)
+    if log_queue is None:
+        log_queue = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(log_queue, *_create_handlers(), respect_handler_level=True)
+        listener.start()
+        # При выходе поток дописывает оставшиеся записи
+        atexit.register(listener.stop)
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(DebugSampler())
+    root_logger.addHandler(queue_handler)
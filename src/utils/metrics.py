@@ -0,0 +1,176 @@
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Границы корзин гистограмм, сек
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+Snapshot = Dict[str, Dict[LabelValues, object]]
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _CounterChild:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class _HistogramChild:
+    __slots__ = ('buckets', 'counts', 'sum')
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        # Последний элемент - корзина +Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class _Metric:
+    type = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), registry: Optional['Registry'] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[LabelValues, object] = {}
+        (registry or REGISTRY).register(self)
+
+    def labels(self, *values) -> object:
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = self._new_child()
+        return child
+
+    def _new_child(self) -> object:
+        raise NotImplementedError
+
+    def snapshot(self) -> Dict[LabelValues, object]:
+        raise NotImplementedError
+
+    def samples(self, labels: Dict[str, str], value: object) -> Iterable[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type = 'counter'
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def snapshot(self) -> Dict[LabelValues, float]:
+        return {key: child.value for key, child in self._children.items()}
+
+    def samples(self, labels: Dict[str, str], value: float) -> Iterable[str]:
+        yield f"{self.name}{_format_labels(labels)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS, registry: Optional['Registry'] = None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def snapshot(self) -> Dict[LabelValues, Tuple[List[int], float]]:
+        return {key: (list(child.counts), child.sum) for key, child in self._children.items()}
+
+    def samples(self, labels: Dict[str, str], value: Tuple[List[int], float]) -> Iterable[str]:
+        counts, total = value
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += count
+            yield f"{self.name}_bucket{_format_labels({**labels, 'le': _format_value(bound)})} {cumulative}"
+        yield f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}"
+        yield f"{self.name}_count{_format_labels(labels)} {cumulative}"
+
+
+class Registry:
+    """Набор метрик процесса и их вывод в текстовом формате Prometheus.
+
+    Метрики живут внутри одного event loop, поэтому обходятся без блокировок.
+    Воркеры ShardPool передают основному процессу snapshot() своих метрик,
+    а render() выводит их вместе с метриками основного процесса.
+    """
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> None:
+        self._metrics.append(metric)
+
+    def snapshot(self) -> Snapshot:
+        return {metric.name: metric.snapshot() for metric in self._metrics}
+
+    def render(self, sources: Optional[List[Tuple[Dict[str, str], Snapshot]]] = None) -> str:
+        """sources - пары (дополнительные метки, snapshot); по умолчанию только этот процесс"""
+        if sources is None:
+            sources = [({}, self.snapshot())]
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for extra, snapshot in sources:
+                for key, value in snapshot.get(metric.name, {}).items():
+                    labels = {**dict(zip(metric.labelnames, key)), **extra}
+                    lines.extend(metric.samples(labels, value))
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+# SQL-запросы текущего обработчика: [число запросов, суммарное время]; None - вне обработчика
+db_usage: ContextVar[Optional[list]] = ContextVar('db_usage', default=None)
+
+UPDATE_DURATION = Histogram(
+    'bot_update_duration_seconds', 'Время обработки апдейта, включая middleware', ['event_type']
+)
+HANDLER_DURATION = Histogram(
+    'bot_handler_duration_seconds', 'Время работы обработчика', ['router', 'handler']
+)
+HANDLER_ERRORS = Counter(
+    'bot_handler_errors_total', 'Исключения, вышедшие из обработчика', ['router', 'handler']
+)
+HANDLER_DB_QUERIES = Counter(
+    'bot_handler_db_queries_total', 'SQL-запросы, выполненные обработчиком', ['router', 'handler']
+)
+HANDLER_DB_SECONDS = Counter(
+    'bot_handler_db_seconds_total', 'Время SQL-запросов обработчика, сек', ['router', 'handler']
+)
+DB_QUERY_DURATION = Histogram(
+    'bot_db_query_duration_seconds', 'Время выполнения SQL-запроса', ['operation'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+)
+TELEGRAM_REQUEST_DURATION = Histogram(
+    'bot_telegram_request_duration_seconds', 'Время запроса к Bot API', ['method']
+)
+TELEGRAM_REQUESTS = Counter(
+    'bot_telegram_requests_total', 'Запросы к Bot API по результату', ['method', 'result']
+)
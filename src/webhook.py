@@ -0,0 +1,166 @@
+import asyncio
+import hmac
+import signal
+from typing import Callable, Optional, Set
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from aiohttp import web
+from src.config.bot_config import (
+    WEBHOOK_HOST,
+    WEBHOOK_PORT,
+    WEBHOOK_PATH,
+    WEBHOOK_BASE_URL,
+    WEBHOOK_SECRET,
+    WEBHOOK_MAX_CONCURRENT_UPDATES,
+    WEBHOOK_MAX_CONNECTIONS,
+    WEBHOOK_DRAIN_TIMEOUT
+)
+import logging
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+class WebhookServer:
+    """Прием апдейтов от Telegram через aiohttp вместо long polling.
+
+    Запрос принимается только с верным секретным токеном. Апдейт обрабатывается
+    в фоне, а ответ Telegram отправляется сразу после того, как освободился слот:
+    одновременно обрабатывается не больше max_concurrent апдейтов, остальные
+    запросы ждут, и Telegram не присылает новые, пока не получит ответ.
+    При остановке сервер перестает принимать апдейты и дожидается уже принятых.
+
+    Несколько экземпляров за балансировщиком можно запускать только с FSM_SHARED=true
+    (или если балансировщик направляет все апдейты пользователя в один экземпляр):
+    иначе кэш и отложенная запись хранилища FSM отдают другим экземплярам устаревшее
+    состояние. Кэш пользователей другие экземпляры сбрасывают только по истечении
+    USER_CACHE_TTL, поэтому изменение ролей доходит до них с этой задержкой.
+    Кэш страниц очереди модерации между экземплярами не сбрасывается, для нескольких
+    экземпляров его нужно отключить: MODERATION_PAGE_TTL=0.
+    GET /healthz отвечает 503 во время остановки и когда health_check сообщает
+    о проблеме (например, перегружен воркер).
+    """
+
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        bot: Bot,
+        path: str = WEBHOOK_PATH,
+        secret_token: str = WEBHOOK_SECRET,
+        max_concurrent: int = WEBHOOK_MAX_CONCURRENT_UPDATES,
+        drain_timeout: float = WEBHOOK_DRAIN_TIMEOUT,
+        health_check: Optional[Callable[[], dict]] = None
+    ):
+        self.dispatcher = dispatcher
+        self.bot = bot
+        self.path = path
+        self.secret_token = secret_token
+        self.drain_timeout = drain_timeout
+        self.health_check = health_check
+        self._slots = asyncio.Semaphore(max(max_concurrent, 1))
+        self._tasks: Set[asyncio.Task] = set()
+        self._draining = False
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post(self.path, self.handle_update)
+        app.router.add_get("/healthz", self.handle_health)
+        return app
+
+    async def handle_update(self, request: web.Request) -> web.Response:
+        token = request.headers.get(SECRET_HEADER, "")
+        if not hmac.compare_digest(token, self.secret_token):
+            logging.warning(f"Webhook request with invalid secret token from {request.remote}")
+            return web.Response(status=401)
+        if self._draining:
+            # Telegram повторит доставку, апдейт получит другой экземпляр или этот после перезапуска
+            return web.Response(status=503)
+
+        try:
+            update = Update.model_validate(await request.json(), context={"bot": self.bot})
+        except Exception as e:
+            logging.error(f"Invalid webhook payload: {e}")
+            return web.Response(status=400)
+
+        await self._slots.acquire()
+        if self._draining:
+            self._slots.release()
+            return web.Response(status=503)
+        task = asyncio.create_task(self._process(update))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return web.Response()
+
+    async def handle_health(self, request: web.Request) -> web.Response:
+        if self._draining:
+            return web.Response(status=503, text="draining")
+        if self.health_check is not None:
+            report = self.health_check()
+            return web.json_response(report, status=200 if report['ok'] else 503)
+        return web.Response(text="ok")
+
+    async def _process(self, update: Update) -> None:
+        try:
+            await self.dispatcher.feed_update(self.bot, update)
+        except Exception as e:
+            logging.error(f"Error processing update {update.update_id}: {e}", exc_info=True)
+        finally:
+            self._slots.release()
+
+    async def drain(self) -> None:
+        """Перестает принимать апдейты и ждет завершения принятых"""
+        self._draining = True
+        if not self._tasks:
+            return
+        logging.info(f"Waiting for {len(self._tasks)} updates in progress")
+        done, pending = await asyncio.wait(set(self._tasks), timeout=self.drain_timeout)
+        if pending:
+            logging.warning(f"Cancelled {len(pending)} updates after drain timeout")
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def run_webhook(
+    dispatcher: Dispatcher,
+    bot: Bot,
+    health_check: Optional[Callable[[], dict]] = None
+) -> None:
+    """Запускает webhook-сервер и работает до SIGINT/SIGTERM"""
+    server = WebhookServer(dispatcher, bot, health_check=health_check)
+    runner = web.AppRunner(server.create_app(), handle_signals=False)
+    await runner.setup()
+
+    workflow_data = {"dispatcher": dispatcher, "bots": [bot], **dispatcher.workflow_data}
+    workflow_data.pop("bot", None)
+    await dispatcher.emit_startup(bot=bot, **workflow_data)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            # Windows: остановка по Ctrl+C через KeyboardInterrupt
+            pass
+
+    try:
+        site = web.TCPSite(runner, WEBHOOK_HOST, WEBHOOK_PORT)
+        await site.start()
+        logging.info(f"Webhook server listening on {WEBHOOK_HOST}:{WEBHOOK_PORT}{server.path}")
+
+        if WEBHOOK_BASE_URL:
+            await bot.set_webhook(
+                url=f"{WEBHOOK_BASE_URL.rstrip('/')}{server.path}",
+                secret_token=WEBHOOK_SECRET,
+                max_connections=WEBHOOK_MAX_CONNECTIONS,
+                allowed_updates=dispatcher.resolve_used_update_types()
+            )
+            logging.info("Webhook registered in Telegram")
+
+        await stop.wait()
+        logging.info("Stopping webhook server...")
+    finally:
+        await server.drain()
+        # Webhook в Telegram не удаляем: его используют и другие экземпляры
+        await runner.cleanup()
+        await dispatcher.emit_shutdown(bot=bot, **workflow_data)
@@ -0,0 +1,54 @@
+"""Синхронизация пользователей бота со списком из файла.
+
+Список - CSV (telegram_id,username,media_outlet[,role]), YAML (admins/media_outlets,
+как в src/config/users.py) или, без аргумента, сам src/config/users.py.
+Новые пользователи добавляются, у существующих обновляются username, роль и СМИ;
+все изменения записываются в одной транзакции пакетными запросами.
+С --remove администраторы, которых нет в списке, теряют права, а представители
+СМИ удаляются (если у них нет публикаций). Суперадмины не меняются.
+
+Бот увидит изменения ролей после истечения кэшей пользователей (USER_CACHE_TTL, ADMIN_ROSTER_TTL).
+
+Запуск: python sync_users.py outlets.csv --dry-run
+        python sync_users.py outlets.csv --remove
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+os.environ.setdefault("BOT_TOKEN", "0:sync")
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from src.database.engine import engine
+from src.services.user_sync_service import UserSyncService, load_roster
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path', nargs='?', help="CSV или YAML; по умолчанию src/config/users.py")
+    parser.add_argument('--remove', action='store_true', help="убрать пользователей, которых нет в списке")
+    parser.add_argument('--dry-run', action='store_true', help="только показать изменения")
+    args = parser.parse_args()
+
+    try:
+        entries = load_roster(args.path)
+    except (OSError, ValueError) as e:
+        print(f"Ошибка чтения списка: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    session_pool = async_sessionmaker(engine, expire_on_commit=False)
+    try:
+        async with session_pool() as session:
+            report = await UserSyncService(session).sync(entries, remove=args.remove, dry_run=args.dry_run)
+    finally:
+        await engine.dispose()
+
+    print(f"В списке {len(entries)} пользователей")
+    print('\n'.join(report.lines()))
+    if args.dry_run and report.has_changes:
+        print("Пробный запуск: изменения не записаны")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())